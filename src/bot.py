@@ -1,33 +1,138 @@
 import os
 import asyncio
-from aiogram import Bot
+from aiohttp import web
+from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 from services.database import Database
 from dispatcher import get_dispatcher
+from middlewares import ConcurrencyLimitMiddleware
+from services.outbox import OutboxSender
+from services.broadcast import BroadcastManager
+from services.rate_limit import TelegramRateLimiter
+from services.metrics import metrics_handler, start_metrics_server
+
+def env_flag(name: str, default: str = "False") -> bool:
+    """Чтение булевой переменной окружения"""
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+async def run_polling(dp: Dispatcher, bot: Bot, db: Database):
+    """Получение апдейтов через long polling"""
+    # Своего веб-приложения нет - метрики отдаем отдельным сервером, если задан порт
+    metrics_runner = None
+    metrics_port = int(os.getenv("METRICS__PORT", 0))
+    if metrics_port:
+        metrics_runner = await start_metrics_server(
+            db.metrics, os.getenv("METRICS__HOST", "0.0.0.0"), metrics_port, db.pool_stats
+        )
+
+    # Вебхук и polling взаимоисключающие - снимаем вебхук, если он был
+    await bot.delete_webhook()
+    try:
+        await dp.start_polling(bot)
+    finally:
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+
+async def run_webhook(dp: Dispatcher, bot: Bot, db: Database):
+    """Получение апдейтов через вебхук (aiohttp-приложение)"""
+    path = os.getenv("WEBHOOK__PATH", "/webhook")
+    secret = os.getenv("WEBHOOK__SECRET") or None
+
+    # Апдейты обрабатываются в фоне, поэтому число одновременных обработчиков ограничиваем явно
+    dp.update.outer_middleware(
+        ConcurrencyLimitMiddleware(int(os.getenv("WEBHOOK__MAX_CONCURRENCY", 100)))
+    )
+
+    async def on_startup(bot: Bot):
+        await bot.set_webhook(
+            url=f"{os.getenv('WEBHOOK__URL', '').rstrip('/')}{path}",
+            secret_token=secret,
+            allowed_updates=dp.resolve_used_update_types()
+        )
+
+    dp.startup.register(on_startup)
+
+    async def health(request: web.Request) -> web.Response:
+        """Проверка живости для балансировщика"""
+        stats = db.pool_stats()
+        return web.json_response({
+            "status": "ok" if stats["connected"] and stats["circuit"] == "closed" else "degraded",
+            "database": stats
+        })
+
+    app = web.Application()
+    app.router.add_get("/health", health)
+    app.router.add_get("/metrics", metrics_handler(db.metrics, db.pool_stats))
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=secret).register(app, path=path)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(
+        runner,
+        host=os.getenv("WEBHOOK__HOST", "0.0.0.0"),
+        port=int(os.getenv("WEBHOOK__PORT", 8080))
+    )
+    await site.start()
+    try:
+        # Работаем до остановки процесса
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
 
 async def main():
     # Инициализация базы данных
     db = Database()
     if not await db.initialize():
-        print("❌ Не удалось инициализировать БД! Работа бота будет ограничена.")
-    
-    # Инициализация бота
+        print("❌ Не удалось инициализировать БД! Подключение будет повторяться в фоне.")
+    # Дальше пул восстанавливает супервизор, хендлеры при недоступной БД не ждут
+    db.start_supervisor()
+
+    # Инициализация бота. TG__API_URL - свой сервер Bot API
+    # (локальный telegram-bot-api или tools/fake_bot_api для нагрузочных тестов)
+    session = None
+    api_url = os.getenv("TG__API_URL")
+    if api_url:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(api_url))
     bot = Bot(
         token=os.getenv("TG__BOT_TOKEN"),
+        session=session,
         default=DefaultBotProperties(parse_mode="HTML")
     )
-    
+
     # Инициализация диспетчера
     dp = get_dispatcher()
-    
+
+    # Уведомления и рассылки отправляются в фоне, пока работает диспетчер.
+    # Лимиты Telegram действуют на бота целиком, поэтому ограничитель общий
+    limiter = TelegramRateLimiter(
+        global_rate=float(os.getenv("OUTBOX__GLOBAL_RATE", 30)),
+        chat_interval=float(os.getenv("OUTBOX__CHAT_INTERVAL", 1))
+    )
+    outbox_sender = OutboxSender(bot, db, limiter)
+    dp.startup.register(outbox_sender.start)
+    dp.shutdown.register(outbox_sender.stop)
+
+    broadcasts = BroadcastManager(bot, db, limiter)
+    dp["broadcasts"] = broadcasts
+    dp.startup.register(broadcasts.start)
+    dp.shutdown.register(broadcasts.stop)
+
     # Запуск бота
     print("🤖 Бот запущен! Проверьте Telegram...")
     try:
-        await dp.start_polling(bot)
+        if env_flag("WEBHOOK__USE"):
+            await run_webhook(dp, bot, db)
+        else:
+            await run_polling(dp, bot, db)
     finally:
         # Гарантированное закрытие соединений
         await db.close()
+        await dp.storage.close()
         await bot.session.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
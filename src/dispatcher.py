@@ -1,17 +1,78 @@
+import os
+from typing import Optional
 from aiogram import Dispatcher
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+from middlewares import DatabaseMetricsMiddleware, UserProfileMiddleware
 from handlers import (
     registration_router,
     menu_router,
     account_del_router,
     application_moderation_router,
     application_router,
-    olympiad_management_router
+    olympiad_management_router,
+    reports_router,
+    broadcast_router
 )
 
-def get_dispatcher():
+def _ttl_from_env(name: str, default: int) -> Optional[int]:
+    """TTL в секундах из переменной окружения (0 - без ограничения)"""
+    ttl = int(os.getenv(name, default))
+    return ttl if ttl > 0 else None
+
+def create_fsm_storage() -> BaseStorage:
+    """Создание хранилища FSM согласно FSM__STORAGE (memory/redis)"""
+    backend = os.getenv("FSM__STORAGE", "memory").lower()
+
+    if backend == "memory":
+        return MemoryStorage()
+
+    if backend == "redis":
+        # Импорт только при необходимости: пакет redis нужен лишь для этого режима
+        from redis.asyncio import Redis
+        from aiogram.fsm.storage.redis import RedisStorage, DefaultKeyBuilder
+
+        redis = Redis(
+            host=os.getenv("REDIS__HOST", "redis"),
+            port=int(os.getenv("REDIS__PORT", 6379)),
+            username=os.getenv("REDIS__USER") or None,
+            password=os.getenv("REDIS__PASSWORD") or None,
+            db=int(os.getenv("REDIS__DB", 0))
+        )
+        return RedisStorage(
+            redis=redis,
+            # bot_id в ключе позволяет нескольким ботам делить один Redis
+            key_builder=DefaultKeyBuilder(with_bot_id=True),
+            # Брошенные диалоги (регистрация, создание олимпиады и т.п.) истекают сами
+            state_ttl=_ttl_from_env("FSM__STATE_TTL", 86400),
+            data_ttl=_ttl_from_env("FSM__DATA_TTL", 86400)
+        )
+
+    raise ValueError(f"Неизвестный тип хранилища FSM: {backend}")
+
+def get_dispatcher(storage: Optional[BaseStorage] = None):
     """Создание и настройка диспетчера"""
-    dp = Dispatcher()
-    
+    storage = storage or create_fsm_storage()
+
+    # При общем хранилище апдейты одного пользователя не должны
+    # обрабатываться параллельно на разных репликах
+    isolation = None
+    if hasattr(storage, "create_isolation"):
+        isolation = storage.create_isolation()
+
+    dp = Dispatcher(storage=storage, events_isolation=isolation)
+
+    # Метки для метрик БД: до выбора хендлера (профиль, фильтры) и внутри хендлера
+    dp.update.outer_middleware(DatabaseMetricsMiddleware("routing"))
+    handler_metrics = DatabaseMetricsMiddleware()
+    dp.message.middleware(handler_metrics)
+    dp.callback_query.middleware(handler_metrics)
+
+    # Профиль пользователя загружается один раз на апдейт
+    profile_middleware = UserProfileMiddleware()
+    dp.message.outer_middleware(profile_middleware)
+    dp.callback_query.outer_middleware(profile_middleware)
+
     # Позже здесь будут подключены роутеры
     dp.include_router(registration_router)
     dp.include_router(menu_router)
@@ -19,5 +80,7 @@ def get_dispatcher():
     dp.include_router(application_moderation_router)
     dp.include_router(application_router)
     dp.include_router(olympiad_management_router)
-    
+    dp.include_router(reports_router)
+    dp.include_router(broadcast_router)
+
     return dp
@@ -0,0 +1,6 @@
+from .roles import IsAdminOrModerator, has_staff_role
+
+__all__ = [
+    'IsAdminOrModerator',
+    'has_staff_role'
+]
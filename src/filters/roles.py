@@ -0,0 +1,14 @@
+from typing import Optional
+from aiogram.filters import Filter
+from aiogram.types import TelegramObject
+from asyncpg import Record
+
+def has_staff_role(user_profile: Optional[Record]) -> bool:
+    """Является ли пользователь администратором или модератором"""
+    return user_profile is not None and user_profile['is_staff']
+
+class IsAdminOrModerator(Filter):
+    """Пропускает только администраторов и модераторов (по профилю из UserProfileMiddleware)"""
+
+    async def __call__(self, event: TelegramObject, user_profile: Optional[Record] = None) -> bool:
+        return has_staff_role(user_profile)
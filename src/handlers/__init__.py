@@ -4,6 +4,8 @@ from .delete_account import router as account_del_router
 from .application_moderation import router as application_moderation_router
 from .application import router as application_router
 from .olympiad_management import router as olympiad_management_router
+from .reports import router as reports_router
+from .broadcast import router as broadcast_router
 
 __all__ = [
     'registration_router',
@@ -11,5 +13,7 @@ __all__ = [
     'account_del_router',
     'application_moderation_router',
     'application_router',
-    'olympiad_management_router'
+    'olympiad_management_router',
+    'reports_router',
+    'broadcast_router'
 ]
\ No newline at end of file
@@ -1,7 +1,10 @@
 from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
+from asyncpg import Record
+from typing import Optional
 from services.database import Database
+from filters import has_staff_role
 from states import ApplicationStates
 from keyboards.keyboards import (
     olympiads_keyboard,
@@ -63,38 +66,42 @@ async def select_olympiad(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 @router.callback_query(ApplicationStates.confirm_application, F.data == "application_confirm")
-async def confirm_application(callback: CallbackQuery, state: FSMContext):
+async def confirm_application(
+    callback: CallbackQuery,
+    state: FSMContext,
+    user_profile: Optional[Record] = None
+):
     data = await state.get_data()
-    user_id = callback.from_user.id
     olympiad_id = data['olympiad_id']
-    
-    # Проверяем, не подана ли уже заявка
-    if await db.has_application(user_id, olympiad_id):
-        await callback.message.answer("Вы уже подавали заявку на эту олимпиаду")
+
+    if not user_profile:
+        await callback.message.answer("❌ Пользователь не найден")
         await state.clear()
         return
         
-    # Создаем заявку
-    success = await db.create_application(user_id, olympiad_id)
+    # Создаем заявку (повторная подача не создаст дубликат)
+    created = await db.submit_application(user_profile['user_id'], olympiad_id)
     
-    if success:
+    if created is False:
+        await callback.message.answer("Вы уже подавали заявку на эту олимпиаду")
+    elif created:
         await callback.message.answer(
             "✅ Заявка успешно подана! Ожидайте подтверждения.",
-            reply_markup=main_menu_keyboard(await db.is_admin_or_moderator(callback.from_user.id))
+            reply_markup=main_menu_keyboard(has_staff_role(user_profile))
         )
     else:
         await callback.message.answer(
             "❌ Ошибка при подаче заявки",
-            reply_markup=main_menu_keyboard(await db.is_admin_or_moderator(callback.from_user.id))
+            reply_markup=main_menu_keyboard(has_staff_role(user_profile))
         )
     
     await state.clear()
 
 @router.message(F.text == "📋 Мои заявки")
-async def show_my_applications(message: Message):
+async def show_my_applications(message: Message, user_profile: Optional[Record] = None):
     """Показывает список заявок пользователя с сообщениями модераторов"""
-    # Получаем user_id пользователя
-    user = await db.get_user(message.from_user.id)
+    # user_id пользователя - из профиля, загруженного UserProfileMiddleware
+    user = user_profile
     if not user:
         await message.answer("❌ Пользователь не найден")
         return
@@ -157,10 +164,10 @@ async def view_my_application_details(callback: CallbackQuery):
     await callback.answer()
 
 @router.callback_query(F.data == "back_to_my_applications")
-async def back_to_my_applications(callback: CallbackQuery):
+async def back_to_my_applications(callback: CallbackQuery, user_profile: Optional[Record] = None):
     """Возврат к списку заявок пользователя"""
     await callback.message.bot.delete_message(callback.message.chat.id, callback.message.message_id)
-    user = await db.get_user(callback.from_user.id)
+    user = user_profile
     if not user:
         await callback.message.answer("❌ Пользователь не найден")
         return
@@ -2,31 +2,138 @@ from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 from services.database import Database
+from filters import IsAdminOrModerator
 from states import ModerationStates
 from keyboards.keyboards import (
     application_list_keyboard,
+    moderation_olympiad_filter_keyboard,
+    moderation_category_filter_keyboard,
     moder_application_action_keyboard,
-    skip_comment_keyboard
+    bulk_moderation_confirm_keyboard,
+    skip_comment_keyboard,
+    decode_timestamp
 )
 
 router = Router()
+# Весь роутер доступен только администраторам и модераторам
+router.message.filter(IsAdminOrModerator())
+router.callback_query.filter(IsAdminOrModerator())
 db = Database()
 
+async def moderation_queue_page(olympiad_id=None, category_id=None, cursor=None, backward=False):
+    """Текст и клавиатура страницы очереди модерации (None - очередь пуста)"""
+    applications, has_prev, has_next = await db.get_pending_applications_page(
+        cursor, backward, olympiad_id, category_id
+    )
+
+    # Соседние заявки могли уже обработать - тогда возвращаемся к началу очереди
+    if not applications and cursor is not None:
+        applications, has_prev, has_next = await db.get_pending_applications_page(
+            olympiad_id=olympiad_id, category_id=category_id
+        )
+
+    markup = application_list_keyboard(applications, olympiad_id, category_id, has_prev, has_next)
+    if applications:
+        return "Заявки, ожидающие модерации:", markup
+    if olympiad_id or category_id:
+        return "Нет заявок, ожидающих модерации, по выбранному фильтру", markup
+    return None
+
 @router.message(F.text == "📝 Заявки на модерации")
 async def show_pending_applications(message: Message):
-    if not await db.is_admin_or_moderator(message.from_user.id):
-        return
-        
-    applications = await db.get_pending_applications()
+    page = await moderation_queue_page()
     
-    if not applications:
+    if not page:
         await message.answer("Нет заявок, ожидающих модерации")
         return
         
-    await message.answer(
-        "Заявки, ожидающие модерации:",
-        reply_markup=application_list_keyboard(applications)
+    text, markup = page
+    await message.answer(text, reply_markup=markup)
+
+@router.callback_query(F.data.startswith("modq_"))
+async def change_moderation_queue_page(callback: CallbackQuery):
+    """Пагинация и применение фильтров очереди модерации"""
+    parts = callback.data.split("_")
+    olympiad_id = int(parts[1]) or None
+    category_id = int(parts[2]) or None
+    cursor = None
+    if len(parts) == 6:
+        cursor = (decode_timestamp(parts[4]), int(parts[5]))
+
+    page = await moderation_queue_page(olympiad_id, category_id, cursor, backward=parts[3] == "p")
+    if not page:
+        await callback.message.edit_text("Нет заявок, ожидающих модерации")
+    else:
+        text, markup = page
+        await callback.message.edit_text(text, reply_markup=markup)
+    await callback.answer()
+
+@router.callback_query(F.data.startswith("modqf_"))
+async def choose_moderation_queue_filter(callback: CallbackQuery):
+    """Выбор фильтра очереди модерации (по олимпиаде или категории)"""
+    _, kind, other_filter = callback.data.split("_")
+    if kind == "o":
+        olympiads = await db.get_active_olympiads()
+        await callback.message.edit_text(
+            "Выберите олимпиаду:",
+            reply_markup=moderation_olympiad_filter_keyboard(olympiads, int(other_filter) or None)
+        )
+    else:
+        categories = await db.get_categories()
+        await callback.message.edit_text(
+            "Выберите категорию участников:",
+            reply_markup=moderation_category_filter_keyboard(categories, int(other_filter) or None)
+        )
+    await callback.answer()
+
+# Массовые действия: a - одобрить, r - отклонить
+BULK_ACTIONS = {"a": "Одобрена", "r": "Отклонена"}
+
+@router.callback_query(F.data.startswith("modqb_"))
+async def confirm_bulk_moderation(callback: CallbackQuery):
+    """Запрос подтверждения массового действия по фильтру очереди"""
+    _, action, olympiad_id, category_id = callback.data.split("_")
+    olympiad_id = int(olympiad_id) or None
+    category_id = int(category_id) or None
+
+    count = await db.count_pending_applications(olympiad_id, category_id)
+    if not count:
+        await callback.answer("Нет заявок по выбранному фильтру")
+        return
+
+    verb = "Одобрить" if action == "a" else "Отклонить"
+    await callback.message.edit_text(
+        f"{verb} все заявки на рассмотрении по текущему фильтру ({count} шт.)?\n"
+        f"Участники получат уведомления.",
+        reply_markup=bulk_moderation_confirm_keyboard(action, olympiad_id, category_id)
+    )
+    await callback.answer()
+
+@router.callback_query(F.data.startswith("modqbc_"))
+async def run_bulk_moderation(callback: CallbackQuery):
+    """Массовое одобрение/отклонение заявок одной транзакцией"""
+    _, action, olympiad_id, category_id = callback.data.split("_")
+    olympiad_id = int(olympiad_id) or None
+    category_id = int(category_id) or None
+    status = BULK_ACTIONS[action]
+
+    count = await db.bulk_update_pending_status(
+        status,
+        callback.from_user.id,
+        olympiad_id,
+        category_id
     )
+    if count is None:
+        await callback.answer("❌ Ошибка при обновлении статусов", show_alert=True)
+        return
+
+    await callback.answer(f"Заявок обработано: {count} ({status.lower()})", show_alert=True)
+    page = await moderation_queue_page(olympiad_id, category_id)
+    if not page:
+        await callback.message.edit_text("Нет заявок, ожидающих модерации")
+    else:
+        text, markup = page
+        await callback.message.edit_text(text, reply_markup=markup)
 
 @router.callback_query(F.data.startswith("app_approve_"))
 async def approve_application(callback: CallbackQuery, state: FSMContext):
@@ -58,7 +165,11 @@ async def skip_comment(callback: CallbackQuery, state: FSMContext):
     
     # Обновляем статус без комментария
     status = "Одобрена" if action == "Одобрена" else "Отклонена"
-    success = await db.update_application_status(application_id, status)
+    success = await db.update_application_status(
+        application_id,
+        status,
+        moderator_telegram_id=callback.from_user.id
+    )
     
     if success:
         status_icon = "✅" if action == "Одобрена" else "❌"
@@ -75,30 +186,20 @@ async def process_moderation_comment(message: Message, state: FSMContext):
     application_id = data['application_id']
     action = data['action']
     
-    # Обновляем статус
+    # Статус, комментарий и уведомление участнику сохраняются вместе
     status = "Одобрена" if action == "Одобрена" else "Отклонена"
-    success = await db.update_application_status(application_id, status)
-    
-    if not success:
-        await message.answer("❌ Ошибка при обновлении статуса")
-        await state.clear()
-        return
-    
-    # Получаем user_id модератора
-    moderator = await db.get_user(message.from_user.id)
-    
-    # Сохраняем сообщение
-    success = await db.create_message(
-        user_id=moderator['user_id'],
-        application_id=application_id,
-        message_text=message.text
+    success = await db.update_application_status(
+        application_id,
+        status,
+        comment=message.text,
+        moderator_telegram_id=message.from_user.id
     )
     
     if success:
         status_icon = "✅" if action == "Одобрена" else "❌"
         await message.answer(f"{status_icon} Заявка {status.lower()} с комментарием!")
     else:
-        await message.answer(f"✅ Статус обновлен, но не удалось сохранить комментарий")
+        await message.answer("❌ Ошибка при обновлении статуса")
     
     await state.clear()
 
@@ -131,13 +232,11 @@ async def show_application_details(callback: CallbackQuery):
 @router.callback_query(F.data == 'back_to_applications_moderation')
 async def back_application(callback: Message):
     await callback.message.bot.delete_message(callback.message.chat.id, callback.message.message_id)
-    applications = await db.get_pending_applications()
+    page = await moderation_queue_page()
     
-    if not applications:
+    if not page:
         await callback.message.answer("Нет заявок, ожидающих модерации")
         return
     
-    await callback.message.answer(
-        "Заявки, ожидающие модерации:",
-        reply_markup=application_list_keyboard(applications)
-    )
\ No newline at end of file
+    text, markup = page
+    await callback.message.answer(text, reply_markup=markup)
\ No newline at end of file
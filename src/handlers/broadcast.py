@@ -0,0 +1,100 @@
+from typing import Optional
+from aiogram import Router, F
+from aiogram.fsm.context import FSMContext
+from aiogram.types import Message, CallbackQuery
+from services.database import Database
+from services.broadcast import BroadcastManager
+from filters import IsAdminOrModerator
+from states import BroadcastStates
+from keyboards.keyboards import (
+    broadcast_audience_keyboard,
+    broadcast_confirm_keyboard,
+    broadcast_progress_keyboard
+)
+
+router = Router()
+# Весь роутер доступен только администраторам и модераторам
+router.message.filter(IsAdminOrModerator())
+router.callback_query.filter(IsAdminOrModerator())
+db = Database()
+
+@router.callback_query(F.data.startswith("broadcast_olympiad_"))
+async def start_broadcast(callback: CallbackQuery):
+    """Начало рассылки: выбор получателей"""
+    olympiad_id = int(callback.data.split("_")[2])
+    await callback.message.edit_reply_markup(reply_markup=broadcast_audience_keyboard(olympiad_id))
+    await callback.answer()
+
+@router.callback_query(F.data.startswith("broadcast_to_"))
+async def choose_broadcast_audience(callback: CallbackQuery, state: FSMContext):
+    """Получатели выбраны - ждем текст рассылки"""
+    _, _, audience, olympiad_id = callback.data.split("_")
+    await state.update_data(broadcast_olympiad_id=int(olympiad_id), broadcast_audience=audience)
+    await state.set_state(BroadcastStates.waiting_text)
+    await callback.message.answer("Введите текст рассылки (форматирование сохранится):")
+    await callback.answer()
+
+@router.message(BroadcastStates.waiting_text, F.text)
+async def process_broadcast_text(message: Message, state: FSMContext):
+    """Предпросмотр рассылки с числом получателей"""
+    data = await state.get_data()
+    status_id = None
+    if data['broadcast_audience'] == "approved":
+        status_id = db.reference.status_ids.get('Одобрена')
+    count = await db.count_broadcast_recipients(data['broadcast_olympiad_id'], status_id)
+
+    # html_text сохраняет форматирование, введенное администратором
+    await state.update_data(broadcast_text=message.html_text, broadcast_status_id=status_id)
+    await state.set_state(BroadcastStates.confirm)
+    await message.answer(
+        f"📣 Получателей: {count}\n\n{message.html_text}",
+        reply_markup=broadcast_confirm_keyboard()
+    )
+
+@router.callback_query(BroadcastStates.confirm, F.data == "broadcast_confirm_yes")
+async def confirm_broadcast(
+    callback: CallbackQuery,
+    state: FSMContext,
+    broadcasts: Optional[BroadcastManager] = None
+):
+    """Создание рассылки и запуск в фоне"""
+    data = await state.get_data()
+    await state.clear()
+
+    broadcast = await db.create_broadcast(
+        data['broadcast_olympiad_id'],
+        data['broadcast_status_id'],
+        data['broadcast_text'],
+        callback.from_user.id,
+        callback.message.chat.id
+    )
+    if broadcast is None:
+        await callback.message.edit_text("❌ Не удалось создать рассылку")
+        await callback.answer()
+        return
+
+    progress = await callback.message.edit_text(
+        f"📣 Рассылка запущена\n\n✉️ Доставлено: 0 из {broadcast['total']}",
+        reply_markup=broadcast_progress_keyboard(broadcast['broadcast_id'])
+    )
+    await db.set_broadcast_progress_message(broadcast['broadcast_id'], progress.message_id)
+
+    # Без менеджера в этом процессе рассылку подхватит фоновый цикл любой реплики
+    if broadcasts is not None:
+        broadcasts.launch(broadcast['broadcast_id'])
+    await callback.answer()
+
+@router.callback_query(BroadcastStates.confirm, F.data == "broadcast_confirm_no")
+async def cancel_broadcast_input(callback: CallbackQuery, state: FSMContext):
+    await state.clear()
+    await callback.message.edit_text("❌ Рассылка отменена")
+    await callback.answer()
+
+@router.callback_query(F.data.startswith("broadcast_stop_"))
+async def stop_broadcast(callback: CallbackQuery):
+    """Остановка идущей рассылки (воркер увидит это после текущей пачки)"""
+    broadcast_id = int(callback.data.split("_")[2])
+    if await db.finish_broadcast(broadcast_id, state='cancelled'):
+        await callback.answer("Рассылка будет остановлена")
+    else:
+        await callback.answer("Рассылка уже завершена")
@@ -2,6 +2,9 @@ from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import Command
+from asyncpg import Record
+from typing import Optional
+from filters import IsAdminOrModerator, has_staff_role
 from states import EditProfileStates
 from keyboards.keyboards import main_menu_keyboard, settings_keyboard
 from services.database import Database
@@ -14,21 +17,26 @@ router = Router()
 db = Database()
 
 @router.message(F.text == "🏠 Главное меню")
-async def main_menu(message: Message):
+async def main_menu(message: Message, user_profile: Optional[Record] = None):
     await message.bot.delete_message(message.chat.id, message.message_id)
 
     await message.answer(
         "Выберите действие:",
-        reply_markup=main_menu_keyboard(await db.is_admin_or_moderator(message.from_user.id))
+        reply_markup=main_menu_keyboard(has_staff_role(user_profile))
     )
 
+@router.message(F.text == "👑 Админ-панель", ~IsAdminOrModerator())
+async def admin_panel_denied(message: Message):
+    """Админ-панель для пользователей без прав (сама панель - в olympiad_management)"""
+    await message.answer("Доступ запрещен!")
+
 @router.message(Command("help"))
 @router.message(F.text == "ℹ️ Помощь")
-async def help_command(message: Message):
+async def help_command(message: Message, user_profile: Optional[Record] = None):
     await message.bot.delete_message(message.chat.id, message.message_id)
 
     # Проверяем роль пользователя
-    is_admin = await db.is_admin_or_moderator(message.from_user.id)
+    is_admin = has_staff_role(user_profile)
     
     # Базовая справка для всех пользователей
     help_text = (
@@ -79,25 +87,24 @@ async def settings_command(message: Message):
     )
 
 @router.message(F.text == "👤 Профиль")
-async def view_profile(message: Message):
+async def view_profile(message: Message, user_profile: Optional[Record] = None):
     await message.bot.delete_message(message.chat.id, message.message_id)
 
-    user = await db.get_user(message.from_user.id)
+    # Профиль (с ролью и категорией) уже загружен UserProfileMiddleware
+    if not user_profile:
+        await message.answer("❌ Пользователь не найден")
+        return
 
-    # Получаем название роли и категории
-    role_name = await db.get_role_name(user.get('user_id'))
-    category_name = await db.get_category_name_by_user_id(user.get('user_id'))
-    
     profile_text = (
         "👤 Ваш профиль:\n\n"
-        f"▫️ Имя: {user['first_name']}\n"
-        f"▫️ Фамилия: {user['last_name']}\n"
-        f"▫️ Отчество: {user.get('middle_name', 'не указано')}\n"
-        f"▫️ Роль: {role_name}\n"
-        f"▫️ Категория: {category_name}"
+        f"▫️ Имя: {user_profile['first_name']}\n"
+        f"▫️ Фамилия: {user_profile['last_name']}\n"
+        f"▫️ Отчество: {user_profile['middle_name'] or 'не указано'}\n"
+        f"▫️ Роль: {user_profile['role_name'] or 'Не указана'}\n"
+        f"▫️ Категория: {user_profile['category_name'] or 'Не указана'}"
     )
     
-    await message.answer(profile_text, reply_markup=main_menu_keyboard(await db.is_admin_or_moderator(message.from_user.id)))
+    await message.answer(profile_text, reply_markup=main_menu_keyboard(has_staff_role(user_profile)))
 
 @router.message(F.text == "✏️ Изменить профиль")
 async def start_edit_profile(message: Message, state: FSMContext):
@@ -209,12 +216,16 @@ async def process_edit_category(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 @router.callback_query(F.data == "cancel_edit_profile")
-async def cancel_edit_profile(callback: CallbackQuery, state: FSMContext):
+async def cancel_edit_profile(
+    callback: CallbackQuery,
+    state: FSMContext,
+    user_profile: Optional[Record] = None
+):
     """Отмена редактирования профиля"""
     await state.clear()
     await callback.message.answer(
         "Редактирование профиля отменено",
-        reply_markup=main_menu_keyboard(await db.is_admin_or_moderator(callback.from_user.id))
+        reply_markup=main_menu_keyboard(has_staff_role(user_profile))
     )
     await callback.message.delete()
     await callback.answer()
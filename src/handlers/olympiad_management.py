@@ -1,7 +1,10 @@
 from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
-from aiogram.types import Message, CallbackQuery, FSInputFile
+from aiogram.types import Message, CallbackQuery, BufferedInputFile
+from asyncpg import Record
+from typing import Optional
 from services.database import Database
+from filters import IsAdminOrModerator
 from states import AddOlympiadStates, EditOlympiadStates, EditApplicationMessage
 from keyboards.keyboards import (
     admin_main_keyboard,
@@ -14,14 +17,18 @@ from keyboards.keyboards import (
     application_action_keyboard,
     edit_olympiad_field_keyboard,
     confirm_delete_keyboard,
-    application_status_change_keyboard
+    application_status_change_keyboard,
+    export_format_keyboard
 )
-from datetime import datetime
-from services.excel_export import generate_olympiad_report
-import os
+from datetime import datetime, date
+from services.export import EXPORTERS, ExportCache, ExportCacheEntry, build_report
 
 router = Router()
+# Весь роутер доступен только администраторам и модераторам
+router.message.filter(IsAdminOrModerator())
+router.callback_query.filter(IsAdminOrModerator())
 db = Database()
+export_cache = ExportCache()
 
 
 async def delete_lst_msgs(message: Message):
@@ -31,10 +38,6 @@ async def delete_lst_msgs(message: Message):
 
 @router.message(F.text == "👑 Админ-панель")
 async def admin_panel(message: Message):
-    if not await db.is_admin_or_moderator(message.from_user.id):
-        await message.answer("Доступ запрещен!")
-        return
-        
     await message.answer(
         "👑 Панель администратора:",
         reply_markup=admin_main_keyboard()
@@ -42,9 +45,6 @@ async def admin_panel(message: Message):
 
 @router.message(F.text == "➕ Добавить олимпиаду")
 async def start_adding_olympiad(message: Message, state: FSMContext):
-    if not await db.is_admin_or_moderator(message.from_user.id):
-        return
-        
     await message.answer("Введите название олимпиады:")
     await state.set_state(AddOlympiadStates.title)
 
@@ -83,7 +83,8 @@ async def process_start_date(message: Message, state: FSMContext):
         await message.answer("❌ Неверный формат даты. Пожалуйста, введите дату в формате ГГГГ-ММ-ДД:")
         return
     
-    await state.update_data(start_date=start_date)
+    # В FSM храним только JSON-совместимые значения (хранилище может быть Redis)
+    await state.update_data(start_date=start_date.isoformat())
     await message.answer("Введите дату окончания олимпиады (в формате ГГГГ-ММ-ДД):")
     await state.set_state(AddOlympiadStates.end_date)
 
@@ -99,13 +100,13 @@ async def process_end_date(message: Message, state: FSMContext):
         return
 
     data = await state.get_data()
-    start_date = data['start_date']
+    start_date = date.fromisoformat(data['start_date'])
 
     if end_date < start_date:
         await message.answer("❌ Дата окончания не может быть раньше даты начала. Пожалуйста, введите корректную дату окончания:")
         return
     
-    await state.update_data(end_date=end_date)
+    await state.update_data(end_date=end_date.isoformat())
     
     # Получаем список дисциплин для выбора
     subjects = await db.get_subjects()
@@ -153,8 +154,8 @@ async def confirm_olympiad(callback: CallbackQuery, state: FSMContext):
         title=data['title'],
         description=data['description'],
         organizer=data['organizer'],
-        start_date=data['start_date'],
-        end_date=data['end_date'],
+        start_date=date.fromisoformat(data['start_date']),
+        end_date=date.fromisoformat(data['end_date']),
         subject_id=data['subject_id']
     )
     
@@ -184,10 +185,7 @@ async def restart_registration(callback: CallbackQuery, state: FSMContext):
 @router.message(F.text == "📋 Список олимпиад")
 async def list_olympiads(message: Message):
     """Показывает список всех олимпиад"""
-    if not await db.is_admin_or_moderator(message.from_user.id):
-        return
-        
-    olympiads = await db.get_all_olympiads()
+    olympiads, has_prev, has_next = await db.get_olympiads_page()
     
     if not olympiads:
         await message.answer("Список олимпиад пуст")
@@ -195,17 +193,24 @@ async def list_olympiads(message: Message):
         
     await message.answer(
         "📋 Список всех олимпиад:",
-        reply_markup=olympiads_list_keyboard(olympiads, page=0)
+        reply_markup=olympiads_list_keyboard(olympiads, has_prev, has_next)
     )
 
 @router.callback_query(F.data.startswith("olympiads_page_"))
 async def change_olympiads_page(callback: CallbackQuery):
     """Обработка пагинации списка олимпиад"""
-    page = int(callback.data.split("_")[2])
-    olympiads = await db.get_all_olympiads()
+    _, _, direction, start_date, olympiad_id = callback.data.split("_")
+    cursor = (date.fromisoformat(start_date), int(olympiad_id))
+    olympiads, has_prev, has_next = await db.get_olympiads_page(
+        cursor, backward=direction == "prev"
+    )
+
+    # Соседние олимпиады могли удалить - тогда возвращаемся к началу списка
+    if not olympiads:
+        olympiads, has_prev, has_next = await db.get_olympiads_page()
     
     await callback.message.edit_reply_markup(
-        reply_markup=olympiads_list_keyboard(olympiads, page)
+        reply_markup=olympiads_list_keyboard(olympiads, has_prev, has_next)
     )
     await callback.answer()
 
@@ -322,11 +327,15 @@ async def set_application_status(callback: CallbackQuery):
     application_id = int(parts[3])
     new_status = parts[4]
     
-    success = await db.update_application_status(application_id, new_status)
+    success = await db.update_application_status(
+        application_id,
+        new_status,
+        moderator_telegram_id=callback.from_user.id
+    )
     
     if success:
+        # Уведомление участнику ставится в очередь вместе со сменой статуса
         await callback.message.answer(f"✅ Статус заявки изменен на '{new_status}'")
-        # Здесь можно добавить уведомление пользователю
     else:
         await callback.message.answer("❌ Ошибка при изменении статуса")
     
@@ -527,10 +536,10 @@ async def back_to_admin_panel(callback: CallbackQuery):
 @router.callback_query(F.data == "back_to_olympiads_list")
 async def back_to_olympiads_list(callback: CallbackQuery):
     """Возврат к списку олимпиад"""
-    olympiads = await db.get_all_olympiads()
+    olympiads, has_prev, has_next = await db.get_olympiads_page()
     await callback.message.answer(
         "📋 Список всех олимпиад:",
-        reply_markup=olympiads_list_keyboard(olympiads, page=0)
+        reply_markup=olympiads_list_keyboard(olympiads, has_prev, has_next)
     )
     await callback.message.delete()
     await callback.answer()
@@ -539,31 +548,29 @@ async def back_to_olympiads_list(callback: CallbackQuery):
 async def back_to_applications_list(callback: CallbackQuery):
     """Возврат к списку заявок на олимпиаду"""
     application_id = int(callback.data.split("_")[4])
+    # Название олимпиады уже есть в деталях заявки
     data_app = await db.get_application_details(application_id)
+    if not data_app:
+        await callback.answer("Заявка не найдена")
+        return
     applications = await db.get_applications_for_olympiad(data_app['olympiad_id'])
     
     if not applications:
         await callback.answer("На эту олимпиаду нет заявок")
         return
-        
-    olympiad = await db.get_olympiad_by_id(data_app['olympiad_id'])
-    title = olympiad['title'] if olympiad else f"Олимпиада #{data_app['olympiad_id']}"
     
     await callback.message.answer(
-        f"📋 Заявки на олимпиаду: {title}",
+        f"📋 Заявки на олимпиаду: {data_app['olympiad_title']}",
         reply_markup=olympiad_applications_keyboard(applications, data_app['olympiad_id'])
     )
     await callback.message.delete()
     await callback.answer()
 
 @router.callback_query(F.data == "cancel_editing_olymp_field")
-async def back_to_applications_list(callback: CallbackQuery):
+async def cancel_editing_olympiad_field(callback: CallbackQuery):
     """Возврат к списку олимпиад"""
     await callback.message.bot.delete_message(callback.message.chat.id, callback.message.message_id)
-    if not await db.is_admin_or_moderator(callback.from_user.id):
-        return
-        
-    olympiads = await db.get_all_olympiads()
+    olympiads, has_prev, has_next = await db.get_olympiads_page()
     
     if not olympiads:
         await callback.message.answer("Список олимпиад пуст")
@@ -571,39 +578,67 @@ async def back_to_applications_list(callback: CallbackQuery):
         
     await callback.message.answer(
         "📋 Список всех олимпиад:",
-        reply_markup=olympiads_list_keyboard(olympiads, page=0)
+        reply_markup=olympiads_list_keyboard(olympiads, has_prev, has_next)
     )
 
 @router.callback_query(F.data.startswith("export_olympiad_"))
+async def choose_export_format(callback: CallbackQuery):
+    """Выбор формата отчета по заявкам на олимпиаду"""
+    olympiad_id = int(callback.data.split("_")[2])
+    formats = {extension: exporter.title for extension, exporter in EXPORTERS.items()}
+    await callback.message.edit_reply_markup(
+        reply_markup=export_format_keyboard(olympiad_id, formats)
+    )
+    await callback.answer()
+
+@router.callback_query(F.data.startswith("export_as_"))
 async def export_olympiad_report(callback: CallbackQuery):
     """Генерация и отправка отчета по заявкам на олимпиаду"""
-    olympiad_id = int(callback.data.split("_")[2])
-    
-    # Получаем информацию об олимпиаде
-    olympiad = await db.get_full_olympiad_info(olympiad_id)
-    if not olympiad:
+    _, _, extension, olympiad_id = callback.data.split("_")
+    olympiad_id = int(olympiad_id)
+
+    exporter = EXPORTERS.get(extension)
+    if exporter is None:
+        await callback.answer("Формат недоступен")
+        return
+
+    # Версия считается при запуске выгрузки и меняется при любом изменении данных олимпиады - по ней ищем готовый отчет
+    version = await db.get_olympiad_version(olympiad_id)
+    if version is None:
         await callback.answer("Олимпиада не найдена")
         return
-        
-    # Получаем заявки на олимпиаду
-    applications = await db.get_applications_for_olympiad(olympiad_id)
-    
-    # Генерируем отчет
+    key = (olympiad_id, extension, version)
+
+    async def build() -> ExportCacheEntry:
+        # Генерируем отчет: заявки читаются из БД пачками и сразу пишутся в файл
+        olympiad = await db.get_full_olympiad_info(olympiad_id)
+        if not olympiad:
+            raise LookupError(f"олимпиада {olympiad_id} не найдена")
+        widths = await db.get_olympiad_report_widths(olympiad_id) if exporter.needs_widths else {}
+        content = await build_report(
+            exporter,
+            olympiad,
+            db.iter_applications_for_olympiad(olympiad_id),
+            widths
+        )
+        return ExportCacheEntry(
+            filename=exporter.filename(olympiad),
+            caption=f"Отчет по заявкам на олимпиаду: {olympiad['title']}",
+            content=content
+        )
+
     try:
-        filename = generate_olympiad_report(olympiad, applications)
+        entry = await export_cache.get_or_build(key, build)
 
-        # Создаем объект файла для отправки
-        input_file = FSInputFile(filename)
-        
-        # Отправляем файл пользователю
-        with open(filename, 'rb') as file:
-            await callback.message.answer_document(
-                input_file,
-                caption=f"Отчет по заявкам на олимпиаду: {olympiad['title']}"
+        # Уже отправленный файл пересылаем по file_id, иначе загружаем из памяти
+        if entry.file_id:
+            await callback.message.answer_document(entry.file_id, caption=entry.caption)
+        else:
+            sent = await callback.message.answer_document(
+                BufferedInputFile(entry.content, filename=entry.filename),
+                caption=entry.caption
             )
-        
-        # Удаляем временный файл
-        os.remove(filename)
+            export_cache.remember_file_id(key, sent.document.file_id)
     except Exception as e:
         print(f"❌ Ошибка при генерации отчета: {e}")
         await callback.message.answer("❌ Произошла ошибка при генерации отчета")
@@ -612,7 +647,11 @@ async def export_olympiad_report(callback: CallbackQuery):
 
 
 @router.callback_query(F.data.startswith("edit_app_message_"))
-async def start_edit_application_message(callback: CallbackQuery, state: FSMContext):
+async def start_edit_application_message(
+    callback: CallbackQuery,
+    state: FSMContext,
+    user_profile: Optional[Record] = None
+):
     """Начало редактирования сообщения для заявки"""
     application_id = int(callback.data.split("_")[3])
         
@@ -620,11 +659,10 @@ async def start_edit_application_message(callback: CallbackQuery, state: FSMCont
     messages = await db.get_application_messages(application_id)
     current_message = ""
         
-    if messages:
-        # Ищем сообщение текущего модератора
+    if messages and user_profile:
+        # Ищем сообщение текущего модератора (его user_id уже есть в профиле)
         for msg in messages:
-            moderator = await db.get_user(msg['user_id'])
-            if moderator and moderator['telegram_id'] == callback.from_user.id:
+            if msg['user_id'] == user_profile['user_id']:
                 current_message = msg['message_text']
                 break
         
@@ -644,13 +682,17 @@ async def start_edit_application_message(callback: CallbackQuery, state: FSMCont
     await callback.answer()
 
 @router.message(EditApplicationMessage.waiting_for_message)
-async def process_edit_application_message(message: Message, state: FSMContext):
+async def process_edit_application_message(
+    message: Message,
+    state: FSMContext,
+    user_profile: Optional[Record] = None
+):
     """Обработка нового сообщения для заявки"""
     data = await state.get_data()
     application_id = data['application_id']
     
-    # Получаем user_id модератора
-    moderator = await db.get_user(message.from_user.id)
+    # user_id модератора - из профиля, загруженного UserProfileMiddleware
+    moderator = user_profile
     if not moderator:
         await message.answer("❌ Ошибка: модератор не найден")
         await state.clear()
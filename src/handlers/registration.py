@@ -2,7 +2,10 @@ from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
+from asyncpg import Record
+from typing import Optional
 
+from filters import has_staff_role
 from states import RegistrationStates
 from services.database import Database
 from keyboards.keyboards import main_menu_keyboard, role_keyboard, confirm_keyboard, categories_keyboard
@@ -15,14 +18,12 @@ async def delete_lst_msgs(message: Message):
     await message.bot.delete_message(message.chat.id, message.message_id)
 
 @router.message(Command("start"))
-async def cmd_start(message: Message, state: FSMContext):
+async def cmd_start(message: Message, state: FSMContext, user_profile: Optional[Record] = None):
     """Обработчик команды /start"""
-    user = await db.get_user(message.from_user.id)
-    
-    if user:
+    if user_profile:
         await message.answer(
-            f"С возвращением, {user['first_name']}!",
-            reply_markup=main_menu_keyboard(await db.is_admin_or_moderator(message.from_user.id))
+            f"С возвращением, {user_profile['first_name']}!",
+            reply_markup=main_menu_keyboard(has_staff_role(user_profile))
         )
         return
         
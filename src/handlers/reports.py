@@ -0,0 +1,102 @@
+import asyncio
+import csv
+import io
+from typing import List
+from aiogram import Router, F
+from aiogram.types import Message, CallbackQuery, BufferedInputFile
+from services.database import Database
+from services.reports import REPORTS, AggregateReport, ReportRunner
+from filters import IsAdminOrModerator
+from keyboards.keyboards import reports_menu_keyboard
+
+router = Router()
+# Весь роутер доступен только администраторам и модераторам
+router.message.filter(IsAdminOrModerator())
+router.callback_query.filter(IsAdminOrModerator())
+db = Database()
+runner = ReportRunner(db)
+
+# Ссылки на фоновые задачи, чтобы их не собрал сборщик мусора до завершения
+_background_tasks = set()
+
+# Лимит длины сообщения Telegram с запасом на заголовок
+MESSAGE_LIMIT = 3500
+
+def format_report_line(name: str, row) -> str:
+    """Строка отчета для сообщения"""
+    if name == "applications_by_olympiad":
+        return (
+            f"• {row['title']} ({row['start_date'].strftime('%d.%m.%Y')}): {row['total']} "
+            f"(🟡 {row['pending']} / 🟢 {row['approved']} / 🔴 {row['rejected']})"
+        )
+    if name == "applications_by_status":
+        return f"• {row['status_name']}: {row['total']}"
+    return f"• {row['category_name']}: {row['total']}"
+
+async def send_report(message: Message, name: str, report: AggregateReport, rows: List, edit: bool = False):
+    """Отправка отчета текстом, а если он не помещается в сообщение - CSV-файлом"""
+    lines = [format_report_line(name, row) for row in rows] or ["Нет данных"]
+    text = f"<b>{report.title}</b>\n\n" + "\n".join(lines)
+
+    if len(text) <= MESSAGE_LIMIT:
+        if edit:
+            await message.edit_text(text, parse_mode="HTML")
+        else:
+            await message.answer(text, parse_mode="HTML")
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(rows[0].keys())
+    writer.writerows(row.values() for row in rows)
+    if edit:
+        await message.delete()
+    await message.answer_document(
+        BufferedInputFile(buffer.getvalue().encode("utf-8"), filename=f"{name}.csv"),
+        caption=f"{report.title} ({len(rows)} строк)"
+    )
+
+async def deliver_report(progress: Message, name: str, report: AggregateReport):
+    """Фоновая задача: расчет отчета и замена сообщения о прогрессе результатом"""
+    try:
+        rows = await runner.run(name)
+        if rows is None:
+            await progress.edit_text("❌ Не удалось сформировать отчет")
+            return
+        await send_report(progress, name, report, rows, edit=True)
+    except Exception as e:
+        print(f"❌ Ошибка при отправке отчета: {e}")
+
+@router.message(F.text == "📈 Отчеты")
+async def reports_menu(message: Message):
+    await message.answer(
+        "📈 Выберите отчет:",
+        reply_markup=reports_menu_keyboard()
+    )
+
+@router.callback_query(F.data.startswith("report_"))
+async def start_report(callback: CallbackQuery):
+    """Запуск сводного отчета: из кэша сразу, иначе - в фоне"""
+    name = callback.data[len("report_"):]
+    report = REPORTS.get(name)
+    if report is None:
+        await callback.answer("Отчет не найден")
+        return
+    await callback.answer()
+
+    # Данные не менялись с прошлого расчета - отдаем готовый результат
+    rows = await runner.cached(name)
+    if rows is not None:
+        await send_report(callback.message, name, report, rows)
+        return
+
+    if runner.is_running(name):
+        text = f"⏳ Отчет «{report.title}» уже формируется, результат придет сюда"
+    else:
+        text = f"⏳ Формируется отчет «{report.title}»..."
+    progress = await callback.message.answer(text)
+
+    # Обработчик не ждет расчета: тяжелый запрос выполняется в фоне
+    task = asyncio.create_task(deliver_report(progress, name, report))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
@@ -1,5 +1,16 @@
 from aiogram.utils.keyboard import InlineKeyboardBuilder, InlineKeyboardButton
 from aiogram.utils.keyboard import ReplyKeyboardBuilder
+from datetime import datetime, timedelta
+
+_EPOCH = datetime(1970, 1, 1)
+
+def encode_timestamp(value: datetime) -> int:
+    """Время в микросекундах от эпохи - компактно и без потерь для callback_data"""
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+def decode_timestamp(value: str) -> datetime:
+    """Обратное преобразование для encode_timestamp"""
+    return _EPOCH + timedelta(microseconds=int(value))
 
 def confirm_keyboard():
     builder = InlineKeyboardBuilder()
@@ -66,6 +77,7 @@ def admin_main_keyboard():
     builder.button(text="➕ Добавить олимпиаду")
     builder.button(text="📋 Список олимпиад")
     builder.button(text="📝 Заявки на модерации")
+    builder.button(text="📈 Отчеты")
     builder.button(text="🏠 Главное меню")
     builder.adjust(2, 2, 1)
     return builder.as_markup(resize_keyboard=True)
@@ -95,7 +107,8 @@ def olympiads_keyboard(olympiads):
     builder.adjust(1)
     return builder.as_markup()
 
-def application_list_keyboard(applications):
+def application_list_keyboard(applications, olympiad_id=None, category_id=None, has_prev=False, has_next=False):
+    """Клавиатура страницы очереди модерации с пагинацией и фильтрами"""
     builder = InlineKeyboardBuilder()
     for app in applications:
         builder.button(
@@ -103,6 +116,73 @@ def application_list_keyboard(applications):
             callback_data=f"app_id_{app['application_id']}"
         )
     builder.adjust(1)
+
+    # Фильтры передаются в callback_data страниц (0 - без фильтра),
+    # курсор - (created_date, application_id) крайней заявки страницы
+    filters = f"{olympiad_id or 0}_{category_id or 0}"
+    pagination_row = []
+    if has_prev and applications:
+        first = applications[0]
+        pagination_row.append(InlineKeyboardButton(
+            text="⬅️ Назад",
+            callback_data=f"modq_{filters}_p_{encode_timestamp(first['created_date'])}_{first['application_id']}"
+        ))
+    if has_next and applications:
+        last = applications[-1]
+        pagination_row.append(InlineKeyboardButton(
+            text="Вперед ➡️",
+            callback_data=f"modq_{filters}_n_{encode_timestamp(last['created_date'])}_{last['application_id']}"
+        ))
+    if pagination_row:
+        builder.row(*pagination_row)
+
+    filter_row = [
+        InlineKeyboardButton(text="🏆 Олимпиада", callback_data=f"modqf_o_{category_id or 0}"),
+        InlineKeyboardButton(text="🏷️ Категория", callback_data=f"modqf_c_{olympiad_id or 0}")
+    ]
+    if olympiad_id or category_id:
+        filter_row.append(InlineKeyboardButton(text="♻️ Сбросить", callback_data="modq_0_0_f"))
+    builder.row(*filter_row)
+
+    # Массовые действия применяются ко всем заявкам по текущему фильтру
+    if applications:
+        builder.row(
+            InlineKeyboardButton(text="✅ Одобрить все", callback_data=f"modqb_a_{filters}"),
+            InlineKeyboardButton(text="❌ Отклонить все", callback_data=f"modqb_r_{filters}")
+        )
+    return builder.as_markup()
+
+def bulk_moderation_confirm_keyboard(action, olympiad_id=None, category_id=None):
+    """Подтверждение массового одобрения/отклонения заявок по фильтру"""
+    filters = f"{olympiad_id or 0}_{category_id or 0}"
+    builder = InlineKeyboardBuilder()
+    builder.button(text="✅ Да, выполнить", callback_data=f"modqbc_{action}_{filters}")
+    builder.button(text="❌ Нет, отменить", callback_data=f"modq_{filters}_f")
+    builder.adjust(2)
+    return builder.as_markup()
+
+def moderation_olympiad_filter_keyboard(olympiads, category_id=None):
+    """Выбор олимпиады для фильтра очереди модерации"""
+    builder = InlineKeyboardBuilder()
+    builder.button(text="Все олимпиады", callback_data=f"modq_0_{category_id or 0}_f")
+    for olympiad in olympiads:
+        builder.button(
+            text=olympiad['title'],
+            callback_data=f"modq_{olympiad['olympiad_id']}_{category_id or 0}_f"
+        )
+    builder.adjust(1)
+    return builder.as_markup()
+
+def moderation_category_filter_keyboard(categories, olympiad_id=None):
+    """Выбор категории участника для фильтра очереди модерации"""
+    builder = InlineKeyboardBuilder()
+    builder.button(text="Все категории", callback_data=f"modq_{olympiad_id or 0}_0_f")
+    for category in categories:
+        builder.button(
+            text=category['category_name'],
+            callback_data=f"modq_{olympiad_id or 0}_{category['category_id']}_f"
+        )
+    builder.adjust(1)
     return builder.as_markup()
 
 def moder_application_action_keyboard(application_id):
@@ -121,33 +201,31 @@ def reports_menu_keyboard():
     builder.adjust(1)
     return builder.as_markup()
 
-def olympiads_list_keyboard(olympiads, page=0, per_page=5):
-    """Клавиатура списка олимпиад с пагинацией"""
+def olympiads_list_keyboard(olympiads, has_prev=False, has_next=False):
+    """Клавиатура страницы списка олимпиад с пагинацией"""
     builder = InlineKeyboardBuilder()
     
-    # Рассчитываем индексы для текущей страницы
-    start_idx = page * per_page
-    end_idx = min(start_idx + per_page, len(olympiads))
-    
     # Добавляем кнопки для олимпиад на текущей странице
-    for olympiad in olympiads[start_idx:end_idx]:
+    for olympiad in olympiads:
         builder.button(
             text=f"{olympiad['title']} ({olympiad['start_date'].strftime('%d.%m.%Y')})",
             callback_data=f"view_olympiad_{olympiad['olympiad_id']}"
         )
     
-    # Добавляем кнопки пагинации
+    # Кнопки пагинации несут курсор (start_date, olympiad_id) крайней олимпиады страницы
     pagination_row = []
-    if page > 0:
+    if has_prev and olympiads:
+        first = olympiads[0]
         pagination_row.append(InlineKeyboardButton(
             text="⬅️ Назад", 
-            callback_data=f"olympiads_page_{page-1}"
+            callback_data=f"olympiads_page_prev_{first['start_date'].isoformat()}_{first['olympiad_id']}"
         ))
     
-    if end_idx < len(olympiads):
+    if has_next and olympiads:
+        last = olympiads[-1]
         pagination_row.append(InlineKeyboardButton(
             text="Вперед ➡️", 
-            callback_data=f"olympiads_page_{page+1}"
+            callback_data=f"olympiads_page_next_{last['start_date'].isoformat()}_{last['olympiad_id']}"
         ))
     
     if pagination_row:
@@ -164,9 +242,42 @@ def olympiad_detail_keyboard(olympiad_id):
     builder.button(text="✏️ Редактировать", callback_data=f"edit_olympiad_{olympiad_id}")
     builder.button(text="🗑️ Удалить", callback_data=f"delete_olympiad_{olympiad_id}")
     builder.button(text="📋 Заявки", callback_data=f"view_olympiad_apps_{olympiad_id}")
-    builder.button(text="📊 Экспорт отчета в Excel", callback_data=f"export_olympiad_{olympiad_id}")
+    builder.button(text="📊 Экспорт отчета", callback_data=f"export_olympiad_{olympiad_id}")
+    builder.button(text="📣 Рассылка участникам", callback_data=f"broadcast_olympiad_{olympiad_id}")
     builder.button(text="🔙 К списку", callback_data="back_to_olympiads_list")
-    builder.adjust(2, 2, 1)
+    builder.adjust(2, 2, 1, 1)
+    return builder.as_markup()
+
+def broadcast_audience_keyboard(olympiad_id):
+    """Выбор получателей рассылки"""
+    builder = InlineKeyboardBuilder()
+    builder.button(text="👥 Всем подавшим заявку", callback_data=f"broadcast_to_all_{olympiad_id}")
+    builder.button(text="🟢 Только одобренным", callback_data=f"broadcast_to_approved_{olympiad_id}")
+    builder.button(text="🔙 К олимпиаде", callback_data=f"view_olympiad_{olympiad_id}")
+    builder.adjust(1)
+    return builder.as_markup()
+
+def broadcast_confirm_keyboard():
+    """Подтверждение запуска рассылки"""
+    builder = InlineKeyboardBuilder()
+    builder.button(text="✅ Отправить", callback_data="broadcast_confirm_yes")
+    builder.button(text="❌ Отменить", callback_data="broadcast_confirm_no")
+    builder.adjust(2)
+    return builder.as_markup()
+
+def broadcast_progress_keyboard(broadcast_id):
+    """Остановка идущей рассылки"""
+    builder = InlineKeyboardBuilder()
+    builder.button(text="⛔ Остановить", callback_data=f"broadcast_stop_{broadcast_id}")
+    return builder.as_markup()
+
+def export_format_keyboard(olympiad_id, formats):
+    """Выбор формата отчета: formats - {расширение: подпись}"""
+    builder = InlineKeyboardBuilder()
+    for extension, title in formats.items():
+        builder.button(text=f"📄 {title}", callback_data=f"export_as_{extension}_{olympiad_id}")
+    builder.button(text="🔙 К олимпиаде", callback_data=f"view_olympiad_{olympiad_id}")
+    builder.adjust(1)
     return builder.as_markup()
 
 def olympiad_applications_keyboard(applications, olympiad_id):
@@ -0,0 +1,9 @@
+from .concurrency import ConcurrencyLimitMiddleware
+from .db_metrics import DatabaseMetricsMiddleware
+from .user_profile import UserProfileMiddleware
+
+__all__ = [
+    'ConcurrencyLimitMiddleware',
+    'DatabaseMetricsMiddleware',
+    'UserProfileMiddleware'
+]
@@ -0,0 +1,42 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from services.database import Database
+from services.metrics import RoundTrips, current_handler, current_round_trips
+
+class DatabaseMetricsMiddleware(BaseMiddleware):
+    """Подписывает запросы к БД именем того, кто их выполняет.
+
+    Внешним middleware апдейта ставит постоянную метку (загрузка профиля, фильтры),
+    внутренним (message, callback_query) - имя выбранного хендлера.
+    Самый внешний экземпляр еще и считает обращения к БД за апдейт.
+    """
+
+    def __init__(self, label: Optional[str] = None):
+        self.label = label
+        self.db = Database()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        round_trips = current_round_trips.get()
+        round_trips_token = None
+        if round_trips is None:
+            round_trips = RoundTrips()
+            round_trips_token = current_round_trips.set(round_trips)
+
+        handler_object = data.get("handler")
+        label = self.label or (handler_object.callback.__name__ if handler_object else "unknown")
+        if self.label is None:
+            round_trips.handler = label
+        token = current_handler.set(label)
+        try:
+            return await handler(event, data)
+        finally:
+            current_handler.reset(token)
+            if round_trips_token is not None:
+                current_round_trips.reset(round_trips_token)
+                self.db.metrics.observe_round_trips(round_trips)
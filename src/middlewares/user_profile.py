@@ -0,0 +1,20 @@
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from services.database import Database
+
+class UserProfileMiddleware(BaseMiddleware):
+    """Загружает профиль пользователя один раз на апдейт и передает его в хендлеры как user_profile"""
+
+    def __init__(self):
+        self.db = Database()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        data["user_profile"] = await self.db.get_user_profile(user.id) if user else None
+        return await handler(event, data)
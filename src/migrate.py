@@ -0,0 +1,342 @@
+import asyncio
+import asyncpg
+import os
+
+# Таблицы переходов, доступные триггеру на каждое событие
+TRANSITION_TABLES = {
+    "INSERT": "NEW TABLE AS new_rows",
+    "UPDATE": "NEW TABLE AS new_rows OLD TABLE AS old_rows",
+    "DELETE": "OLD TABLE AS old_rows"
+}
+
+# Версионированные миграции схемы: (версия, описание, SQL-команды).
+# Уже примененные миграции не изменяются - только добавляются новые.
+MIGRATIONS = [
+    (1, "Вторичные индексы и уникальность заявок", [
+        # Перед добавлением ограничения оставляем самую раннюю из дублирующихся заявок
+        # (сообщения удаленных дублей удаляются каскадно)
+        """
+        DELETE FROM Application a
+        USING Application b
+        WHERE a.user_id = b.user_id
+          AND a.olympiad_id = b.olympiad_id
+          AND a.application_id > b.application_id
+        """,
+        # Индекс ограничения (user_id, olympiad_id) обслуживает и поиск заявок пользователя
+        """
+        ALTER TABLE Application
+        ADD CONSTRAINT unique_user_olympiad UNIQUE (user_id, olympiad_id)
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_application_olympiad ON Application (olympiad_id, created_date)",
+        # Очередь модерации: фильтр по статусу + keyset по (created_date, application_id)
+        "CREATE INDEX IF NOT EXISTS idx_application_status ON Application (status_id, created_date, application_id)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_application ON Messages (application_id, sent_date)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_user ON Messages (user_id)",
+        # UserRole(user_id) и UserCategory(user_id) уже покрыты уникальными ограничениями,
+        # начинающимися с user_id, - отдельные индексы не нужны
+        "CREATE INDEX IF NOT EXISTS idx_olympiad_end_date ON Olympiad (end_date)",
+        # Список олимпиад: keyset по (start_date, olympiad_id)
+        "CREATE INDEX IF NOT EXISTS idx_olympiad_start_date ON Olympiad (start_date, olympiad_id)",
+    ]),
+    (2, "Уведомления об изменении справочников", [
+        # Бот держит справочники в памяти и перечитывает их по NOTIFY
+        """
+        CREATE OR REPLACE FUNCTION notify_reference_data_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('reference_data_changed', TG_TABLE_NAME);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        *[
+            f"""
+            CREATE TRIGGER {table.lower()}_reference_data_changed
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_reference_data_changed()
+            """
+            for table in ("Role", "Category", "ApplicationStatus", "Subject")
+        ],
+    ]),
+    (3, "Версии данных для кэша сводных отчетов", [
+        """
+        CREATE TABLE DataVersion (
+            scope VARCHAR(50) PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+        """,
+        "INSERT INTO DataVersion (scope) VALUES ('applications'), ('users')",
+        # Область передается аргументом триггера; версия растет в той же транзакции,
+        # что и изменение, поэтому новую версию видно только вместе с новыми данными
+        """
+        CREATE OR REPLACE FUNCTION bump_data_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE DataVersion SET version = version + 1 WHERE scope = TG_ARGV[0];
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        *[
+            f"""
+            CREATE TRIGGER {table.lower()}_data_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version('{scope}')
+            """
+            for table, scope in (
+                ("Application", "applications"),
+                ("Olympiad", "applications"),
+                ("ApplicationStatus", "applications"),
+                ("UserCategory", "users"),
+                ("Category", "users")
+            )
+        ],
+    ]),
+    (4, "Версии данных олимпиад для кэша выгрузок", [
+        # Без внешнего ключа: при каскадном удалении олимпиады триггеры заявок
+        # срабатывают уже после удаления ее строки
+        """
+        CREATE TABLE OlympiadVersion (
+            olympiad_id INT PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+        """,
+        # Версия растет у каждой олимпиады, затронутой оператором; затронутые строки
+        # берутся из таблиц переходов (по одному запросу на оператор, а не на строку)
+        """
+        CREATE OR REPLACE FUNCTION bump_olympiad_versions(olympiad_ids INT[]) RETURNS void AS $$
+            INSERT INTO OlympiadVersion (olympiad_id, version)
+            SELECT o.olympiad_id, 1
+            FROM Olympiad o
+            WHERE o.olympiad_id = ANY(olympiad_ids)
+            ON CONFLICT (olympiad_id) DO UPDATE SET version = OlympiadVersion.version + 1
+        $$ LANGUAGE sql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION application_olympiad_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM bump_olympiad_versions(ARRAY(SELECT DISTINCT olympiad_id FROM new_rows));
+            ELSIF TG_OP = 'UPDATE' THEN
+                PERFORM bump_olympiad_versions(ARRAY(
+                    SELECT olympiad_id FROM new_rows UNION SELECT olympiad_id FROM old_rows
+                ));
+            ELSE
+                PERFORM bump_olympiad_versions(ARRAY(SELECT DISTINCT olympiad_id FROM old_rows));
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION messages_olympiad_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM bump_olympiad_versions(ARRAY(
+                    SELECT DISTINCT a.olympiad_id FROM new_rows m JOIN Application a ON a.application_id = m.application_id
+                ));
+            ELSIF TG_OP = 'UPDATE' THEN
+                PERFORM bump_olympiad_versions(ARRAY(
+                    SELECT a.olympiad_id FROM new_rows m JOIN Application a ON a.application_id = m.application_id
+                    UNION
+                    SELECT a.olympiad_id FROM old_rows m JOIN Application a ON a.application_id = m.application_id
+                ));
+            ELSE
+                PERFORM bump_olympiad_versions(ARRAY(
+                    SELECT DISTINCT a.olympiad_id FROM old_rows m JOIN Application a ON a.application_id = m.application_id
+                ));
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION olympiad_row_version() RETURNS trigger AS $$
+        BEGIN
+            PERFORM bump_olympiad_versions(ARRAY(SELECT olympiad_id FROM new_rows));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        # ФИО участников тоже попадают в отчет
+        """
+        CREATE OR REPLACE FUNCTION users_olympiad_version() RETURNS trigger AS $$
+        BEGIN
+            PERFORM bump_olympiad_versions(ARRAY(
+                SELECT DISTINCT a.olympiad_id FROM new_rows u JOIN Application a ON a.user_id = u.user_id
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        # Таблицы переходов допускаются только у триггеров на одно событие
+        *[
+            f"""
+            CREATE TRIGGER {table.lower()}_olympiad_version_{event.lower()}
+            AFTER {event} ON {table}
+            REFERENCING {TRANSITION_TABLES[event]}
+            FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+            """
+            for table, function, events in (
+                ("Application", "application_olympiad_version", ("INSERT", "UPDATE", "DELETE")),
+                ("Messages", "messages_olympiad_version", ("INSERT", "UPDATE", "DELETE")),
+                ("Olympiad", "olympiad_row_version", ("UPDATE",)),
+                ("Users", "users_olympiad_version", ("UPDATE",))
+            )
+            for event in events
+        ],
+    ]),
+    (5, "Очередь уведомлений пользователям", [
+        # Уведомление записывается в той же транзакции, что и изменение, которое оно описывает,
+        # а отправляет его фоновый отправитель с учетом ограничений Telegram
+        """
+        CREATE TABLE NotificationOutbox (
+            notification_id BIGSERIAL PRIMARY KEY,
+            chat_id BIGINT NOT NULL,
+            message_text TEXT NOT NULL,
+            attempts INT NOT NULL DEFAULT 0,
+            next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sent_date TIMESTAMP,
+            failed_date TIMESTAMP,
+            last_error TEXT
+        )
+        """,
+        # Частичный индекс содержит только неотправленные уведомления и остается маленьким
+        """
+        CREATE INDEX idx_outbox_pending ON NotificationOutbox (next_attempt_at, notification_id)
+        WHERE sent_date IS NULL AND failed_date IS NULL
+        """,
+    ]),
+    (6, "Журнал изменений статусов заявок", [
+        """
+        CREATE TABLE ApplicationStatusLog (
+            log_id BIGSERIAL PRIMARY KEY,
+            application_id INT NOT NULL REFERENCES Application(application_id) ON DELETE CASCADE,
+            old_status_id INT REFERENCES ApplicationStatus(status_id),
+            new_status_id INT NOT NULL REFERENCES ApplicationStatus(status_id),
+            changed_by INT REFERENCES Users(user_id) ON DELETE SET NULL,
+            changed_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE INDEX idx_status_log_application ON ApplicationStatusLog (application_id, changed_date)",
+    ]),
+    (7, "Рассылки участникам олимпиад", [
+        # Прогресс хранится контрольной точкой last_user_id: получатели перебираются
+        # по возрастанию user_id, поэтому после перезапуска рассылка продолжается с нее
+        """
+        CREATE TABLE Broadcast (
+            broadcast_id SERIAL PRIMARY KEY,
+            olympiad_id INT NOT NULL REFERENCES Olympiad(olympiad_id) ON DELETE CASCADE,
+            status_id INT REFERENCES ApplicationStatus(status_id),
+            message_text TEXT NOT NULL,
+            created_by INT REFERENCES Users(user_id) ON DELETE SET NULL,
+            chat_id BIGINT NOT NULL,
+            progress_message_id BIGINT,
+            state VARCHAR(20) NOT NULL DEFAULT 'running',
+            total INT NOT NULL DEFAULT 0,
+            last_user_id INT NOT NULL DEFAULT 0,
+            sent_count INT NOT NULL DEFAULT 0,
+            failed_count INT NOT NULL DEFAULT 0,
+            locked_until TIMESTAMP,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_date TIMESTAMP
+        )
+        """,
+        "CREATE INDEX idx_broadcast_running ON Broadcast (broadcast_id) WHERE state = 'running'",
+        # Получатели рассылки: заявки олимпиады по возрастанию user_id
+        "CREATE INDEX idx_application_olympiad_user ON Application (olympiad_id, user_id)",
+    ]),
+    (8, "Версии данных сводных отчетов вычисляются при чтении", [
+        # Триггеры обновляли одну строку DataVersion на каждый оператор записи (даже не
+        # изменивший ни одной строки) и выстраивали пишущие транзакции в очередь за ней
+        *[
+            f"DROP TRIGGER IF EXISTS {table.lower()}_data_version ON {table}"
+            for table in ("Application", "Olympiad", "ApplicationStatus", "UserCategory", "Category")
+        ],
+        "DROP FUNCTION IF EXISTS bump_data_version()",
+        "DROP TABLE IF EXISTS DataVersion",
+    ]),
+    (9, "Версии данных олимпиад вычисляются при чтении", [
+        # Как и в миграции 8: запись заявок, сообщений и профилей больше не обновляет
+        # строку счетчика олимпиады, версия выгрузки считается при ее запуске
+        *[
+            f"DROP TRIGGER IF EXISTS {table.lower()}_olympiad_version_{event.lower()} ON {table}"
+            for table, events in (
+                ("Application", ("INSERT", "UPDATE", "DELETE")),
+                ("Messages", ("INSERT", "UPDATE", "DELETE")),
+                ("Olympiad", ("UPDATE",)),
+                ("Users", ("UPDATE",))
+            )
+            for event in events
+        ],
+        *[
+            f"DROP FUNCTION IF EXISTS {function}()"
+            for function in (
+                "application_olympiad_version", "messages_olympiad_version",
+                "olympiad_row_version", "users_olympiad_version"
+            )
+        ],
+        "DROP FUNCTION IF EXISTS bump_olympiad_versions(INT[])",
+        "DROP TABLE IF EXISTS OlympiadVersion",
+    ]),
+]
+
+# Произвольный ключ advisory lock, чтобы миграции не запускались параллельно с нескольких реплик
+MIGRATIONS_LOCK_ID = 720_001
+
+async def apply_migrations(conn: asyncpg.Connection) -> int:
+    """Применение новых миграций, возвращает их количество"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS SchemaMigrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(200) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+    await conn.execute("SELECT pg_advisory_lock($1)", MIGRATIONS_LOCK_ID)
+    try:
+        applied = {
+            row['version'] for row in await conn.fetch("SELECT version FROM SchemaMigrations")
+        }
+        count = 0
+        for version, name, statements in MIGRATIONS:
+            if version in applied:
+                continue
+
+            # Каждая миграция применяется целиком или не применяется вовсе
+            async with conn.transaction():
+                for statement in statements:
+                    await conn.execute(statement)
+                await conn.execute(
+                    "INSERT INTO SchemaMigrations (version, name) VALUES ($1, $2)",
+                    version, name
+                )
+            print(f"✅ Миграция {version} применена: {name}")
+            count += 1
+        return count
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATIONS_LOCK_ID)
+
+async def main():
+    """Применение миграций к БД из переменных окружения"""
+    try:
+        conn = await asyncpg.connect(
+            host=os.getenv("DB__HOST", "db"),
+            port=int(os.getenv("DB__PORT", "5432")),
+            user=os.getenv("DB__USER", "admin"),
+            password=os.getenv("DB__PASSWORD"),
+            database=os.getenv("DB__NAME")
+        )
+    except Exception as e:
+        print(f"❌ Ошибка подключения: {e}")
+        return
+
+    try:
+        count = await apply_migrations(conn)
+        if not count:
+            print("✅ Схема БД актуальна, новых миграций нет")
+    finally:
+        await conn.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
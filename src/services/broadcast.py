@@ -0,0 +1,141 @@
+import asyncio
+import os
+from typing import Dict, List, Optional, Tuple
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from services.database import Database
+from services.rate_limit import TelegramRateLimiter
+from keyboards.keyboards import broadcast_progress_keyboard
+
+class BroadcastManager:
+    """Выполнение рассылок участникам олимпиад.
+
+    Получатели читаются пачками по возрастанию user_id начиная с контрольной
+    точки, пачка отправляется пулом воркеров через общий ограничитель Telegram,
+    после пачки прогресс сохраняется в БД. Незавершенные рассылки (в том числе
+    брошенные упавшим процессом) подхватываются фоновым циклом.
+    """
+
+    def __init__(self, bot: Bot, db: Database, limiter: TelegramRateLimiter):
+        self.bot = bot
+        self.db = db
+        self.limiter = limiter
+        self.workers = int(os.getenv("BROADCAST__WORKERS", 8))
+        self.chunk_size = int(os.getenv("BROADCAST__CHUNK_SIZE", 200))
+        self.poll_interval = float(os.getenv("BROADCAST__POLL_INTERVAL", 30))
+        # Захват должен переживать отправку одной пачки с запасом
+        self.lease_seconds = float(os.getenv("BROADCAST__LEASE", 120))
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._poller: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Запуск фонового цикла (хук startup диспетчера)"""
+        if self._poller is None:
+            self._poller = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        """Остановка рассылок (хук shutdown диспетчера) - прогресс уже сохранен в БД"""
+        tasks = list(self._tasks.values())
+        if self._poller is not None:
+            tasks.append(self._poller)
+            self._poller = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def launch(self, broadcast_id: int) -> None:
+        """Запуск рассылки в фоне (если она еще не выполняется этим процессом)"""
+        if broadcast_id in self._tasks:
+            return
+        task = asyncio.create_task(self._run(broadcast_id))
+        self._tasks[broadcast_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(broadcast_id, None))
+
+    async def _poll(self) -> None:
+        """Подхват незавершенных рассылок после перезапуска или падения другого процесса"""
+        while True:
+            try:
+                for broadcast_id in await self.db.get_unclaimed_broadcast_ids():
+                    self.launch(broadcast_id)
+            except Exception as e:
+                print(f"❌ Ошибка проверки рассылок: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _run(self, broadcast_id: int) -> None:
+        try:
+            broadcast = await self.db.claim_broadcast(broadcast_id, self.lease_seconds)
+            if broadcast is None:
+                return
+
+            last_user_id = broadcast['last_user_id']
+            sent, failed = broadcast['sent_count'], broadcast['failed_count']
+            while True:
+                recipients = await self.db.get_broadcast_recipients(
+                    broadcast['olympiad_id'], broadcast['status_id'], last_user_id, self.chunk_size
+                )
+                if not recipients:
+                    await self.db.finish_broadcast(broadcast_id)
+                    await self._show_progress(broadcast, sent, failed, "✅ Рассылка завершена")
+                    return
+
+                chunk_sent, chunk_failed = await self._send_chunk(broadcast['message_text'], recipients)
+                sent += chunk_sent
+                failed += chunk_failed
+                last_user_id = recipients[-1]['user_id']
+
+                # Контрольная точка: после перезапуска повторится не больше одной пачки
+                state = await self.db.save_broadcast_checkpoint(
+                    broadcast_id, last_user_id, chunk_sent, chunk_failed, self.lease_seconds
+                )
+                if state != 'running':
+                    await self._show_progress(broadcast, sent, failed, "⛔ Рассылка остановлена")
+                    return
+                await self._show_progress(broadcast, sent, failed, "📣 Идет рассылка", running=True)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Ошибка рассылки {broadcast_id}: {e}")
+
+    async def _send_chunk(self, text: str, recipients: List) -> Tuple[int, int]:
+        """Отправка пачки пулом воркеров, возвращает (доставлено, не доставлено)"""
+        queue = asyncio.Queue()
+        for recipient in recipients:
+            queue.put_nowait(recipient['telegram_id'])
+        counters = {"sent": 0, "failed": 0}
+
+        async def worker():
+            while not queue.empty():
+                chat_id = queue.get_nowait()
+                try:
+                    await self.limiter.send_message(self.bot, chat_id, text)
+                    counters["sent"] += 1
+                except (TelegramForbiddenError, TelegramBadRequest):
+                    # Пользователь заблокировал бота или удалил аккаунт
+                    counters["failed"] += 1
+                except Exception as e:
+                    print(f"❌ Ошибка отправки рассылки в чат {chat_id}: {e}")
+                    counters["failed"] += 1
+
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, len(recipients)))))
+        return counters["sent"], counters["failed"]
+
+    async def _show_progress(self, broadcast, sent: int, failed: int, title: str, running: bool = False) -> None:
+        """Обновление сообщения о прогрессе у автора рассылки"""
+        if not broadcast['progress_message_id']:
+            return
+        text = (
+            f"{title}\n\n"
+            f"✉️ Доставлено: {sent} из {broadcast['total']}\n"
+            f"🚫 Не доставлено: {failed}"
+        )
+        try:
+            await self.limiter.acquire(broadcast['chat_id'])
+            await self.bot.edit_message_text(
+                text,
+                chat_id=broadcast['chat_id'],
+                message_id=broadcast['progress_message_id'],
+                reply_markup=broadcast_progress_keyboard(broadcast['broadcast_id']) if running else None
+            )
+        except Exception:
+            # Сообщение могли удалить - на саму рассылку это не влияет
+            pass
@@ -0,0 +1,53 @@
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+class TTLCache:
+    """Простой in-process кэш с ограниченным временем жизни записей"""
+
+    def __init__(self, ttl: float, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Значение по ключу или default, если его нет или оно устарело"""
+        entry = self._data.get(key, _MISSING)
+        if entry is not _MISSING:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Сохранение значения"""
+        if key not in self._data and len(self._data) >= self.max_size:
+            self._evict()
+        self._data[key] = (time.monotonic() + (ttl if ttl is not None else self.ttl), value)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Удаление записи по ключу"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Полная очистка кэша"""
+        self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Счетчики попаданий/промахов"""
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+    def _evict(self) -> None:
+        """Освобождение места: сначала устаревшие записи, затем самая старая"""
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._data.items() if expires_at <= now]
+        for key in expired:
+            del self._data[key]
+        if len(self._data) >= self.max_size:
+            del self._data[next(iter(self._data))]
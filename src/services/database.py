@@ -1,56 +1,268 @@
+import asyncio
 import asyncpg
 import os
-from typing import Optional
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+from services import queries as q
+from services.cache import TTLCache
+from services.metrics import QueryMetrics
+from services.pool import CONNECTION_ERRORS, CircuitBreaker, PoolSupervisor
+from services.queries import Query
+from services.reference_data import ReferenceData, REFERENCE_DATA_CHANNEL
+from services.notifications import status_notification_text
+
+# Роли с правами модерации
+STAFF_ROLES = ('Администратор', 'Модератор')
+
+# Маркер отсутствия записи в кэше профилей (None - закэшированный "пользователь не найден")
+_NO_PROFILE = object()
 
 class Database:
     _instance = None
-    
+
     def __new__(cls):
         """Реализация Singleton паттерна"""
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance.pool = None
+            # Кэш профилей по telegram_id: профиль загружается UserProfileMiddleware на каждый апдейт
+            cls._instance.profile_cache = TTLCache(ttl=float(os.getenv("CACHE__PROFILE_TTL", 60)))
+            # Справочники загружаются при подключении и обновляются по NOTIFY
+            cls._instance.reference = ReferenceData()
+            cls._instance._listener = None
+            cls._instance._refresh_task = None
+            # Время ожидания пула и выполнения по каждому запросу
+            cls._instance.metrics = QueryMetrics()
+            # При недоступной БД методы сразу возвращают запасные значения
+            cls._instance.breaker = CircuitBreaker(
+                threshold=int(os.getenv("DB__BREAKER_THRESHOLD", 3)),
+                reset_timeout=float(os.getenv("DB__BREAKER_RESET", 30))
+            )
+            cls._instance.supervisor = None
         return cls._instance
 
+    @staticmethod
+    def _connection_params() -> dict:
+        """Параметры подключения из переменных окружения"""
+        return {
+            "host": os.getenv("DB__HOST", "db"),
+            "port": int(os.getenv("DB__PORT", 5432)),
+            "user": os.getenv("DB__USER"),
+            "password": os.getenv("DB__PASSWORD"),
+            "database": os.getenv("DB__NAME")
+        }
+
     async def initialize(self):
         """Инициализация пула подключений к БД"""
         if self.pool is not None:
             return True
-            
+
+        statement_timeout = int(os.getenv("DB__STATEMENT_TIMEOUT_MS", 30000))
         try:
             self.pool = await asyncpg.create_pool(
-                host=os.getenv("DB__HOST", "db"),
-                port=int(os.getenv("DB__PORT", 5432)),
-                user=os.getenv("DB__USER"),
-                password=os.getenv("DB__PASSWORD"),
-                database=os.getenv("DB__NAME"),
-                min_size=1,
-                max_size=10
+                **self._connection_params(),
+                # Пул растет от min до max по нагрузке, а простаивающие дольше
+                # DB__IDLE_LIFETIME соединения закрываются - размер подстраивается сам
+                min_size=int(os.getenv("DB__POOL_MIN_SIZE", 1)),
+                max_size=int(os.getenv("DB__POOL_MAX_SIZE", 10)),
+                max_inactive_connection_lifetime=float(os.getenv("DB__IDLE_LIFETIME", 300)),
+                timeout=float(os.getenv("DB__CONNECT_TIMEOUT", 5)),
+                # Все запросы объявлены в services/queries.py, поэтому кэш подготовленных
+                # выражений должен вмещать их все с вариантами фильтров, иначе они будут
+                # вытеснять друг друга. Время жизни 0 - выражения не переподготавливаются
+                # по таймеру (после смены схемы asyncpg подготовит их заново сам).
+                # Для PgBouncer в режиме transaction размер кэша нужно выставить в 0.
+                statement_cache_size=int(os.getenv("DB__STATEMENT_CACHE_SIZE", 256)),
+                max_cached_statement_lifetime=int(os.getenv("DB__STATEMENT_CACHE_LIFETIME", 0)),
+                server_settings={"statement_timeout": str(statement_timeout)} if statement_timeout else None
             )
             print("✅ Подключение к PostgreSQL успешно установлено!")
-            return True
         except Exception as e:
             print(f"❌ Ошибка подключения к PostgreSQL: {e}")
+            self.breaker.record_failure()
+            return False
+
+        self.breaker.record_success()
+        await self.refresh_reference_data()
+        await self._listen_reference_changes()
+        return True
+
+    def start_supervisor(self) -> None:
+        """Фоновое переподключение и проверка БД (вместо подключения из хендлеров)"""
+        if self.supervisor is None:
+            self.supervisor = PoolSupervisor(self)
+            self.supervisor.start()
+
+    async def ping(self) -> bool:
+        """Проверка доступности БД (выполняется и при разомкнутом предохранителе)"""
+        try:
+            async with self._acquire(q.PING.name) as conn:
+                await self._timed("fetchval", q.PING, (), conn)
+        except Exception as e:
+            print(f"❌ БД не отвечает: {e}")
+            self.breaker.trip()
             return False
+        self.breaker.record_success()
+
+        # Подписка на NOTIFY не переживает перезапуск БД: восстанавливаем ее
+        # и перечитываем справочники, изменения которых могли пропустить
+        if self._listener is None or self._listener.is_closed():
+            await self._listen_reference_changes()
+            await self.refresh_reference_data()
+        return True
+
+    def pool_stats(self) -> dict:
+        """Состояние пула: размер, занятость, среднее ожидание соединения, предохранитель"""
+        waits, wait_seconds = self.metrics.wait_totals()
+        stats = {
+            "connected": self.pool is not None,
+            "circuit": self.breaker.state,
+            "wait_avg_ms": round(wait_seconds / waits * 1000, 3) if waits else 0.0,
+        }
+        if self.pool is not None:
+            size, idle = self.pool.get_size(), self.pool.get_idle_size()
+            stats.update(
+                size=size,
+                idle=idle,
+                in_use=size - idle,
+                min_size=self.pool.get_min_size(),
+                max_size=self.pool.get_max_size(),
+                utilization=round((size - idle) / self.pool.get_max_size(), 3)
+            )
+        return stats
 
     async def close(self):
         """Закрытие пула подключений"""
+        if self.supervisor is not None:
+            await self.supervisor.stop()
+            self.supervisor = None
+        if self._listener is not None:
+            await self._listener.close()
+            self._listener = None
         if self.pool:
-            await self.pool.close()
+            try:
+                await asyncio.wait_for(self.pool.close(), timeout=10)
+            except asyncio.TimeoutError:
+                # После обрыва связи соединение может так и не вернуться в пул
+                self.pool.terminate()
             print("🔌 Соединение с БД закрыто")
             self.pool = None
 
+    async def refresh_reference_data(self) -> None:
+        """Перезагрузка справочников (снимок заменяется целиком)"""
+        try:
+            async with self.pool.acquire() as conn:
+                self.reference = await ReferenceData.load(conn)
+        except Exception as e:
+            print(f"❌ Ошибка загрузки справочников: {e}")
+
+    async def _listen_reference_changes(self) -> None:
+        """Подписка на изменения справочников (отдельное соединение вне пула)"""
+        try:
+            self._listener = await asyncpg.connect(**self._connection_params())
+            await self._listener.add_listener(REFERENCE_DATA_CHANNEL, self._on_reference_changed)
+        except Exception as e:
+            print(f"⚠️ Не удалось подписаться на изменения справочников: {e}")
+            self._listener = None
+
+    def _on_reference_changed(self, connection, pid, channel, payload) -> None:
+        """Обработчик NOTIFY от триггеров справочных таблиц"""
+        self._refresh_task = asyncio.get_running_loop().create_task(self.refresh_reference_data())
+
+    # Выполнение запросов
+    async def _ready(self) -> bool:
+        """Можно ли выполнять запросы.
+
+        При разомкнутом предохранителе сразу False. Без пула подключаемся на месте,
+        только если нет супервизора: иначе переподключение идет в фоне.
+        """
+        if not self.breaker.allow():
+            return False
+        if self.pool is not None:
+            return True
+        if self.supervisor is not None:
+            return False
+        return await self.initialize()
+
+    @asynccontextmanager
+    async def _acquire(self, name: str):
+        """Соединение из пула с учетом времени ожидания (name - запрос или метод)"""
+        started = time.perf_counter()
+        acquired = False
+        try:
+            async with self.pool.acquire() as conn:
+                acquired = True
+                self.metrics.observe_wait(name, time.perf_counter() - started)
+                yield conn
+        except CONNECTION_ERRORS:
+            # Ошибки самих запросов учитывает _timed
+            if not acquired:
+                self.breaker.record_failure()
+            raise
+
+    async def _run(self, method: str, query: Query, args: tuple, conn: Optional[asyncpg.Connection], fallback):
+        """Выполнение запроса на переданном соединении или на соединении из пула.
+
+        Без подключения к БД возвращает fallback.
+        """
+        if conn is not None:
+            return await self._timed(method, query, args, conn)
+        if not await self._ready():
+            return fallback
+        async with self._acquire(query.name) as conn:
+            return await self._timed(method, query, args, conn)
+
+    async def _timed(self, method: str, query: Query, args: tuple, conn: asyncpg.Connection):
+        """Выполнение запроса с замером времени"""
+        started = time.perf_counter()
+        failed = False
+        try:
+            result = await getattr(conn, method)(query.sql, *args)
+        except Exception as e:
+            failed = True
+            if isinstance(e, CONNECTION_ERRORS):
+                self.breaker.record_failure()
+            raise
+        finally:
+            self.metrics.observe_query(query.name, time.perf_counter() - started, args, failed)
+        self.breaker.record_success()
+        return result
+
+    async def _fetch(self, query: Query, *args, conn: Optional[asyncpg.Connection] = None) -> List[asyncpg.Record]:
+        """Строки результата запроса ([] - нет подключения)"""
+        return await self._run("fetch", query, args, conn, [])
+
+    async def _fetchrow(self, query: Query, *args, conn: Optional[asyncpg.Connection] = None) -> Optional[asyncpg.Record]:
+        """Первая строка результата запроса (None - нет строки или подключения)"""
+        return await self._run("fetchrow", query, args, conn, None)
+
+    async def _fetchval(self, query: Query, *args, conn: Optional[asyncpg.Connection] = None):
+        """Первое значение первой строки результата (None - нет строки или подключения)"""
+        return await self._run("fetchval", query, args, conn, None)
+
+    async def _execute(self, query: Query, *args, conn: Optional[asyncpg.Connection] = None) -> Optional[str]:
+        """Выполнение запроса без результата, возвращает статус команды (None - нет подключения)"""
+        return await self._run("execute", query, args, conn, None)
+
     async def get_user(self, telegram_id: int) -> Optional[asyncpg.Record]:
         """Получение пользователя по Telegram ID"""
-        if self.pool is None:
-            if not await self.initialize():
-                return None
-                
-        async with self.pool.acquire() as conn:
-            return await conn.fetchrow(
-                "SELECT * FROM users WHERE telegram_id = $1", 
-                telegram_id
-            )
+        return await self._fetchrow(q.GET_USER, telegram_id)
+
+    async def get_user_profile(self, telegram_id: int) -> Optional[asyncpg.Record]:
+        """Профиль пользователя (данные, роль, категория) одним запросом, с кэшированием"""
+        cached = self.profile_cache.get(telegram_id, _NO_PROFILE)
+        if cached is not _NO_PROFILE:
+            return cached
+
+        if not await self._ready():
+            return None
+
+        # Пустой результат тоже кэшируется: create_user сбрасывает запись после регистрации
+        profile = await self._fetchrow(q.GET_USER_PROFILE, telegram_id)
+        self.profile_cache.set(telegram_id, profile)
+        return profile
 
     async def create_user(
         self,
@@ -62,172 +274,88 @@ class Database:
         category_id: Optional[int] = None
     ) -> None:
         """Создание нового пользователя"""
-        if self.pool is None:
-            if not await self.initialize():
-                return
-                
-        async with self.pool.acquire() as conn:
+        if not await self._ready():
+            return
+
+        async with self._acquire("create_user") as conn:
             # Сохраняем пользователя
-            user_id = await conn.fetchval(
-                """
-                INSERT INTO users (telegram_id, first_name, last_name, middle_name)
-                VALUES ($1, $2, $3, $4)
-                ON CONFLICT (telegram_id) DO NOTHING
-                RETURNING user_id
-                """,
-                telegram_id, first_name, last_name, middle_name
+            user_id = await self._fetchval(
+                q.INSERT_USER, telegram_id, first_name, last_name, middle_name, conn=conn
             )
-            
+
             # Если пользователь создан, добавляем роль
             if user_id:
-                # Получаем ID роли по названию
-                role_id = await conn.fetchval(
-                    "SELECT role_id FROM role WHERE role_name = $1",
-                    role
-                )
-                
+                role_id = self.reference.role_ids.get(role)
                 if role_id:
-                    await conn.execute(
-                        "INSERT INTO UserRole (user_id, role_id) VALUES ($1, $2)",
-                        user_id, role_id
-                    )
+                    await self._execute(q.INSERT_USER_ROLE, user_id, role_id, conn=conn)
                 if category_id:
-                    await conn.execute(
-                        "INSERT INTO UserCategory (user_id, category_id) VALUES ($1, $2)",
-                        user_id, category_id
-                    )
+                    await self._execute(q.INSERT_USER_CATEGORY, user_id, category_id, conn=conn)
+
+        self.invalidate_profile_cache(telegram_id)
 
-    async def get_role_name(self, user_id: int) -> str:
-        """Получение названия роли по user_id"""
-        if self.pool is None:
-            if not await self.initialize():
-                return 
-        async with self.pool.acquire() as conn:
-            category = await conn.fetchrow(
-                "SELECT role_name FROM role WHERE role_id = (SELECT role_id FROM UserRole WHERE user_id = $1)",
-                user_id
-            )
-            return category['role_name'] if category else "Не указана"
-        
-    async def get_category_name_by_user_id(self, user_id: int) -> str:
-        """Получение названия категории по user_id"""
-        if self.pool is None:
-            if not await self.initialize():
-                return 
-        async with self.pool.acquire() as conn:
-            category = await conn.fetchrow(
-                "SELECT category_name FROM category WHERE category_id = (SELECT category_id FROM UserCategory WHERE user_id = $1)",
-                user_id
-            )
-            return category['category_name'] if category else "Не указана"
-        
     async def get_category_name(self, category_id: int) -> str:
         """Получение названия категории по category_id"""
-        if self.pool is None:
-            if not await self.initialize():
-                return 
-        async with self.pool.acquire() as conn:
-            category = await conn.fetchrow(
-                "SELECT category_name FROM category WHERE category_id = $1",
-                category_id
-            )
-            return category['category_name'] if category else "Не указана"
+        if not await self._ready():
+            return
+        return self.reference.category_names.get(category_id, "Не указана")
 
     async def delete_user(self, telegram_id: int) -> bool:
         """Удаление пользователя и связанных данных"""
-        if self.pool is None:
-            if not await self.initialize():
-                return False
-                
+        if not await self._ready():
+            return False
+
         try:
-            async with self.pool.acquire() as conn:
+            async with self._acquire("delete_user") as conn:
                 async with conn.transaction():
                     # Удаляем связанные данные из других таблиц
-                    await conn.execute(
-                        "DELETE FROM userrole WHERE user_id = (SELECT user_id FROM users WHERE telegram_id = $1)",
-                        telegram_id
-                    )
-
-                    await conn.execute(
-                        "DELETE FROM usercategory WHERE user_id = (SELECT user_id FROM users WHERE telegram_id = $1)",
-                        telegram_id
-                    )
-
-                    await conn.execute(
-                        "DELETE FROM messages WHERE application_id IN (SELECT application_id FROM application WHERE user_id = (SELECT user_id FROM users WHERE telegram_id = $1))",
-                        telegram_id
-                    )
+                    await self._execute(q.DELETE_USER_ROLES, telegram_id, conn=conn)
+                    await self._execute(q.DELETE_USER_CATEGORIES, telegram_id, conn=conn)
+                    await self._execute(q.DELETE_USER_MESSAGES, telegram_id, conn=conn)
+                    await self._execute(q.DELETE_USER_APPLICATIONS, telegram_id, conn=conn)
 
-                    await conn.execute(
-                        "DELETE FROM application WHERE user_id = (SELECT user_id FROM users WHERE telegram_id = $1)",
-                        telegram_id
-                    )
-                    
                     # Удаляем пользователя
-                    result = await conn.execute(
-                        "DELETE FROM users WHERE telegram_id = $1",
-                        telegram_id
-                    )
-                    
+                    result = await self._execute(q.DELETE_USER, telegram_id, conn=conn)
+
                     # Если удалена хотя бы одна строка - успех
                     return "DELETE 1" in result
         except Exception as e:
             print(f"❌ Ошибка при удалении пользователя: {e}")
             return False
+        finally:
+            self.invalidate_profile_cache(telegram_id)
 
     async def is_admin_or_moderator(self, telegram_id: int) -> bool:
         """Проверяет, является ли пользователь администратором или модератором"""
-        if self.pool is None:
-            if not await self.initialize():
-                return False
-                
-        async with self.pool.acquire() as conn:
-            user = await self.get_user(telegram_id)
-            if not user:
-                return False
-                
-            result = await conn.fetchval(
-                """
-                SELECT COUNT(*) 
-                FROM UserRole ur
-                JOIN Role r ON ur.role_id = r.role_id
-                WHERE ur.user_id = $1 AND r.role_name IN ('Администратор', 'Модератор')
-                """,
-                user['user_id']
-            )
-            return result > 0
-        
-        # заявки на олимпиаду
+        profile = await self.get_user_profile(telegram_id)
+        return profile is not None and profile['is_staff']
+
+    def _staff_role_ids(self) -> List[int]:
+        """ID ролей с правами модерации"""
+        return [self.reference.role_ids[name] for name in STAFF_ROLES if name in self.reference.role_ids]
+
+    def invalidate_profile_cache(self, telegram_id: Optional[int] = None) -> None:
+        """Сброс кэша профилей (для одного пользователя или целиком)"""
+        if telegram_id is None:
+            self.profile_cache.clear()
+        else:
+            self.profile_cache.invalidate(telegram_id)
+
     async def get_subjects(self):
         """Получение всех дисциплин"""
-        if self.pool is None:
-            if not await self.initialize():
-                return []
-        async with self.pool.acquire() as conn:
-            return await conn.fetch("SELECT * FROM Subject")
+        if not await self._ready():
+            return []
+        return list(self.reference.subjects)
 
     async def get_subject_name(self, subject_id: int) -> str:
         """Получение названия дисциплины по ID"""
-        if self.pool is None:
-            if not await self.initialize():
-                return "Неизвестная дисциплина"
-        async with self.pool.acquire() as conn:
-            subject = await conn.fetchrow(
-                "SELECT title FROM Subject WHERE subject_id = $1",
-                subject_id
-            )
-            return subject['title'] if subject else "Не указана"
-        
+        if not await self._ready():
+            return "Неизвестная дисциплина"
+        return self.reference.subject_titles.get(subject_id, "Не указана")
+
     async def get_active_olympiads(self):
         """Получение активных олимпиад"""
-        if self.pool is None:
-            if not await self.initialize():
-                return []
-        async with self.pool.acquire() as conn:
-            return await conn.fetch(
-                "SELECT * FROM Olympiad WHERE end_date >= CURRENT_DATE"
-            )
-        
+        return await self._fetch(q.GET_ACTIVE_OLYMPIADS)
+
     async def create_olympiad(
         self,
         title: str,
@@ -238,257 +366,267 @@ class Database:
         subject_id: int
     ) -> bool:
         """Создание новой олимпиады"""
-        if self.pool is None:
-            if not await self.initialize():
-                return False
-                
-        async with self.pool.acquire() as conn:
-            try:
-                await conn.execute(
-                    """
-                    INSERT INTO Olympiad 
-                    (title, description, organizer, start_date, end_date, subject_id)
-                    VALUES ($1, $2, $3, $4, $5, $6)
-                    """,
-                    title, description, organizer, start_date, end_date, subject_id
-                )
-                return True
-            except Exception as e:
-                print(f"Error creating olympiad: {e}")
-                return False
-            
+        try:
+            result = await self._execute(
+                q.INSERT_OLYMPIAD, title, description, organizer, start_date, end_date, subject_id
+            )
+            return result is not None
+        except Exception as e:
+            print(f"Error creating olympiad: {e}")
+            return False
+
     async def get_olympiad_by_id(self, olympiad_id: int):
         """Получение олимпиады по ID"""
-        if self.pool is None:
-            if not await self.initialize():
-                return None
-        async with self.pool.acquire() as conn:
-            return await conn.fetchrow(
-                "SELECT * FROM Olympiad WHERE olympiad_id = $1",
-                olympiad_id
-            )
-            
-    # Работа с application
-    async def has_application(self, telegram_id: int, olympiad_id: int) -> bool:
-        """Проверяет, есть ли у пользователя заявка на эту олимпиаду"""
-        if self.pool is None:
-            if not await self.initialize():
-                return False
-        async with self.pool.acquire() as conn:
-            user = await self.get_user(telegram_id)
-            if not user:
-                return False
-                
-            count = await conn.fetchval(
-                """
-                SELECT COUNT(*) 
-                FROM Application 
-                WHERE user_id = $1 AND olympiad_id = $2
-                """,
-                user['user_id'], olympiad_id
+        return await self._fetchrow(q.GET_OLYMPIAD, olympiad_id)
+
+    # Работа с application: заявки на олимпиаду
+    async def submit_application(self, user_id: int, olympiad_id: int) -> Optional[bool]:
+        """Подача заявки одним запросом.
+
+        True - заявка создана, False - заявка на эту олимпиаду уже есть, None - ошибка.
+        """
+        if not await self._ready():
+            return None
+
+        try:
+            # Уникальность (user_id, olympiad_id) защищает от повторных нажатий и гонок
+            application_id = await self._fetchval(
+                q.SUBMIT_APPLICATION, user_id, olympiad_id, self.reference.status_ids['Рассмотрение']
             )
-            return count > 0
-        
-    async def create_application(self, telegram_id: int, olympiad_id: int) -> bool:
-        """Создание новой заявки"""
-        if self.pool is None:
-            if not await self.initialize():
-                return False
-                
-        async with self.pool.acquire() as conn:
+            return application_id is not None
+        except Exception as e:
+            print(f"Ошибка создания заявки на олимпиаду: {e}")
+            return None
+
+    def _pending_filter(
+        self,
+        values: list,
+        olympiad_id: Optional[int] = None,
+        category_id: Optional[int] = None
+    ) -> Tuple[str, List[str]]:
+        """JOIN и условия отбора заявок на рассмотрении (параметры дописываются в values)"""
+        joins = ""
+        # Статус - константой, чтобы планировщик мог идти по индексу
+        # (status_id, created_date, application_id) сразу в нужном порядке
+        values.append(self.reference.status_ids.get('Рассмотрение'))
+        conditions = [f"a.status_id = ${len(values)}"]
+        if olympiad_id is not None:
+            values.append(olympiad_id)
+            conditions.append(f"a.olympiad_id = ${len(values)}")
+        if category_id is not None:
+            joins = "JOIN UserCategory uc ON uc.user_id = a.user_id"
+            values.append(category_id)
+            conditions.append(f"uc.category_id = ${len(values)}")
+        return joins, conditions
+
+    async def count_pending_applications(
+        self,
+        olympiad_id: Optional[int] = None,
+        category_id: Optional[int] = None
+    ) -> int:
+        """Число заявок на рассмотрении по фильтру очереди модерации"""
+        values = []
+        joins, conditions = self._pending_filter(values, olympiad_id, category_id)
+        query = q.COUNT_PENDING_APPLICATIONS.format(joins=joins, where=" AND ".join(conditions))
+        return await self._fetchval(query, *values) or 0
+
+    async def bulk_update_pending_status(
+        self,
+        status_name: str,
+        moderator_telegram_id: int,
+        olympiad_id: Optional[int] = None,
+        category_id: Optional[int] = None
+    ) -> Optional[int]:
+        """Смена статуса всех заявок на рассмотрении по фильтру очереди модерации.
+
+        Одна транзакция: один UPDATE ... RETURNING, журнал статусов из него же
+        и уведомления участникам через COPY. Возвращает число заявок (None - ошибка).
+        """
+        if not await self._ready():
+            return None
+
+        status_id = self.reference.status_ids.get(status_name)
+        if not status_id:
+            return None
+
+        values = []
+        joins, conditions = self._pending_filter(values, olympiad_id, category_id)
+        values.extend([status_id, moderator_telegram_id])
+        query = q.BULK_UPDATE_PENDING_STATUS.format(
+            joins=joins,
+            where=" AND ".join(conditions),
+            status_param=f"${len(values) - 1}",
+            moderator_param=f"${len(values)}"
+        )
+
+        async with self._acquire("bulk_update_pending_status") as conn:
             try:
-                user = await self.get_user(telegram_id)
-                if not user:
-                    return False
-                    
-                # Статус "Рассмотрение" - ожидает подтверждения
-                status_id = await conn.fetchval(
-                    "SELECT status_id FROM ApplicationStatus WHERE status_name = 'Рассмотрение'"
-                )
-                
-                await conn.execute(
-                    """
-                    INSERT INTO Application 
-                    (olympiad_id, user_id, status_id)
-                    VALUES ($1, $2, $3)
-                    """,
-                    olympiad_id, user['user_id'], status_id
-                )
-                return True
+                async with conn.transaction():
+                    updated = await self._fetch(query, *values, conn=conn)
+                    # Названия олимпиад - отдельным запросом по немногим уникальным ID
+                    titles = {
+                        row['olympiad_id']: row['title']
+                        for row in await self._fetch(
+                            q.GET_OLYMPIAD_TITLES, list({row['olympiad_id'] for row in updated}), conn=conn
+                        )
+                    }
+                    await conn.copy_records_to_table(
+                        "notificationoutbox",
+                        records=[
+                            (row['telegram_id'], status_notification_text(titles[row['olympiad_id']], status_name))
+                            for row in updated
+                        ],
+                        columns=["chat_id", "message_text"]
+                    )
+                return len(updated)
             except Exception as e:
-                print(f"Ошибка создания заявки на олимпиаду: {e}")
-                return False
-            
-    async def get_pending_applications(self):
-        """Получение заявок, ожидающих модерации"""
-        if self.pool is None:
-            if not await self.initialize():
-                return []
-        async with self.pool.acquire() as conn:
-            return await conn.fetch(
-                """
-                SELECT a.application_id, u.first_name, u.last_name, o.title AS olympiad_title
-                FROM Application a
-                JOIN Users u ON a.user_id = u.user_id
-                JOIN Olympiad o ON a.olympiad_id = o.olympiad_id
-                JOIN ApplicationStatus s ON a.status_id = s.status_id
-                WHERE s.status_name = 'Рассмотрение'
-                """
+                print(f"❌ Ошибка массового обновления статуса: {e}")
+                return None
+
+    async def get_pending_applications_page(
+        self,
+        cursor: Optional[Tuple[datetime, int]] = None,
+        backward: bool = False,
+        olympiad_id: Optional[int] = None,
+        category_id: Optional[int] = None,
+        limit: int = 10
+    ) -> Tuple[List[asyncpg.Record], bool, bool]:
+        """Страница очереди модерации (keyset-пагинация по (created_date, application_id)).
+
+        Заявки идут от старых к новым, опционально с фильтром по олимпиаде и категории участника.
+        Возвращает (заявки, есть_предыдущая, есть_следующая).
+        """
+        if not await self._ready():
+            return [], False, False
+
+        values = []
+        joins, conditions = self._pending_filter(values, olympiad_id, category_id)
+        if cursor is not None:
+            values.extend(cursor)
+            operator = "<" if backward else ">"
+            conditions.append(
+                f"(a.created_date, a.application_id) {operator} (${len(values) - 1}, ${len(values)})"
             )
+        order = "DESC" if cursor is not None and backward else "ASC"
+        # Берем на одну запись больше, чтобы узнать, есть ли что-то дальше
+        values.append(limit + 1)
+
+        query = q.PENDING_APPLICATIONS_PAGE.format(
+            joins=joins, where=" AND ".join(conditions), order=order, limit_param=len(values)
+        )
+        rows = await self._fetch(query, *values)
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if cursor is not None and backward:
+            rows.reverse()
+            return rows, has_more, True
+        return rows, cursor is not None, has_more
 
     async def get_application_details(self, application_id: int):
         """Получение детальной информации о заявке"""
-        if self.pool is None:
-            if not await self.initialize():
-                return None
-        async with self.pool.acquire() as conn:
-            return await conn.fetchrow(
-                """
-                SELECT 
-                    a.application_id,
-                    u.first_name,
-                    u.last_name,
-                    o.title AS olympiad_title,
-                    s.status_name,
-                    a.created_date
-                FROM Application a
-                JOIN Users u ON a.user_id = u.user_id
-                JOIN Olympiad o ON a.olympiad_id = o.olympiad_id
-                JOIN ApplicationStatus s ON a.status_id = s.status_id
-                WHERE a.application_id = $1
-                """,
-                application_id
-            )
+        return await self._fetchrow(q.GET_APPLICATION_DETAILS, application_id)
 
-    async def update_application_status(self, application_id: int, status_name: str) -> bool:
-        """Обновление статуса заявки"""
-        if self.pool is None:
-            if not await self.initialize():
-                return False
-                
-        async with self.pool.acquire() as conn:
-            try:
-                status_id = await conn.fetchval(
-                    "SELECT status_id FROM ApplicationStatus WHERE status_name = $1",
-                    status_name
-                )
-                
-                if not status_id:
-                    return False
-                    
-                await conn.execute(
-                    "UPDATE Application SET status_id = $1 WHERE application_id = $2",
-                    status_id, application_id
-                )
-                return True
-            except Exception as e:
-                print(f"Error updating application status: {e}")
-                return False
-            
-    async def get_all_olympiads(self):
-        """Получение всех олимпиад"""
-        if self.pool is None:
-            if not await self.initialize():
-                return []
-        async with self.pool.acquire() as conn:
-            return await conn.fetch(
-                "SELECT * FROM Olympiad ORDER BY start_date DESC"
-            )
+    async def get_olympiads_page(
+        self,
+        cursor: Optional[Tuple[date, int]] = None,
+        backward: bool = False,
+        limit: int = 5
+    ) -> Tuple[List[asyncpg.Record], bool, bool]:
+        """Страница списка олимпиад (keyset-пагинация по (start_date, olympiad_id)).
 
-    async def get_olympiad_by_id(self, olympiad_id: int):
-        """Получение олимпиады по ID"""
-        if self.pool is None:
-            if not await self.initialize():
-                return None
-        async with self.pool.acquire() as conn:
-            return await conn.fetchrow(
-                "SELECT * FROM Olympiad WHERE olympiad_id = $1",
-                olympiad_id
-            )
+        cursor - ключ последней (или первой при backward) олимпиады соседней страницы.
+        Возвращает (олимпиады, есть_предыдущая, есть_следующая).
+        """
+        if not await self._ready():
+            return [], False, False
 
-    async def get_subject_name(self, subject_id: int) -> str:
-        """Получение названия дисциплины по ID"""
-        if self.pool is None:
-            if not await self.initialize():
-                return "Неизвестная дисциплина"
-        async with self.pool.acquire() as conn:
-            subject = await conn.fetchrow(
-                "SELECT title FROM Subject WHERE subject_id = $1",
-                subject_id
-            )
-            return subject['title'] if subject else "Не указана"
+        # Берем на одну запись больше, чтобы узнать, есть ли что-то дальше
+        if cursor is None:
+            rows = await self._fetch(q.OLYMPIADS_FIRST_PAGE, limit + 1)
+        elif backward:
+            rows = await self._fetch(q.OLYMPIADS_PAGE_BEFORE, cursor[0], cursor[1], limit + 1)
+        else:
+            rows = await self._fetch(q.OLYMPIADS_PAGE_AFTER, cursor[0], cursor[1], limit + 1)
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if cursor is not None and backward:
+            rows.reverse()
+            return rows, has_more, True
+        return rows, cursor is not None, has_more
 
     async def get_applications_for_olympiad(self, olympiad_id: int):
         """Получение всех заявок для олимпиады"""
-        if self.pool is None:
-            if not await self.initialize():
-                return []
-        async with self.pool.acquire() as conn:
-            return await conn.fetch(
-                """
-                SELECT 
-                    a.application_id,
-                    u.first_name,
-                    u.last_name,
-                    u.middle_name,
-                    s.status_name,
-                    a.created_date
-                FROM Application a
-                JOIN Users u ON a.user_id = u.user_id
-                JOIN ApplicationStatus s ON a.status_id = s.status_id
-                WHERE a.olympiad_id = $1
-                ORDER BY a.created_date DESC
-                """,
-                olympiad_id
-            )
+        return await self._fetch(q.OLYMPIAD_APPLICATIONS, olympiad_id)
 
-    async def get_application_details(self, application_id: int):
-        """Получение детальной информации о заявке"""
-        if self.pool is None:
-            if not await self.initialize():
-                return None
-        async with self.pool.acquire() as conn:
-            return await conn.fetchrow(
-                """
-                SELECT 
-                    u.user_id,
-                    a.olympiad_id,
-                    a.application_id,
-                    u.first_name,
-                    u.last_name,
-                    u.middle_name,
-                    o.title AS olympiad_title,
-                    s.status_name,
-                    a.created_date
-                FROM Application a
-                JOIN Users u ON a.user_id = u.user_id
-                JOIN Olympiad o ON a.olympiad_id = o.olympiad_id
-                JOIN ApplicationStatus s ON a.status_id = s.status_id
-                WHERE a.application_id = $1
-                """,
-                application_id
-            )
+    async def get_olympiad_version(self, olympiad_id: int) -> Optional[str]:
+        """Версия данных олимпиады для кэша выгрузок (None - олимпиады нет)"""
+        return await self._fetchval(q.GET_OLYMPIAD_VERSION, olympiad_id)
 
-    async def update_application_status(self, application_id: int, status_name: str) -> bool:
-        """Обновление статуса заявки"""
-        if self.pool is None:
-            if not await self.initialize():
-                return False
-                
-        async with self.pool.acquire() as conn:
+    async def get_olympiad_report_widths(self, olympiad_id: int) -> dict:
+        """Максимальные длины полей заявок олимпиады (ширина столбцов отчета)"""
+        row = await self._fetchrow(q.OLYMPIAD_REPORT_WIDTHS, olympiad_id)
+        return dict(row) if row else {}
+
+    async def iter_applications_for_olympiad(self, olympiad_id: int, batch_size: int = 1000):
+        """Потоковое чтение заявок олимпиады пачками через серверный курсор"""
+        if not await self._ready():
+            return
+        async with self._acquire("iter_applications_for_olympiad") as conn:
+            # Курсоры PostgreSQL существуют только внутри транзакции
+            async with conn.transaction():
+                cursor = await conn.cursor(q.OLYMPIAD_APPLICATIONS.sql, olympiad_id)
+                while True:
+                    batch = await cursor.fetch(batch_size)
+                    if not batch:
+                        break
+                    yield batch
+
+    async def update_application_status(
+        self,
+        application_id: int,
+        status_name: str,
+        comment: Optional[str] = None,
+        moderator_telegram_id: Optional[int] = None
+    ) -> bool:
+        """Обновление статуса заявки с комментарием модератора и уведомлением участника.
+
+        Статус, комментарий и уведомление в очереди записываются одной транзакцией.
+        """
+        if not await self._ready():
+            return False
+
+        status_id = self.reference.status_ids.get(status_name)
+        if not status_id:
+            return False
+
+        async with self._acquire("update_application_status") as conn:
             try:
-                status_id = await conn.fetchval(
-                    "SELECT status_id FROM ApplicationStatus WHERE status_name = $1",
-                    status_name
-                )
-                
-                if not status_id:
-                    return False
-                    
-                await conn.execute(
-                    "UPDATE Application SET status_id = $1 WHERE application_id = $2",
-                    status_id, application_id
-                )
+                async with conn.transaction():
+                    application = await self._fetchrow(
+                        q.UPDATE_APPLICATION_STATUS, status_id, application_id, conn=conn
+                    )
+                    if application is None:
+                        return False
+
+                    await self._execute(
+                        q.INSERT_STATUS_LOG,
+                        application_id, application['old_status_id'], status_id, moderator_telegram_id,
+                        conn=conn
+                    )
+
+                    if comment and moderator_telegram_id is not None:
+                        await self._execute(
+                            q.INSERT_MODERATOR_MESSAGE, moderator_telegram_id, application_id, comment, conn=conn
+                        )
+
+                    await self._execute(
+                        q.INSERT_NOTIFICATION,
+                        application['telegram_id'],
+                        status_notification_text(application['title'], status_name, comment),
+                        conn=conn
+                    )
                 return True
             except Exception as e:
                 print(f"Error updating application status: {e}")
@@ -496,135 +634,84 @@ class Database:
 
     async def delete_application(self, application_id: int) -> bool:
         """Удаление заявки по ID"""
-        if self.pool is None:
-            if not await self.initialize():
-                return False
-        async with self.pool.acquire() as conn:
+        if not await self._ready():
+            return False
+        async with self._acquire("delete_application") as conn:
             async with conn.transaction():
-                await conn.execute(
-                    "DELETE FROM Messages WHERE application_id = $1",
-                    application_id
-                )
-                result = await conn.execute(
-                    "DELETE FROM Application WHERE application_id = $1",
-                    application_id
-                )
+                await self._execute(q.DELETE_APPLICATION_MESSAGES, application_id, conn=conn)
+                result = await self._execute(q.DELETE_APPLICATION, application_id, conn=conn)
             return "DELETE 1" in result
 
     async def update_olympiad_field(self, olympiad_id: int, field: str, value: str) -> bool:
         """Обновление поля олимпиады"""
-        if self.pool is None:
-            if not await self.initialize():
-                return False
-                
-        async with self.pool.acquire() as conn:
-            try:
-                # Для дат нужно преобразование
-                if field in ['start_date', 'end_date']:
-                    # Предполагаем, что value в формате ГГГГ-ММ-ДД
-                    await conn.execute(
-                        f"UPDATE Olympiad SET {field} = $1::date WHERE olympiad_id = $2",
-                        value, olympiad_id
-                    )
-                else:
-                    await conn.execute(
-                        f"UPDATE Olympiad SET {field} = $1 WHERE olympiad_id = $2",
-                        value, olympiad_id
-                    )
-                return True
-            except Exception as e:
-                print(f"Error updating olympiad field: {e}")
-                return False
+        try:
+            # Для дат нужно преобразование (value в формате ГГГГ-ММ-ДД)
+            cast = "::date" if field in ['start_date', 'end_date'] else ""
+            result = await self._execute(
+                q.UPDATE_OLYMPIAD_FIELD.format(field=field, cast=cast), value, olympiad_id
+            )
+            return result is not None
+        except Exception as e:
+            print(f"Error updating olympiad field: {e}")
+            return False
 
     async def delete_olympiad(self, olympiad_id: int) -> bool:
         """Удаление олимпиады и связанных данных"""
-        if self.pool is None:
-            if not await self.initialize():
-                return False
-        try:    
-            async with self.pool.acquire() as conn:
+        if not await self._ready():
+            return False
+        try:
+            async with self._acquire("delete_olympiad") as conn:
                 async with conn.transaction():
                     # Удаляем связанные сообщения
-                    await conn.execute(
-                        "DELETE FROM messages m USING Application a WHERE m.application_id = a.application_id AND a.olympiad_id = $1",
-                        olympiad_id
-                    )
+                    await self._execute(q.DELETE_OLYMPIAD_MESSAGES, olympiad_id, conn=conn)
 
                     # Удаляем связанные заявки
-                    await conn.execute(
-                        "DELETE FROM Application WHERE olympiad_id = $1",
-                        olympiad_id
-                    )
-                    
+                    await self._execute(q.DELETE_OLYMPIAD_APPLICATIONS, olympiad_id, conn=conn)
+
                     # Удаляем олимпиаду
-                    result = await conn.execute(
-                        "DELETE FROM Olympiad WHERE olympiad_id = $1",
-                        olympiad_id
-                    )
-                    
+                    result = await self._execute(q.DELETE_OLYMPIAD, olympiad_id, conn=conn)
+
                     # Если удалена хотя бы одна строка - успех
                     return "DELETE 1" in result
         except Exception as e:
             print(f"❌ Ошибка при удалении олимпиады: {e}")
             return False
-            
+
     async def get_full_olympiad_info(self, olympiad_id: int):
         """Получение полной информации об олимпиаде с названием дисциплины"""
-        if self.pool is None:
-            if not await self.initialize():
-                return None
-        async with self.pool.acquire() as conn:
-            return await conn.fetchrow(
-                """
-                SELECT 
-                    o.*,
-                    s.title AS subject_title
-                FROM Olympiad o
-                JOIN Subject s ON o.subject_id = s.subject_id
-                WHERE o.olympiad_id = $1
-                """,
-                olympiad_id
-            )
-    
+        return await self._fetchrow(q.GET_FULL_OLYMPIAD, olympiad_id)
+
     async def update_user_profile(self, telegram_id: int, **kwargs):
         """Обновление профиля пользователя"""
-        if self.pool is None:
-            if not await self.initialize():
-                return False
-                
-        async with self.pool.acquire() as conn:
+        if not await self._ready():
+            return False
+
+        async with self._acquire("update_user_profile") as conn:
             try:
-                user = await self.get_user(telegram_id)
+                user = await self._fetchrow(q.GET_USER, telegram_id, conn=conn)
                 if not user:
                     return False
-                    
+
                 # Обновление основных данных пользователя
                 basic_fields = ['first_name', 'last_name', 'middle_name']
                 basic_updates = {k: v for k, v in kwargs.items() if k in basic_fields}
-                
+
                 if basic_updates:
                     set_clauses = []
                     values = []
                     for key, value in basic_updates.items():
                         set_clauses.append(f"{key} = ${len(set_clauses)+1}")
                         values.append(value)
-                    
-                    query = f"""
-                        UPDATE Users
-                        SET {", ".join(set_clauses)}
-                        WHERE user_id = ${len(set_clauses)+1}
-                    """
+
                     values.append(user['user_id'])
-                    await conn.execute(query, *values)
-                
+                    query = q.UPDATE_USER.format(assignments=", ".join(set_clauses), user_param=len(values))
+                    await self._execute(query, *values, conn=conn)
+
                 # Обновление категории
                 if 'category_id' in kwargs:
-                    category_id = kwargs['category_id']
-                    await conn.execute(
-                        "UPDATE UserCategory SET category_id = $1 WHERE user_id = $2",
-                        category_id, user['user_id']
-                    )
+                    await self._execute(q.UPDATE_USER_CATEGORY, kwargs['category_id'], user['user_id'], conn=conn)
 
+                self.invalidate_profile_cache(telegram_id)
                 return True
             except Exception as e:
                 print(f"Error updating user profile: {e}")
@@ -632,12 +719,10 @@ class Database:
 
     async def get_categories(self):
         """Получение всех категорий"""
-        if self.pool is None:
-            if not await self.initialize():
-                return []
-        async with self.pool.acquire() as conn:
-            return await conn.fetch("SELECT * FROM Category ORDER BY category_name")
-        
+        if not await self._ready():
+            return []
+        return list(self.reference.categories)
+
     # Сообщения для заявок
     async def create_message(
         self,
@@ -646,100 +731,154 @@ class Database:
         message_text: str
     ) -> bool:
         """Создание нового сообщения по заявке"""
-        if self.pool is None:
-            if not await self.initialize():
-                return False
-                
-        async with self.pool.acquire() as conn:
-            try:
-                await conn.execute(
-                    """
-                    INSERT INTO Messages (user_id, application_id, message_text)
-                    VALUES ($1, $2, $3)
-                    """,
-                    user_id, application_id, message_text
-                )
-                return True
-            except Exception as e:
-                print(f"Error creating message: {e}")
-                return False
-            
+        try:
+            result = await self._execute(q.INSERT_MESSAGE, user_id, application_id, message_text)
+            return result is not None
+        except Exception as e:
+            print(f"Error creating message: {e}")
+            return False
+
     async def get_application_messages(self, application_id: int):
         """Получение сообщения по заявке"""
-        if self.pool is None:
-            if not await self.initialize():
-                return []
-                
-        async with self.pool.acquire() as conn:
-            return await conn.fetch(
-                """
-                SELECT m.*, u.first_name, u.last_name 
-                FROM Messages m
-                JOIN Users u ON m.user_id = u.user_id
-                WHERE application_id = $1
-                ORDER BY sent_date DESC
-                """,
-                application_id
-            )
+        return await self._fetch(q.GET_APPLICATION_MESSAGES, application_id)
+
     async def delete_application_messages(self, application_id: int, user_id: int) -> bool:
         """Удаляет все сообщения по заявке от конкретного пользователя"""
-        if self.pool is None:
-            if not await self.initialize():
-                return False
-                
-        async with self.pool.acquire() as conn:
-            try:
-                await conn.execute(
-                    "DELETE FROM Messages WHERE application_id = $1 AND user_id = $2",
-                    application_id, user_id
-                )
-                return True
-            except Exception as e:
-                print(f"Error deleting messages: {e}")
-                return False
-
+        try:
+            result = await self._execute(q.DELETE_USER_APPLICATION_MESSAGES, application_id, user_id)
+            return result is not None
+        except Exception as e:
+            print(f"Error deleting messages: {e}")
+            return False
 
     async def get_user_applications(self, user_id: int):
         """Получение заявок пользователя"""
-        if self.pool is None:
-            if not await self.initialize():
-                return []
-                
-        async with self.pool.acquire() as conn:
-            return await conn.fetch(
-                """
-                SELECT 
-                    a.application_id,
-                    o.title AS olympiad_title,
-                    s.status_name,
-                    a.created_date
-                FROM Application a
-                JOIN Olympiad o ON a.olympiad_id = o.olympiad_id
-                JOIN ApplicationStatus s ON a.status_id = s.status_id
-                WHERE a.user_id = $1
-                ORDER BY a.created_date DESC
-                """,
-                user_id
-            )
+        return await self._fetch(q.GET_USER_APPLICATIONS, user_id)
 
     async def get_application_moderator_message(self, application_id: int):
         """Получение сообщения модератора для заявки"""
-        if self.pool is None:
-            if not await self.initialize():
+        if not await self._ready():
+            return None
+        return await self._fetchrow(q.GET_MODERATOR_MESSAGE, application_id, self._staff_role_ids())
+
+    # Сводные отчеты
+    async def get_data_version(self, scope: str) -> Optional[str]:
+        """Текущая версия данных области (меняется при любом изменении ее таблиц)"""
+        return await self._fetchval(q.DATA_VERSIONS[scope])
+
+    async def _versioned_report(self, scope: str, query: Query, *args) -> Optional[Tuple[Optional[str], List]]:
+        """Выполнение отчета вместе с версией данных, на которых он построен"""
+        if not await self._ready():
+            return None
+        async with self._acquire(query.name) as conn:
+            try:
+                # Версия и данные читаются из одного снимка - кэш не получит устаревший результат
+                async with conn.transaction(isolation='repeatable_read', readonly=True):
+                    version = await self._fetchval(q.DATA_VERSIONS[scope], conn=conn)
+                    return version, await self._fetch(query, *args, conn=conn)
+            except Exception as e:
+                print(f"❌ Ошибка построения отчета: {e}")
                 return None
-                
-        async with self.pool.acquire() as conn:
-            return await conn.fetchrow(
-                """
-                SELECT m.message_text
-                FROM Messages m
-                JOIN Users u ON m.user_id = u.user_id
-                JOIN UserRole ur ON ur.user_id = u.user_id
-                JOIN Role r ON r.role_id = ur.role_id
-                WHERE m.application_id = $1 
-                AND r.role_name IN ('Модератор', 'Администратор')
-                ORDER BY m.sent_date DESC
-                LIMIT 1
-                """,
-                application_id
-            )
\ No newline at end of file
+
+    async def get_applications_by_olympiad_report(self):
+        """Число заявок по олимпиадам в разрезе статусов"""
+        return await self._versioned_report(
+            "applications",
+            q.APPLICATIONS_BY_OLYMPIAD_REPORT,
+            self.reference.status_ids.get('Рассмотрение'),
+            self.reference.status_ids.get('Одобрена'),
+            self.reference.status_ids.get('Отклонена')
+        )
+
+    async def get_applications_by_status_report(self):
+        """Число заявок по статусам"""
+        return await self._versioned_report("applications", q.APPLICATIONS_BY_STATUS_REPORT)
+
+    async def get_users_by_category_report(self):
+        """Число участников по категориям"""
+        return await self._versioned_report("users", q.USERS_BY_CATEGORY_REPORT)
+
+    # Очередь уведомлений
+    async def claim_notifications(self, limit: int, lease_seconds: float) -> List[asyncpg.Record]:
+        """Захват пачки уведомлений к отправке.
+
+        Захваченные строки откладываются на lease_seconds: если процесс упадет
+        до отметки об отправке, их подхватит следующий проход. SKIP LOCKED
+        позволяет нескольким отправителям не мешать друг другу.
+        """
+        return await self._fetch(q.CLAIM_NOTIFICATIONS, limit, lease_seconds)
+
+    async def mark_notifications_sent(self, notification_ids: List[int]) -> None:
+        """Отметка об успешной отправке"""
+        if not notification_ids:
+            return
+        await self._execute(q.MARK_NOTIFICATIONS_SENT, notification_ids)
+
+    async def reschedule_notification(self, notification_id: int, delay_seconds: float, error: str) -> None:
+        """Повторная попытка отправки через delay_seconds"""
+        await self._execute(q.RESCHEDULE_NOTIFICATION, notification_id, delay_seconds, error)
+
+    async def fail_notification(self, notification_id: int, error: str) -> None:
+        """Окончательный отказ от отправки (бот заблокирован, чат не найден и т.п.)"""
+        await self._execute(q.FAIL_NOTIFICATION, notification_id, error)
+
+    # Рассылки
+    async def count_broadcast_recipients(self, olympiad_id: int, status_id: Optional[int] = None) -> int:
+        """Число получателей рассылки по олимпиаде (status_id - только заявки в этом статусе)"""
+        return await self._fetchval(q.COUNT_BROADCAST_RECIPIENTS, olympiad_id, status_id) or 0
+
+    async def create_broadcast(
+        self,
+        olympiad_id: int,
+        status_id: Optional[int],
+        message_text: str,
+        creator_telegram_id: int,
+        chat_id: int
+    ) -> Optional[asyncpg.Record]:
+        """Создание рассылки, возвращает ее строку (None - ошибка)"""
+        try:
+            return await self._fetchrow(
+                q.INSERT_BROADCAST, olympiad_id, status_id, message_text, creator_telegram_id, chat_id
+            )
+        except Exception as e:
+            print(f"❌ Ошибка создания рассылки: {e}")
+            return None
+
+    async def set_broadcast_progress_message(self, broadcast_id: int, message_id: int) -> None:
+        """Сообщение, в котором показывается прогресс рассылки"""
+        await self._execute(q.SET_BROADCAST_PROGRESS_MESSAGE, broadcast_id, message_id)
+
+    async def get_unclaimed_broadcast_ids(self) -> List[int]:
+        """Незавершенные рассылки, которые сейчас никто не выполняет"""
+        return [row['broadcast_id'] for row in await self._fetch(q.GET_UNCLAIMED_BROADCASTS)]
+
+    async def claim_broadcast(self, broadcast_id: int, lease_seconds: float) -> Optional[asyncpg.Record]:
+        """Захват рассылки на lease_seconds (None - ее уже выполняет другой процесс или она завершена)"""
+        return await self._fetchrow(q.CLAIM_BROADCAST, broadcast_id, lease_seconds)
+
+    async def get_broadcast_recipients(
+        self,
+        olympiad_id: int,
+        status_id: Optional[int],
+        after_user_id: int,
+        limit: int
+    ) -> List[asyncpg.Record]:
+        """Следующая пачка получателей после контрольной точки (по возрастанию user_id)"""
+        return await self._fetch(q.GET_BROADCAST_RECIPIENTS, olympiad_id, status_id, after_user_id, limit)
+
+    async def save_broadcast_checkpoint(
+        self,
+        broadcast_id: int,
+        last_user_id: int,
+        sent: int,
+        failed: int,
+        lease_seconds: float
+    ) -> Optional[str]:
+        """Сохранение прогресса с продлением захвата, возвращает состояние рассылки"""
+        return await self._fetchval(
+            q.SAVE_BROADCAST_CHECKPOINT, broadcast_id, last_user_id, sent, failed, lease_seconds
+        )
+
+    async def finish_broadcast(self, broadcast_id: int, state: str = 'done') -> bool:
+        """Завершение рассылки (done) или ее остановка (cancelled)"""
+        return await self._execute(q.FINISH_BROADCAST, broadcast_id, state) == "UPDATE 1"
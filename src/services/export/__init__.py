@@ -0,0 +1,25 @@
+from .base import ReportExporter, build_report
+from .excel import ExcelReportExporter
+from .csv_file import CsvReportExporter, GzipCsvReportExporter
+from .parquet import ParquetReportExporter, parquet_available
+from .cache import ExportCache, ExportCacheEntry
+
+# Доступные форматы выгрузки по расширению файла (порядок - порядок кнопок)
+EXPORTERS = {
+    exporter.extension: exporter
+    for exporter in (ExcelReportExporter, CsvReportExporter, GzipCsvReportExporter)
+}
+if parquet_available():
+    EXPORTERS[ParquetReportExporter.extension] = ParquetReportExporter
+
+__all__ = [
+    'EXPORTERS',
+    'ReportExporter',
+    'ExcelReportExporter',
+    'CsvReportExporter',
+    'GzipCsvReportExporter',
+    'ParquetReportExporter',
+    'build_report',
+    'ExportCache',
+    'ExportCacheEntry'
+]
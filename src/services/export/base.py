@@ -0,0 +1,63 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Type
+
+# Генерация файлов синхронная, поэтому отчеты строятся в отдельном пуле потоков
+# ограниченного размера: обработка апдейтов не блокируется, а одновременных
+# выгрузок не больше EXPORT__MAX_WORKERS (остальные ждут в очереди)
+EXPORT_MAX_WORKERS = int(os.getenv("EXPORT__MAX_WORKERS", 2))
+_executor = ThreadPoolExecutor(max_workers=EXPORT_MAX_WORKERS, thread_name_prefix="report-export")
+# Каждая выгрузка держит соединение с БД, пока читает курсор, - их число тоже ограничиваем
+_export_slots = asyncio.Semaphore(EXPORT_MAX_WORKERS)
+
+# Поля заявки в порядке столбцов отчета
+REPORT_FIELDS = ["application_id", "last_name", "first_name", "middle_name", "status_name", "created_date"]
+
+class ReportExporter(ABC):
+    """Базовый класс выгрузки отчета по заявкам на олимпиаду.
+
+    Заявки поступают пачками в append, содержимое файла возвращает finish.
+    Оба метода вызываются в пуле потоков и могут быть синхронными;
+    выгрузка без них не создается (ошибка при создании экземпляра).
+    """
+
+    # Расширение файла и подпись кнопки выбора формата
+    extension = ""
+    title = ""
+    # Нужны ли максимальные длины полей (Database.get_olympiad_report_widths)
+    needs_widths = False
+
+    def __init__(self, olympiad, widths: Dict[str, int]):
+        self.olympiad = olympiad
+        self.count = 0
+
+    @abstractmethod
+    def append(self, applications: List) -> None:
+        """Запись очередной пачки заявок"""
+
+    @abstractmethod
+    def finish(self) -> bytes:
+        """Завершение записи, возвращает содержимое файла"""
+
+    @classmethod
+    def filename(cls, olympiad) -> str:
+        """Имя файла отчета по олимпиаде"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"report_olympiad_{olympiad['olympiad_id']}_{timestamp}.{cls.extension}"
+
+async def build_report(
+    exporter_cls: Type[ReportExporter],
+    olympiad,
+    batches: AsyncIterator[List],
+    widths: Dict[str, int]
+) -> bytes:
+    """Генерация отчета: пачки из курсора БД пишутся в пуле потоков, не блокируя цикл событий"""
+    loop = asyncio.get_running_loop()
+    async with _export_slots:
+        exporter = await loop.run_in_executor(_executor, exporter_cls, olympiad, widths)
+        async for batch in batches:
+            await loop.run_in_executor(_executor, exporter.append, batch)
+        return await loop.run_in_executor(_executor, exporter.finish)
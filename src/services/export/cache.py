@@ -0,0 +1,61 @@
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+from services.cache import TTLCache
+
+class ExportCacheEntry:
+    """Готовая выгрузка: содержимое файла до первой отправки, затем file_id Telegram"""
+
+    def __init__(self, filename: str, caption: str, content: bytes):
+        self.filename = filename
+        self.caption = caption
+        self.content: Optional[bytes] = content
+        self.file_id: Optional[str] = None
+
+class ExportCache:
+    """Кэш выгрузок по ключу (олимпиада, формат, версия данных олимпиады).
+
+    Версию повышают триггеры при любом изменении заявок, сообщений, участников
+    или самой олимпиады, поэтому устаревшие записи просто перестают запрашиваться
+    и вытесняются по TTL. Одновременные запросы одной выгрузки ждут общую генерацию.
+    """
+
+    def __init__(self):
+        self._entries = TTLCache(
+            ttl=float(os.getenv("EXPORT__CACHE_TTL", 3600)),
+            max_size=int(os.getenv("EXPORT__CACHE_SIZE", 50))
+        )
+        self._building: Dict[Hashable, asyncio.Task] = {}
+
+    def get(self, key: Hashable) -> Optional[ExportCacheEntry]:
+        """Готовая выгрузка или None"""
+        return self._entries.get(key)
+
+    async def get_or_build(
+        self,
+        key: Hashable,
+        build: Callable[[], Awaitable[ExportCacheEntry]]
+    ) -> ExportCacheEntry:
+        """Готовая выгрузка из кэша или результат (общей) генерации"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        task = self._building.get(key)
+        if task is None:
+            task = asyncio.create_task(self._build(key, build))
+            self._building[key] = task
+            task.add_done_callback(lambda _: self._building.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _build(self, key: Hashable, build: Callable[[], Awaitable[ExportCacheEntry]]) -> ExportCacheEntry:
+        entry = await build()
+        self._entries.set(key, entry)
+        return entry
+
+    def remember_file_id(self, key: Hashable, file_id: str) -> None:
+        """После первой отправки файл переиспользуется по file_id - байты больше не нужны"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.file_id = file_id
+            entry.content = None
@@ -0,0 +1,58 @@
+import csv
+import gzip
+import io
+from typing import Dict, List
+from .base import ReportExporter, REPORT_FIELDS
+
+class CsvReportExporter(ReportExporter):
+    """Выгрузка в CSV для загрузки в аналитические пайплайны.
+
+    Заголовки - имена полей, даты - в ISO 8601, кодировка UTF-8 без BOM.
+    """
+
+    extension = "csv"
+    title = "CSV"
+
+    def __init__(self, olympiad, widths: Dict[str, int]):
+        super().__init__(olympiad, widths)
+        self.buffer = io.BytesIO()
+        self.stream = io.TextIOWrapper(self._open(self.buffer), encoding="utf-8", newline="")
+        self.writer = csv.writer(self.stream)
+        self.writer.writerow(["olympiad_id", *REPORT_FIELDS])
+
+    def _open(self, buffer: io.BytesIO):
+        """Поток, в который пишется CSV"""
+        return buffer
+
+    def append(self, applications: List) -> None:
+        olympiad_id = self.olympiad['olympiad_id']
+        self.writer.writerows(
+            [
+                olympiad_id,
+                app['application_id'],
+                app['last_name'],
+                app['first_name'],
+                app['middle_name'],
+                app['status_name'],
+                app['created_date'].isoformat()
+            ]
+            for app in applications
+        )
+        self.count += len(applications)
+
+    def finish(self) -> bytes:
+        self.stream.flush()
+        raw = self.stream.detach()
+        # Сжатый поток нужно закрыть, чтобы дописать хвост gzip (сам буфер остается открытым)
+        if raw is not self.buffer:
+            raw.close()
+        return self.buffer.getvalue()
+
+class GzipCsvReportExporter(CsvReportExporter):
+    """Выгрузка в CSV, сжатый gzip по мере записи"""
+
+    extension = "csv.gz"
+    title = "CSV (gzip)"
+
+    def _open(self, buffer: io.BytesIO):
+        return gzip.GzipFile(fileobj=buffer, mode="wb")
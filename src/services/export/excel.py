@@ -0,0 +1,109 @@
+import openpyxl
+from io import BytesIO
+from typing import Dict, List
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
+from .base import ReportExporter
+
+# Заголовки таблицы заявок
+REPORT_HEADERS = [
+    "ID заявки",
+    "Фамилия",
+    "Имя",
+    "Отчество",
+    "Статус",
+    "Дата подачи"
+]
+
+# Поля заявки, по которым БД заранее считает максимальную длину значений
+REPORT_WIDTH_FIELDS = ["application_id", "last_name", "first_name", "middle_name", "status_name"]
+
+DATE_TIME_FORMAT = "%d.%m.%Y %H:%M"
+
+class ExcelReportExporter(ReportExporter):
+    """Потоковая запись Excel-отчета по заявкам на олимпиаду.
+
+    Книга открывается в режиме write-only: строки сразу уходят во временный
+    файл openpyxl, поэтому память не растет с числом заявок. Ширины столбцов
+    такой лист записывает перед первой строкой, поэтому они передаются заранее.
+    """
+
+    extension = "xlsx"
+    title = "Excel"
+    needs_widths = True
+
+    def __init__(self, olympiad, widths: Dict[str, int]):
+        super().__init__(olympiad, widths)
+        self.wb = openpyxl.Workbook(write_only=True)
+        self.ws = self.wb.create_sheet("Заявки")
+
+        info = [
+            ["Организатор:", olympiad['organizer']],
+            ["Дисциплина:", olympiad['subject_title']],
+            ["Дата начала:", olympiad['start_date'].strftime("%d.%m.%Y")],
+            ["Дата окончания:", olympiad['end_date'].strftime("%d.%m.%Y")]
+        ]
+
+        # Ширина столбца - по самому длинному значению: шапка, заголовки и данные из БД
+        lengths = [len(header) for header in REPORT_HEADERS]
+        for row in info:
+            for col, value in enumerate(row):
+                lengths[col] = max(lengths[col], len(str(value)))
+        for col, field in enumerate(REPORT_WIDTH_FIELDS):
+            lengths[col] = max(lengths[col], widths.get(field) or 0)
+        lengths[5] = max(lengths[5], len(DATE_TIME_FORMAT.replace("%Y", "0000")))
+        for col, length in enumerate(lengths, start=1):
+            self.ws.column_dimensions[get_column_letter(col)].width = (length + 2) * 1.2
+
+        # Заголовок отчета
+        title_cell = WriteOnlyCell(self.ws, value=f"Отчет по заявкам на олимпиаду: {olympiad['title']}")
+        title_cell.font = Font(bold=True, size=16)
+        title_cell.alignment = Alignment(horizontal='center')
+        self.ws.append([title_cell])
+        self.ws.merged_cells.add('A1:F1')
+
+        # Информация об олимпиаде
+        for row in info:
+            self.ws.append(row)
+        self.ws.append([])
+
+        # Заголовки таблицы заявок
+        header_font = Font(bold=True)
+        header_alignment = Alignment(horizontal='center')
+        border = Border(bottom=Side(style='medium'))
+        header_cells = []
+        for header in REPORT_HEADERS:
+            cell = WriteOnlyCell(self.ws, value=header)
+            cell.font = header_font
+            cell.alignment = header_alignment
+            cell.border = border
+            header_cells.append(cell)
+        self.ws.append(header_cells)
+        self.rows_written = 7
+
+    def append(self, applications: List) -> None:
+        for app in applications:
+            self.ws.append([
+                app['application_id'],
+                app['last_name'],
+                app['first_name'],
+                app['middle_name'] or '',
+                app['status_name'],
+                app['created_date'].strftime(DATE_TIME_FORMAT)
+            ])
+        self.count += len(applications)
+        self.rows_written += len(applications)
+
+    def finish(self) -> bytes:
+        # Итоговая строка
+        last_row = self.rows_written + 1
+        total_cell = WriteOnlyCell(self.ws, value=f"Всего заявок: {self.count}")
+        total_cell.font = Font(bold=True)
+        self.ws.append([total_cell])
+        self.ws.merged_cells.add(f'A{last_row}:D{last_row}')
+
+        # Сохраняем в память - временные файлы на диске не нужны
+        buffer = BytesIO()
+        self.wb.save(buffer)
+        return buffer.getvalue()
@@ -0,0 +1,43 @@
+from typing import Dict, List
+from .base import ReportExporter, REPORT_FIELDS
+
+# pyarrow - необязательная зависимость: без нее формат Parquet просто недоступен
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+def parquet_available() -> bool:
+    """Установлен ли pyarrow"""
+    return pa is not None
+
+class ParquetReportExporter(ReportExporter):
+    """Выгрузка в Parquet: каждая пачка заявок записывается отдельной группой строк"""
+
+    extension = "parquet"
+    title = "Parquet"
+
+    def __init__(self, olympiad, widths: Dict[str, int]):
+        super().__init__(olympiad, widths)
+        self.schema = pa.schema([
+            ("olympiad_id", pa.int32()),
+            ("application_id", pa.int32()),
+            ("last_name", pa.string()),
+            ("first_name", pa.string()),
+            ("middle_name", pa.string()),
+            ("status_name", pa.string()),
+            ("created_date", pa.timestamp("us"))
+        ])
+        self.sink = pa.BufferOutputStream()
+        self.writer = pq.ParquetWriter(self.sink, self.schema, compression="zstd")
+
+    def append(self, applications: List) -> None:
+        columns = {field: [app[field] for app in applications] for field in REPORT_FIELDS}
+        columns["olympiad_id"] = [self.olympiad['olympiad_id']] * len(applications)
+        self.writer.write_table(pa.Table.from_pydict(columns, schema=self.schema))
+        self.count += len(applications)
+
+    def finish(self) -> bytes:
+        self.writer.close()
+        return self.sink.getvalue().to_pybytes()
@@ -0,0 +1,224 @@
+import os
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from aiohttp import web
+
+# Границы корзин гистограмм в секундах
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Границы корзин для числа обращений к БД за апдейт
+ROUND_TRIP_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21)
+
+# Кто сейчас обращается к БД: хендлер апдейта или фоновая задача.
+# Выставляется DatabaseMetricsMiddleware на время обработки апдейта
+current_handler: ContextVar[str] = ContextVar("current_handler", default="background")
+
+class RoundTrips:
+    """Обращения к БД за один апдейт: выполненные запросы и получения соединения из пула"""
+
+    def __init__(self):
+        self.handler: Optional[str] = None
+        self.queries: List[str] = []
+        self.acquisitions = 0
+
+# Счетчик текущего апдейта (None - обращения не считаются).
+# Создается DatabaseMetricsMiddleware или заранее тем, кто подает апдейт (tools/query_budget.py)
+current_round_trips: ContextVar[Optional[RoundTrips]] = ContextVar("current_round_trips", default=None)
+
+class Histogram:
+    """Гистограмма длительностей с фиксированными корзинами"""
+
+    def __init__(self, bounds: Tuple[float, ...] = BUCKETS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def lines(self, metric: str, labels: str) -> List[str]:
+        """Строки гистограммы в текстовом формате Prometheus (корзины накопительные)"""
+        lines = []
+        total = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.buckets):
+            total += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {total}')
+        lines.append(f"{metric}_sum{{{labels}}} {self.sum:.6f}")
+        lines.append(f"{metric}_count{{{labels}}} {self.count}")
+        return lines
+
+def redact(args: Iterable) -> str:
+    """Параметры запроса без значений: только типы (и размер для строк и списков)"""
+    parts = []
+    for value in args:
+        if isinstance(value, (str, bytes, list, tuple)):
+            parts.append(f"<{type(value).__name__}:{len(value)}>")
+        else:
+            parts.append(f"<{type(value).__name__}>")
+    return ", ".join(parts)
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class QueryMetrics:
+    """Метрики запросов Database.
+
+    По каждому именованному запросу (services/queries.py) отдельно копятся
+    ожидание соединения в пуле и время выполнения, плюс число ошибок.
+    Время выполнения дополнительно суммируется по хендлерам, чтобы было
+    видно, какие сценарии бота нагружают БД. Запросы дольше порога
+    пишутся в лог без значений параметров.
+    """
+
+    def __init__(self, slow_query_ms: Optional[float] = None):
+        if slow_query_ms is None:
+            slow_query_ms = float(os.getenv("DB__SLOW_QUERY_MS", 200))
+        # 0 - лог медленных запросов выключен
+        self.slow_query_seconds = slow_query_ms / 1000 if slow_query_ms > 0 else None
+        self.wait: Dict[str, Histogram] = {}
+        self.duration: Dict[str, Histogram] = {}
+        self.errors: Dict[str, int] = {}
+        self.slow: Dict[str, int] = {}
+        self.handlers: Dict[str, Tuple[int, float]] = {}
+        self.update_queries: Dict[str, Histogram] = {}
+        self.update_acquisitions: Dict[str, Histogram] = {}
+
+    def observe_wait(self, name: str, seconds: float) -> None:
+        """Ожидание свободного соединения в пуле"""
+        self.wait.setdefault(name, Histogram()).observe(seconds)
+        round_trips = current_round_trips.get()
+        if round_trips is not None:
+            round_trips.acquisitions += 1
+
+    def observe_query(self, name: str, seconds: float, args: tuple, failed: bool = False) -> None:
+        """Выполнение запроса (без ожидания пула)"""
+        self.duration.setdefault(name, Histogram()).observe(seconds)
+        if failed:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+        round_trips = current_round_trips.get()
+        if round_trips is not None:
+            round_trips.queries.append(name)
+
+        handler = current_handler.get()
+        count, total = self.handlers.get(handler, (0, 0.0))
+        self.handlers[handler] = (count + 1, total + seconds)
+
+        if self.slow_query_seconds is not None and seconds >= self.slow_query_seconds:
+            self.slow[name] = self.slow.get(name, 0) + 1
+            print(
+                f"🐢 Медленный запрос {name} ({handler}): {seconds * 1000:.0f} мс, "
+                f"параметры: [{redact(args)}]"
+            )
+
+    def observe_round_trips(self, round_trips: RoundTrips) -> None:
+        """Число запросов и получений соединения за обработанный апдейт"""
+        handler = round_trips.handler or "unhandled"
+        self.update_queries.setdefault(handler, Histogram(ROUND_TRIP_BUCKETS)).observe(len(round_trips.queries))
+        self.update_acquisitions.setdefault(handler, Histogram(ROUND_TRIP_BUCKETS)).observe(round_trips.acquisitions)
+
+    def wait_totals(self) -> Tuple[int, float]:
+        """Общее число ожиданий пула и их суммарное время"""
+        return (
+            sum(h.count for h in self.wait.values()),
+            sum(h.sum for h in self.wait.values())
+        )
+
+    def render(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        lines = [
+            "# HELP db_pool_wait_seconds Ожидание соединения из пула",
+            "# TYPE db_pool_wait_seconds histogram",
+        ]
+        for name, histogram in sorted(self.wait.items()):
+            lines.extend(histogram.lines("db_pool_wait_seconds", f'query="{_label(name)}"'))
+
+        lines += [
+            "# HELP db_query_duration_seconds Время выполнения запроса",
+            "# TYPE db_query_duration_seconds histogram",
+        ]
+        for name, histogram in sorted(self.duration.items()):
+            lines.extend(histogram.lines("db_query_duration_seconds", f'query="{_label(name)}"'))
+
+        lines += [
+            "# HELP db_query_errors_total Запросы, завершившиеся ошибкой",
+            "# TYPE db_query_errors_total counter",
+        ]
+        lines += [f'db_query_errors_total{{query="{_label(name)}"}} {count}' for name, count in sorted(self.errors.items())]
+
+        lines += [
+            "# HELP db_slow_queries_total Запросы дольше DB__SLOW_QUERY_MS",
+            "# TYPE db_slow_queries_total counter",
+        ]
+        lines += [f'db_slow_queries_total{{query="{_label(name)}"}} {count}' for name, count in sorted(self.slow.items())]
+
+        lines += [
+            "# HELP db_handler_queries_total Запросы к БД по хендлерам",
+            "# TYPE db_handler_queries_total counter",
+        ]
+        lines += [
+            f'db_handler_queries_total{{handler="{_label(name)}"}} {count}'
+            for name, (count, _) in sorted(self.handlers.items())
+        ]
+        lines += [
+            "# HELP db_handler_seconds_total Время выполнения запросов по хендлерам",
+            "# TYPE db_handler_seconds_total counter",
+        ]
+        lines += [
+            f'db_handler_seconds_total{{handler="{_label(name)}"}} {total:.6f}'
+            for name, (_, total) in sorted(self.handlers.items())
+        ]
+
+        lines += [
+            "# HELP db_update_queries Запросы к БД за один апдейт",
+            "# TYPE db_update_queries histogram",
+        ]
+        for name, histogram in sorted(self.update_queries.items()):
+            lines.extend(histogram.lines("db_update_queries", f'handler="{_label(name)}"'))
+        lines += [
+            "# HELP db_update_acquisitions Получения соединения из пула за один апдейт",
+            "# TYPE db_update_acquisitions histogram",
+        ]
+        for name, histogram in sorted(self.update_acquisitions.items()):
+            lines.extend(histogram.lines("db_update_acquisitions", f'handler="{_label(name)}"'))
+
+        for name, value in sorted((gauges or {}).items()):
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+def pool_gauges(stats: dict) -> Dict[str, float]:
+    """Числовые показатели Database.pool_stats для /metrics"""
+    gauges = {
+        "db_pool_connected": int(stats["connected"]),
+        "db_circuit_open": int(stats["circuit"] != "closed"),
+    }
+    for key in ("size", "idle", "in_use", "max_size", "utilization"):
+        if key in stats:
+            gauges[f"db_pool_{key}"] = stats[key]
+    return gauges
+
+def metrics_handler(metrics: QueryMetrics, stats: Optional[Callable[[], dict]] = None):
+    """aiohttp-обработчик /metrics (stats - источник состояния пула)"""
+    async def handle(request: web.Request) -> web.Response:
+        gauges = pool_gauges(stats()) if stats else None
+        return web.Response(text=metrics.render(gauges), content_type="text/plain", charset="utf-8")
+    return handle
+
+async def start_metrics_server(
+    metrics: QueryMetrics,
+    host: str,
+    port: int,
+    stats: Optional[Callable[[], dict]] = None
+) -> web.AppRunner:
+    """Отдельный HTTP-сервер с /metrics (для режима polling, где нет своего веб-приложения)"""
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler(metrics, stats))
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host=host, port=port).start()
+    return runner
@@ -0,0 +1,19 @@
+from html import escape
+from typing import Optional
+
+# Значки статусов заявки в уведомлениях
+STATUS_ICONS = {
+    "Рассмотрение": "🟡",
+    "Одобрена": "🟢",
+    "Отклонена": "🔴"
+}
+
+def status_notification_text(olympiad_title: str, status_name: str, comment: Optional[str] = None) -> str:
+    """Текст уведомления участнику об изменении статуса заявки (HTML)"""
+    text = (
+        f"🔔 Статус вашей заявки на олимпиаду «{escape(olympiad_title)}» изменен:\n"
+        f"{STATUS_ICONS.get(status_name, '🔄')} {status_name}"
+    )
+    if comment:
+        text += f"\n\n💬 Комментарий модератора: {escape(comment)}"
+    return text
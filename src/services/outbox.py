@@ -0,0 +1,78 @@
+import asyncio
+import os
+from typing import Optional
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from services.database import Database
+from services.rate_limit import TelegramRateLimiter
+
+class OutboxSender:
+    """Фоновая отправка уведомлений из NotificationOutbox с учетом ограничений Telegram"""
+
+    def __init__(self, bot: Bot, db: Database, limiter: Optional[TelegramRateLimiter] = None):
+        self.bot = bot
+        self.db = db
+        self.limiter = limiter or TelegramRateLimiter(
+            global_rate=float(os.getenv("OUTBOX__GLOBAL_RATE", 30)),
+            chat_interval=float(os.getenv("OUTBOX__CHAT_INTERVAL", 1))
+        )
+        self.batch_size = int(os.getenv("OUTBOX__BATCH_SIZE", 100))
+        self.poll_interval = float(os.getenv("OUTBOX__POLL_INTERVAL", 1))
+        self.max_attempts = int(os.getenv("OUTBOX__MAX_ATTEMPTS", 5))
+        # Время, на которое захваченная пачка скрыта от других отправителей
+        self.lease_seconds = float(os.getenv("OUTBOX__LEASE", 300))
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Запуск отправителя (хук startup диспетчера)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Остановка отправителя (хук shutdown диспетчера)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self) -> None:
+        """Основной цикл: забираем пачку, отправляем, отмечаем отправленные"""
+        while True:
+            try:
+                batch = await self.db.claim_notifications(self.batch_size, self.lease_seconds)
+                if not batch:
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+
+                # Темп задает ограничитель, поэтому пачка отправляется параллельно
+                results = await asyncio.gather(*(self._send(notification) for notification in batch))
+                await self.db.mark_notifications_sent([
+                    notification['notification_id']
+                    for notification, sent in zip(batch, results) if sent
+                ])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Ошибка отправки уведомлений: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _send(self, notification) -> bool:
+        """Отправка одного уведомления, True - доставлено"""
+        try:
+            await self.limiter.send_message(self.bot, notification['chat_id'], notification['message_text'])
+            return True
+        except (TelegramForbiddenError, TelegramBadRequest) as e:
+            # Бот заблокирован или чат недоступен - повторять бессмысленно
+            await self.db.fail_notification(notification['notification_id'], str(e))
+            return False
+        except Exception as e:
+            if notification['attempts'] >= self.max_attempts:
+                await self.db.fail_notification(notification['notification_id'], str(e))
+            else:
+                # Экспоненциальная задержка: 10 с, 20 с, 40 с...
+                delay = min(10 * 2 ** (notification['attempts'] - 1), 3600)
+                await self.db.reschedule_notification(notification['notification_id'], delay, str(e))
+            return False
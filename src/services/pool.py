@@ -0,0 +1,113 @@
+import asyncio
+import os
+import random
+import time
+from typing import Optional
+import asyncpg
+
+# Ошибки, означающие недоступность БД (а не ошибку в самом запросе).
+# TimeoutError подключения - подкласс OSError
+CONNECTION_ERRORS = (
+    OSError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.ConnectionDoesNotExistError,
+    asyncpg.CannotConnectNowError,
+    asyncpg.AdminShutdownError,
+)
+
+class CircuitBreaker:
+    """Предохранитель для обращений к БД.
+
+    После threshold ошибок подряд размыкается, и методы Database сразу
+    возвращают запасное значение, не дожидаясь таймаутов. Через reset_timeout
+    пропускает одну пробную попытку: успех замыкает цепь, ошибка снова размыкает.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int = 3, reset_timeout: float = 30):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != self.CLOSED
+
+    def allow(self) -> bool:
+        """Можно ли сейчас обращаться к БД"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            # Пропускаем одну пробную попытку, остальные ждут ее результата
+            self.state = self.HALF_OPEN
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            self.trip()
+
+    def trip(self) -> None:
+        """Разомкнуть цепь немедленно"""
+        if self.state != self.OPEN:
+            print("🔌 БД недоступна, запросы временно не выполняются")
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+
+class PoolSupervisor:
+    """Фоновый контроль подключения к БД.
+
+    Пока пула нет, пытается создать его с экспоненциальной задержкой,
+    пока пул есть - периодически проверяет БД. Хендлеры в это время
+    не подключаются сами, а сразу получают запасные значения.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.health_interval = float(os.getenv("DB__HEALTH_INTERVAL", 15))
+        self.min_delay = float(os.getenv("DB__RECONNECT_MIN_DELAY", 1))
+        self.max_delay = float(os.getenv("DB__RECONNECT_MAX_DELAY", 60))
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self) -> None:
+        delay = self.min_delay
+        while True:
+            if await self._check():
+                delay = self.min_delay
+                await asyncio.sleep(self.health_interval)
+            else:
+                # Случайный разброс, чтобы реплики не переподключались одновременно
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+                delay = min(delay * 2, self.max_delay)
+
+    async def _check(self) -> bool:
+        try:
+            if self.db.pool is None:
+                return await self.db.initialize()
+            return await self.db.ping()
+        except Exception as e:
+            print(f"❌ Ошибка проверки подключения к БД: {e}")
+            return False
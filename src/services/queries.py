@@ -0,0 +1,552 @@
+"""SQL-запросы Database.
+
+Каждый запрос объявлен здесь один раз под своим именем. Database выполняет их
+через общие помощники (_fetch, _fetchrow, _fetchval, _execute), а asyncpg
+готовит каждый текст запроса один раз на соединение (кэш подготовленных
+выражений настраивается в Database.initialize).
+"""
+from typing import Dict
+
+
+class Query:
+    """Именованный SQL-запрос.
+
+    Шаблоны с частями, которые зависят от фильтров ({joins}, {where} и т.п.),
+    подставляются через format: имя при этом сохраняется, а каждый вариант
+    текста готовится отдельно.
+    """
+
+    __slots__ = ("name", "sql")
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+
+    def format(self, **parts) -> "Query":
+        return Query(self.name, self.sql.format(**parts))
+
+    def __repr__(self) -> str:
+        return f"Query({self.name!r})"
+
+
+# Все объявленные запросы по имени
+QUERIES: Dict[str, Query] = {}
+
+
+def _query(name: str, sql: str) -> Query:
+    if name in QUERIES:
+        raise ValueError(f"Запрос {name} объявлен дважды")
+    QUERIES[name] = query = Query(name, sql)
+    return query
+
+
+# Проверка подключения
+PING = _query("ping", "SELECT 1")
+
+# Справочники
+REFERENCE_ROLES = _query("reference_roles", "SELECT role_id, role_name FROM Role ORDER BY role_id")
+REFERENCE_CATEGORIES = _query(
+    "reference_categories", "SELECT category_id, category_name FROM Category ORDER BY category_name"
+)
+REFERENCE_STATUSES = _query(
+    "reference_statuses", "SELECT status_id, status_name FROM ApplicationStatus ORDER BY status_id"
+)
+REFERENCE_SUBJECTS = _query("reference_subjects", "SELECT * FROM Subject ORDER BY subject_id")
+
+# Пользователи
+GET_USER = _query("get_user", """
+    SELECT user_id, telegram_id, first_name, last_name, middle_name
+    FROM Users
+    WHERE telegram_id = $1
+""")
+
+GET_USER_PROFILE = _query("get_user_profile", """
+    SELECT
+        u.user_id,
+        u.telegram_id,
+        u.first_name,
+        u.last_name,
+        u.middle_name,
+        r.role_name,
+        c.category_id,
+        c.category_name,
+        COALESCE(r.role_name IN ('Администратор', 'Модератор'), FALSE) AS is_staff
+    FROM Users u
+    LEFT JOIN UserRole ur ON ur.user_id = u.user_id
+    LEFT JOIN Role r ON r.role_id = ur.role_id
+    LEFT JOIN UserCategory uc ON uc.user_id = u.user_id
+    LEFT JOIN Category c ON c.category_id = uc.category_id
+    WHERE u.telegram_id = $1
+    ORDER BY is_staff DESC
+    LIMIT 1
+""")
+
+INSERT_USER = _query("insert_user", """
+    INSERT INTO users (telegram_id, first_name, last_name, middle_name)
+    VALUES ($1, $2, $3, $4)
+    ON CONFLICT (telegram_id) DO NOTHING
+    RETURNING user_id
+""")
+
+INSERT_USER_ROLE = _query("insert_user_role", "INSERT INTO UserRole (user_id, role_id) VALUES ($1, $2)")
+
+INSERT_USER_CATEGORY = _query(
+    "insert_user_category", "INSERT INTO UserCategory (user_id, category_id) VALUES ($1, $2)"
+)
+
+DELETE_USER_ROLES = _query(
+    "delete_user_roles",
+    "DELETE FROM userrole WHERE user_id = (SELECT user_id FROM users WHERE telegram_id = $1)"
+)
+
+DELETE_USER_CATEGORIES = _query(
+    "delete_user_categories",
+    "DELETE FROM usercategory WHERE user_id = (SELECT user_id FROM users WHERE telegram_id = $1)"
+)
+
+DELETE_USER_MESSAGES = _query("delete_user_messages", """
+    DELETE FROM messages
+    WHERE application_id IN (
+        SELECT application_id FROM application
+        WHERE user_id = (SELECT user_id FROM users WHERE telegram_id = $1)
+    )
+""")
+
+DELETE_USER_APPLICATIONS = _query(
+    "delete_user_applications",
+    "DELETE FROM application WHERE user_id = (SELECT user_id FROM users WHERE telegram_id = $1)"
+)
+
+DELETE_USER = _query("delete_user", "DELETE FROM users WHERE telegram_id = $1")
+
+# {assignments} - изменяемые поля пользователя (first_name = $1, ...)
+UPDATE_USER = _query("update_user", "UPDATE Users SET {assignments} WHERE user_id = ${user_param}")
+
+UPDATE_USER_CATEGORY = _query(
+    "update_user_category", "UPDATE UserCategory SET category_id = $1 WHERE user_id = $2"
+)
+
+# Олимпиады
+GET_ACTIVE_OLYMPIADS = _query("get_active_olympiads", "SELECT * FROM Olympiad WHERE end_date >= CURRENT_DATE")
+
+INSERT_OLYMPIAD = _query("insert_olympiad", """
+    INSERT INTO Olympiad
+    (title, description, organizer, start_date, end_date, subject_id)
+    VALUES ($1, $2, $3, $4, $5, $6)
+""")
+
+GET_OLYMPIAD = _query("get_olympiad", "SELECT * FROM Olympiad WHERE olympiad_id = $1")
+
+GET_FULL_OLYMPIAD = _query("get_full_olympiad", """
+    SELECT
+        o.*,
+        s.title AS subject_title
+    FROM Olympiad o
+    JOIN Subject s ON o.subject_id = s.subject_id
+    WHERE o.olympiad_id = $1
+""")
+
+OLYMPIADS_FIRST_PAGE = _query("olympiads_first_page", """
+    SELECT olympiad_id, title, start_date
+    FROM Olympiad
+    ORDER BY start_date DESC, olympiad_id DESC
+    LIMIT $1
+""")
+
+OLYMPIADS_PAGE_BEFORE = _query("olympiads_page_before", """
+    SELECT olympiad_id, title, start_date
+    FROM Olympiad
+    WHERE (start_date, olympiad_id) > ($1, $2)
+    ORDER BY start_date ASC, olympiad_id ASC
+    LIMIT $3
+""")
+
+OLYMPIADS_PAGE_AFTER = _query("olympiads_page_after", """
+    SELECT olympiad_id, title, start_date
+    FROM Olympiad
+    WHERE (start_date, olympiad_id) < ($1, $2)
+    ORDER BY start_date DESC, olympiad_id DESC
+    LIMIT $3
+""")
+
+# {field} - имя столбца, {cast} - приведение типа (для дат ::date)
+UPDATE_OLYMPIAD_FIELD = _query(
+    "update_olympiad_field", "UPDATE Olympiad SET {field} = $1{cast} WHERE olympiad_id = $2"
+)
+
+DELETE_OLYMPIAD_MESSAGES = _query(
+    "delete_olympiad_messages",
+    "DELETE FROM messages m USING Application a WHERE m.application_id = a.application_id AND a.olympiad_id = $1"
+)
+
+DELETE_OLYMPIAD_APPLICATIONS = _query(
+    "delete_olympiad_applications", "DELETE FROM Application WHERE olympiad_id = $1"
+)
+
+DELETE_OLYMPIAD = _query("delete_olympiad", "DELETE FROM Olympiad WHERE olympiad_id = $1")
+
+# Версия данных выгрузки олимпиады вычисляется при чтении (как DATA_VERSIONS):
+# xmin строк олимпиады и дисциплины, число и сумма xmin заявок (вместе с ФИО
+# участников) и сообщений по ним. Читаются только строки этой олимпиады по индексам
+GET_OLYMPIAD_VERSION = _query("get_olympiad_version", """
+    SELECT concat_ws(':',
+        o.xmin,
+        s.xmin,
+        (
+            SELECT count(*) || '.' || COALESCE(sum(a.xmin::text::bigint + u.xmin::text::bigint), 0)
+            FROM Application a
+            JOIN Users u ON u.user_id = a.user_id
+            WHERE a.olympiad_id = o.olympiad_id
+        ),
+        (
+            SELECT count(*) || '.' || COALESCE(sum(m.xmin::text::bigint), 0)
+            FROM Application a
+            JOIN Messages m ON m.application_id = a.application_id
+            WHERE a.olympiad_id = o.olympiad_id
+        )
+    )
+    FROM Olympiad o
+    JOIN Subject s ON s.subject_id = o.subject_id
+    WHERE o.olympiad_id = $1
+""")
+
+GET_OLYMPIAD_TITLES = _query(
+    "get_olympiad_titles", "SELECT olympiad_id, title FROM Olympiad WHERE olympiad_id = ANY($1::int[])"
+)
+
+# Заявки
+SUBMIT_APPLICATION = _query("submit_application", """
+    INSERT INTO Application (olympiad_id, user_id, status_id)
+    VALUES ($2, $1, $3)
+    ON CONFLICT (user_id, olympiad_id) DO NOTHING
+    RETURNING application_id
+""")
+
+# {joins} и {where} строит Database._pending_filter
+COUNT_PENDING_APPLICATIONS = _query("count_pending_applications", """
+    SELECT COUNT(*)
+    FROM Application a
+    {joins}
+    WHERE {where}
+""")
+
+PENDING_APPLICATIONS_PAGE = _query("pending_applications_page", """
+    SELECT a.application_id, a.created_date, u.first_name, u.last_name, o.title AS olympiad_title
+    FROM Application a
+    JOIN Users u ON a.user_id = u.user_id
+    JOIN Olympiad o ON a.olympiad_id = o.olympiad_id
+    {joins}
+    WHERE {where}
+    ORDER BY a.created_date {order}, a.application_id {order}
+    LIMIT ${limit_param}
+""")
+
+BULK_UPDATE_PENDING_STATUS = _query("bulk_update_pending_status", """
+    WITH target AS (
+        SELECT a.application_id, a.status_id
+        FROM Application a
+        {joins}
+        WHERE {where}
+        FOR UPDATE OF a
+    ),
+    updated AS (
+        UPDATE Application a
+        SET status_id = {status_param}
+        FROM target t
+        WHERE a.application_id = t.application_id
+        RETURNING a.application_id, a.user_id, a.olympiad_id, t.status_id AS old_status_id
+    ),
+    logged AS (
+        INSERT INTO ApplicationStatusLog (application_id, old_status_id, new_status_id, changed_by)
+        SELECT application_id, old_status_id, {status_param},
+               (SELECT user_id FROM Users WHERE telegram_id = {moderator_param})
+        FROM updated
+    )
+    SELECT u.telegram_id, updated.olympiad_id
+    FROM updated
+    JOIN Users u ON u.user_id = updated.user_id
+""")
+
+GET_APPLICATION_DETAILS = _query("get_application_details", """
+    SELECT
+        u.user_id,
+        a.olympiad_id,
+        a.application_id,
+        u.first_name,
+        u.last_name,
+        u.middle_name,
+        o.title AS olympiad_title,
+        s.status_name,
+        a.created_date
+    FROM Application a
+    JOIN Users u ON a.user_id = u.user_id
+    JOIN Olympiad o ON a.olympiad_id = o.olympiad_id
+    JOIN ApplicationStatus s ON a.status_id = s.status_id
+    WHERE a.application_id = $1
+""")
+
+# Используется и для списка заявок, и для потоковой выгрузки
+OLYMPIAD_APPLICATIONS = _query("olympiad_applications", """
+    SELECT
+        a.application_id,
+        u.first_name,
+        u.last_name,
+        u.middle_name,
+        s.status_name,
+        a.created_date
+    FROM Application a
+    JOIN Users u ON a.user_id = u.user_id
+    JOIN ApplicationStatus s ON a.status_id = s.status_id
+    WHERE a.olympiad_id = $1
+    ORDER BY a.created_date DESC
+""")
+
+OLYMPIAD_REPORT_WIDTHS = _query("olympiad_report_widths", """
+    SELECT
+        MAX(LENGTH(a.application_id::text)) AS application_id,
+        MAX(LENGTH(u.last_name)) AS last_name,
+        MAX(LENGTH(u.first_name)) AS first_name,
+        MAX(LENGTH(u.middle_name)) AS middle_name,
+        MAX(LENGTH(s.status_name)) AS status_name
+    FROM Application a
+    JOIN Users u ON a.user_id = u.user_id
+    JOIN ApplicationStatus s ON a.status_id = s.status_id
+    WHERE a.olympiad_id = $1
+""")
+
+# Старый статус берется из снимка до обновления (самосоединение)
+UPDATE_APPLICATION_STATUS = _query("update_application_status", """
+    UPDATE Application a
+    SET status_id = $1
+    FROM Application prev, Users u, Olympiad o
+    WHERE a.application_id = $2
+      AND prev.application_id = a.application_id
+      AND u.user_id = a.user_id
+      AND o.olympiad_id = a.olympiad_id
+    RETURNING prev.status_id AS old_status_id, u.telegram_id, o.title
+""")
+
+INSERT_STATUS_LOG = _query("insert_status_log", """
+    INSERT INTO ApplicationStatusLog (application_id, old_status_id, new_status_id, changed_by)
+    VALUES ($1, $2, $3, (SELECT user_id FROM Users WHERE telegram_id = $4))
+""")
+
+INSERT_MODERATOR_MESSAGE = _query("insert_moderator_message", """
+    INSERT INTO Messages (user_id, application_id, message_text)
+    SELECT user_id, $2, $3 FROM Users WHERE telegram_id = $1
+""")
+
+DELETE_APPLICATION_MESSAGES = _query(
+    "delete_application_messages", "DELETE FROM Messages WHERE application_id = $1"
+)
+
+DELETE_APPLICATION = _query("delete_application", "DELETE FROM Application WHERE application_id = $1")
+
+GET_USER_APPLICATIONS = _query("get_user_applications", """
+    SELECT
+        a.application_id,
+        o.title AS olympiad_title,
+        s.status_name,
+        a.created_date
+    FROM Application a
+    JOIN Olympiad o ON a.olympiad_id = o.olympiad_id
+    JOIN ApplicationStatus s ON a.status_id = s.status_id
+    WHERE a.user_id = $1
+    ORDER BY a.created_date DESC
+""")
+
+# Сообщения по заявкам
+INSERT_MESSAGE = _query("insert_message", """
+    INSERT INTO Messages (user_id, application_id, message_text)
+    VALUES ($1, $2, $3)
+""")
+
+GET_APPLICATION_MESSAGES = _query("get_application_messages", """
+    SELECT m.*, u.first_name, u.last_name
+    FROM Messages m
+    JOIN Users u ON m.user_id = u.user_id
+    WHERE application_id = $1
+    ORDER BY sent_date DESC
+""")
+
+DELETE_USER_APPLICATION_MESSAGES = _query(
+    "delete_user_application_messages",
+    "DELETE FROM Messages WHERE application_id = $1 AND user_id = $2"
+)
+
+GET_MODERATOR_MESSAGE = _query("get_moderator_message", """
+    SELECT m.message_text
+    FROM Messages m
+    JOIN UserRole ur ON ur.user_id = m.user_id
+    WHERE m.application_id = $1
+    AND ur.role_id = ANY($2::int[])
+    ORDER BY m.sent_date DESC
+    LIMIT 1
+""")
+
+# Сводные отчеты
+# Версия данных области вычисляется при чтении, без счетчиков на пути записи:
+# число строк и сумма xmin каждой таблицы области. Вставка и удаление меняют число
+# строк, обновление - xmin строки; сумма, в отличие от максимума, замечает и позднюю
+# фиксацию транзакции с меньшим номером
+APPLICATIONS_DATA_VERSION = _query("applications_data_version", """
+    SELECT concat_ws(':',
+        (SELECT count(*) || '.' || COALESCE(sum(xmin::text::bigint), 0) FROM Application),
+        (SELECT count(*) || '.' || COALESCE(sum(xmin::text::bigint), 0) FROM Olympiad),
+        (SELECT count(*) || '.' || COALESCE(sum(xmin::text::bigint), 0) FROM ApplicationStatus)
+    )
+""")
+
+USERS_DATA_VERSION = _query("users_data_version", """
+    SELECT concat_ws(':',
+        (SELECT count(*) || '.' || COALESCE(sum(xmin::text::bigint), 0) FROM UserCategory),
+        (SELECT count(*) || '.' || COALESCE(sum(xmin::text::bigint), 0) FROM Category)
+    )
+""")
+
+# Область данных сводного отчета: запрос ее версии
+DATA_VERSIONS = {"applications": APPLICATIONS_DATA_VERSION, "users": USERS_DATA_VERSION}
+
+APPLICATIONS_BY_OLYMPIAD_REPORT = _query("applications_by_olympiad_report", """
+    SELECT
+        o.olympiad_id,
+        o.title,
+        o.start_date,
+        COALESCE(a.total, 0) AS total,
+        COALESCE(a.pending, 0) AS pending,
+        COALESCE(a.approved, 0) AS approved,
+        COALESCE(a.rejected, 0) AS rejected
+    FROM Olympiad o
+    LEFT JOIN (
+        SELECT
+            olympiad_id,
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE status_id = $1) AS pending,
+            COUNT(*) FILTER (WHERE status_id = $2) AS approved,
+            COUNT(*) FILTER (WHERE status_id = $3) AS rejected
+        FROM Application
+        GROUP BY olympiad_id
+    ) a ON a.olympiad_id = o.olympiad_id
+    ORDER BY total DESC, o.start_date DESC, o.olympiad_id DESC
+""")
+
+APPLICATIONS_BY_STATUS_REPORT = _query("applications_by_status_report", """
+    SELECT s.status_name, COALESCE(a.total, 0) AS total
+    FROM ApplicationStatus s
+    LEFT JOIN (
+        SELECT status_id, COUNT(*) AS total
+        FROM Application
+        GROUP BY status_id
+    ) a ON a.status_id = s.status_id
+    ORDER BY s.status_id
+""")
+
+USERS_BY_CATEGORY_REPORT = _query("users_by_category_report", """
+    SELECT c.category_name, COALESCE(uc.total, 0) AS total
+    FROM Category c
+    LEFT JOIN (
+        SELECT category_id, COUNT(*) AS total
+        FROM UserCategory
+        GROUP BY category_id
+    ) uc ON uc.category_id = c.category_id
+    ORDER BY total DESC, c.category_name
+""")
+
+# Очередь уведомлений
+INSERT_NOTIFICATION = _query(
+    "insert_notification", "INSERT INTO NotificationOutbox (chat_id, message_text) VALUES ($1, $2)"
+)
+
+CLAIM_NOTIFICATIONS = _query("claim_notifications", """
+    UPDATE NotificationOutbox n
+    SET attempts = n.attempts + 1,
+        next_attempt_at = NOW() + $2 * INTERVAL '1 second'
+    FROM (
+        SELECT notification_id
+        FROM NotificationOutbox
+        WHERE sent_date IS NULL AND failed_date IS NULL AND next_attempt_at <= NOW()
+        ORDER BY next_attempt_at, notification_id
+        LIMIT $1
+        FOR UPDATE SKIP LOCKED
+    ) claimed
+    WHERE n.notification_id = claimed.notification_id
+    RETURNING n.notification_id, n.chat_id, n.message_text, n.attempts
+""")
+
+MARK_NOTIFICATIONS_SENT = _query(
+    "mark_notifications_sent",
+    "UPDATE NotificationOutbox SET sent_date = NOW() WHERE notification_id = ANY($1::bigint[])"
+)
+
+RESCHEDULE_NOTIFICATION = _query("reschedule_notification", """
+    UPDATE NotificationOutbox
+    SET next_attempt_at = NOW() + $2 * INTERVAL '1 second', last_error = $3
+    WHERE notification_id = $1
+""")
+
+FAIL_NOTIFICATION = _query(
+    "fail_notification",
+    "UPDATE NotificationOutbox SET failed_date = NOW(), last_error = $2 WHERE notification_id = $1"
+)
+
+# Рассылки
+COUNT_BROADCAST_RECIPIENTS = _query("count_broadcast_recipients", """
+    SELECT COUNT(*) FROM Application
+    WHERE olympiad_id = $1 AND ($2::int IS NULL OR status_id = $2)
+""")
+
+INSERT_BROADCAST = _query("insert_broadcast", """
+    INSERT INTO Broadcast (olympiad_id, status_id, message_text, created_by, chat_id, total)
+    SELECT $1, $2, $3, (SELECT user_id FROM Users WHERE telegram_id = $4), $5, COUNT(*)
+    FROM Application
+    WHERE olympiad_id = $1 AND ($2::int IS NULL OR status_id = $2)
+    RETURNING broadcast_id, total
+""")
+
+SET_BROADCAST_PROGRESS_MESSAGE = _query(
+    "set_broadcast_progress_message",
+    "UPDATE Broadcast SET progress_message_id = $2 WHERE broadcast_id = $1"
+)
+
+GET_UNCLAIMED_BROADCASTS = _query("get_unclaimed_broadcasts", """
+    SELECT broadcast_id FROM Broadcast
+    WHERE state = 'running' AND (locked_until IS NULL OR locked_until < NOW())
+    ORDER BY broadcast_id
+""")
+
+CLAIM_BROADCAST = _query("claim_broadcast", """
+    UPDATE Broadcast
+    SET locked_until = NOW() + $2 * INTERVAL '1 second'
+    WHERE broadcast_id = $1
+      AND state = 'running'
+      AND (locked_until IS NULL OR locked_until < NOW())
+    RETURNING broadcast_id, olympiad_id, status_id, message_text, chat_id,
+              progress_message_id, total, last_user_id, sent_count, failed_count
+""")
+
+GET_BROADCAST_RECIPIENTS = _query("get_broadcast_recipients", """
+    SELECT a.user_id, u.telegram_id
+    FROM Application a
+    JOIN Users u ON u.user_id = a.user_id
+    WHERE a.olympiad_id = $1
+      AND a.user_id > $3
+      AND ($2::int IS NULL OR a.status_id = $2)
+    ORDER BY a.user_id
+    LIMIT $4
+""")
+
+SAVE_BROADCAST_CHECKPOINT = _query("save_broadcast_checkpoint", """
+    UPDATE Broadcast
+    SET last_user_id = $2,
+        sent_count = sent_count + $3,
+        failed_count = failed_count + $4,
+        locked_until = NOW() + $5 * INTERVAL '1 second'
+    WHERE broadcast_id = $1
+    RETURNING state
+""")
+
+FINISH_BROADCAST = _query("finish_broadcast", """
+    UPDATE Broadcast
+    SET state = $2, finished_date = NOW(), locked_until = NULL
+    WHERE broadcast_id = $1 AND state = 'running'
+""")
@@ -0,0 +1,82 @@
+import asyncio
+import time
+from typing import Dict
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+
+class TokenBucket:
+    """Ограничение частоты: rate событий в секунду с запасом capacity на всплеск"""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Полная остановка выдачи на указанное время (например, по retry_after)"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    async def acquire(self) -> None:
+        """Ожидание свободного токена"""
+        # Ожидающие обслуживаются по очереди, иначе после паузы они разбирают токены наперегонки
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class TelegramRateLimiter:
+    """Ограничения Telegram на отправку: общее (сообщений в секунду) и для каждого чата.
+
+    Пока сообщение ждет своего чата, общий токен не занимается,
+    поэтому частые сообщения одному пользователю не тормозят остальных.
+    """
+
+    def __init__(self, global_rate: float = 30, chat_interval: float = 1.0, max_chats: int = 100_000):
+        self.bucket = TokenBucket(global_rate, capacity=global_rate)
+        self.chat_interval = chat_interval
+        self.max_chats = max_chats
+        self._chat_next: Dict[int, float] = {}
+
+    async def acquire(self, chat_id: int) -> None:
+        """Ожидание разрешения на отправку сообщения в чат"""
+        now = time.monotonic()
+        ready_at = self._chat_next.get(chat_id, 0.0)
+        # Слот в чате резервируется сразу, чтобы параллельные отправки в один чат шли по очереди
+        self._chat_next[chat_id] = max(now, ready_at) + self.chat_interval
+        if ready_at > now:
+            await asyncio.sleep(ready_at - now)
+        await self.bucket.acquire()
+        self._prune()
+
+    def pause(self, seconds: float) -> None:
+        """Остановка всех отправок (Telegram вернул 429)"""
+        self.bucket.pause(seconds)
+
+    async def send_message(self, bot: Bot, chat_id: int, text: str, **kwargs):
+        """Отправка с соблюдением лимитов; при 429 все отправки ждут retry_after, сообщение повторяется"""
+        while True:
+            await self.acquire(chat_id)
+            try:
+                return await bot.send_message(chat_id, text, **kwargs)
+            except TelegramRetryAfter as e:
+                self.pause(e.retry_after)
+
+    def _prune(self) -> None:
+        """Удаление давно неактивных чатов, чтобы словарь не рос бесконечно"""
+        if len(self._chat_next) <= self.max_chats:
+            return
+        now = time.monotonic()
+        for chat_id in [chat_id for chat_id, ready_at in self._chat_next.items() if ready_at <= now]:
+            del self._chat_next[chat_id]
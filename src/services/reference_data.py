@@ -0,0 +1,42 @@
+from types import MappingProxyType
+from typing import Iterable
+import asyncpg
+from services import queries
+
+# Канал NOTIFY, в который триггеры справочных таблиц сообщают об изменениях
+REFERENCE_DATA_CHANNEL = "reference_data_changed"
+
+class ReferenceData:
+    """Неизменяемый снимок справочников (роли, категории, статусы, дисциплины).
+
+    Снимок не изменяется после создания: при обновлении справочников
+    Database целиком заменяет его новым.
+    """
+
+    def __init__(
+        self,
+        roles: Iterable[asyncpg.Record] = (),
+        categories: Iterable[asyncpg.Record] = (),
+        statuses: Iterable[asyncpg.Record] = (),
+        subjects: Iterable[asyncpg.Record] = ()
+    ):
+        self.roles = tuple(roles)
+        self.categories = tuple(categories)
+        self.statuses = tuple(statuses)
+        self.subjects = tuple(subjects)
+
+        self.role_ids = MappingProxyType({r['role_name']: r['role_id'] for r in self.roles})
+        self.status_ids = MappingProxyType({s['status_name']: s['status_id'] for s in self.statuses})
+        self.status_names = MappingProxyType({s['status_id']: s['status_name'] for s in self.statuses})
+        self.category_names = MappingProxyType({c['category_id']: c['category_name'] for c in self.categories})
+        self.subject_titles = MappingProxyType({s['subject_id']: s['title'] for s in self.subjects})
+
+    @classmethod
+    async def load(cls, conn: asyncpg.Connection) -> "ReferenceData":
+        """Загрузка всех справочников из БД"""
+        return cls(
+            roles=await conn.fetch(queries.REFERENCE_ROLES.sql),
+            categories=await conn.fetch(queries.REFERENCE_CATEGORIES.sql),
+            statuses=await conn.fetch(queries.REFERENCE_STATUSES.sql),
+            subjects=await conn.fetch(queries.REFERENCE_SUBJECTS.sql)
+        )
@@ -0,0 +1,69 @@
+import asyncio
+import os
+from typing import Dict, List, Optional
+from services.cache import TTLCache
+from services.database import Database
+
+class AggregateReport:
+    """Сводный отчет: заголовок, область данных (queries.DATA_VERSIONS) и метод Database, который его строит"""
+
+    def __init__(self, title: str, scope: str, loader: str):
+        self.title = title
+        self.scope = scope
+        self.loader = loader
+
+# Ключи совпадают с callback_data кнопок reports_menu_keyboard (без префикса report_)
+REPORTS: Dict[str, AggregateReport] = {
+    "applications_by_olympiad": AggregateReport(
+        "📊 Заявки по олимпиадам", "applications", "get_applications_by_olympiad_report"
+    ),
+    "applications_by_status": AggregateReport(
+        "🔄 Заявки по статусам", "applications", "get_applications_by_status_report"
+    ),
+    "users_by_category": AggregateReport(
+        "👤 Участники по категориям", "users", "get_users_by_category_report"
+    ),
+}
+
+class ReportRunner:
+    """Выполнение сводных отчетов с кэшем по версии данных.
+
+    Результат хранится под ключом (отчет, версия данных): пока таблицы области
+    не менялись, отчет отдается из кэша без обращения к тяжелым запросам.
+    Одновременные запросы одного отчета ждут общий расчет.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        self.cache = TTLCache(ttl=float(os.getenv("REPORTS__CACHE_TTL", 3600)), max_size=100)
+        self._running: Dict[str, asyncio.Task] = {}
+
+    def is_running(self, name: str) -> bool:
+        """Считается ли отчет прямо сейчас"""
+        return name in self._running
+
+    async def cached(self, name: str) -> Optional[List]:
+        """Результат из кэша, если данные не менялись с момента расчета"""
+        version = await self.db.get_data_version(REPORTS[name].scope)
+        if version is None:
+            return None
+        return self.cache.get((name, version))
+
+    async def run(self, name: str) -> Optional[List]:
+        """Расчет отчета (None - ошибка)"""
+        task = self._running.get(name)
+        if task is None:
+            task = asyncio.create_task(self._compute(name))
+            self._running[name] = task
+            task.add_done_callback(lambda _: self._running.pop(name, None))
+        # Отмена одного ожидающего не должна прерывать общий расчет
+        return await asyncio.shield(task)
+
+    async def _compute(self, name: str) -> Optional[List]:
+        result = await getattr(self.db, REPORTS[name].loader)()
+        if result is None:
+            return None
+        version, rows = result
+        if version is not None:
+            self.cache.set((name, version), rows)
+        return rows
@@ -6,6 +6,7 @@ from .olympiad_management import EditOlympiadStates
 from .olympiad_management import EditProfileStates
 from .olympiad_management import ModerationStates
 from .olympiad_management import EditApplicationMessage
+from .olympiad_management import BroadcastStates
 
 __all__ = [
     'RegistrationStates',
@@ -15,5 +16,6 @@ __all__ = [
     'EditOlympiadStates',
     'EditProfileStates',
     'ModerationStates',
-    'EditApplicationMessage'
+    'EditApplicationMessage',
+    'BroadcastStates'
 ]
\ No newline at end of file
@@ -37,4 +37,8 @@ class ModerationStates(StatesGroup):
     waiting_comment = State()
 
 class EditApplicationMessage(StatesGroup):
-    waiting_for_message = State()
\ No newline at end of file
+    waiting_for_message = State()
+
+class BroadcastStates(StatesGroup):
+    waiting_text = State()
+    confirm = State()
@@ -0,0 +1,396 @@
+"""Проверка планов запросов Database на синтетическом наборе данных.
+
+Заполняет БД синтетическими данными внутри транзакции, вызывает методы Database,
+для каждого выполняемого запроса снимает EXPLAIN и проверяет, что по большим
+таблицам нет последовательного сканирования. В конце транзакция откатывается.
+Последовательное сканирование, ошибка метода или запрос без проверки плана -
+код выхода 1. Та же проверка запускается из pytest (tests/test_explain_check.py).
+
+Запуск (схема и справочники должны быть созданы init_database.py):
+    python -m tools.explain_check --users 20000 --olympiads 2000 --per-user 5
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import sys
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+
+import asyncpg
+
+from services.database import Database
+from services.queries import QUERIES
+
+# Таблицы, которые растут вместе с числом пользователей и заявок
+LARGE_TABLES = {"users", "olympiad", "application", "messages", "userrole", "usercategory", "notificationoutbox", "applicationstatuslog"}
+
+# Сводные отчеты и версии их данных по определению читают таблицы целиком
+# (и требуют своей транзакции repeatable read), поэтому их планы не проверяются
+SKIPPED_QUERIES = {
+    "applications_by_olympiad_report", "applications_by_status_report", "users_by_category_report",
+    "applications_data_version", "users_data_version"
+}
+
+# Синтетические пользователи получают telegram_id выше этого значения
+TELEGRAM_ID_BASE = 9_000_000_000
+
+
+class ExplainingConnection:
+    """Обертка над соединением: перед каждым запросом снимает его план"""
+
+    def __init__(self, conn: asyncpg.Connection, report: "PlanReport"):
+        self._conn = conn
+        self._report = report
+
+    async def _explain(self, query: str, args: tuple):
+        if not query.lstrip().upper().startswith(("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")):
+            return
+        plan = await self._conn.fetchval(f"EXPLAIN (FORMAT JSON) {query}", *args)
+        self._report.record(query, json.loads(plan))
+
+    async def fetch(self, query, *args, **kwargs):
+        await self._explain(query, args)
+        return await self._conn.fetch(query, *args, **kwargs)
+
+    async def fetchrow(self, query, *args, **kwargs):
+        await self._explain(query, args)
+        return await self._conn.fetchrow(query, *args, **kwargs)
+
+    async def fetchval(self, query, *args, **kwargs):
+        await self._explain(query, args)
+        return await self._conn.fetchval(query, *args, **kwargs)
+
+    async def execute(self, query, *args, **kwargs):
+        await self._explain(query, args)
+        return await self._conn.execute(query, *args, **kwargs)
+
+    def cursor(self, query, *args, **kwargs):
+        async def explained_cursor():
+            await self._explain(query, args)
+            return await self._conn.cursor(query, *args, **kwargs)
+        return explained_cursor()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class SingleConnectionPool:
+    """Пул, всегда выдающий одно и то же (обернутое) соединение"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self._conn
+
+    async def close(self):
+        pass
+
+
+class PlanReport:
+    """Собирает последовательные сканирования больших таблиц по методам Database"""
+
+    def __init__(self):
+        self.method = None
+        self.violations = {}
+        self.errors = {}
+        self.queries = {}
+        self.seen = set()
+        self.unchecked = []
+
+    @property
+    def failed(self) -> bool:
+        """Есть ли последовательные сканирования, ошибки методов или запросы без проверки плана"""
+        return bool(self.violations or self.errors or self.unchecked)
+
+    def record(self, query: str, plan):
+        self.queries[self.method] = self.queries.get(self.method, 0) + 1
+        self.seen.add(query)
+        for node in _walk(plan[0]["Plan"]):
+            relation = node.get("Relation Name", "").lower()
+            if node["Node Type"] == "Seq Scan" and relation in LARGE_TABLES:
+                self.violations.setdefault(self.method, []).append(
+                    (relation, " ".join(query.split())[:120])
+                )
+
+
+def _walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+async def generate_dataset(conn: asyncpg.Connection, users: int, olympiads: int, per_user: int):
+    """Синтетические пользователи, олимпиады (в основном архивные), заявки и сообщения"""
+    subject_id = await conn.fetchval("SELECT MIN(subject_id) FROM Subject")
+    role_id = await conn.fetchval("SELECT MIN(role_id) FROM Role")
+    category_id = await conn.fetchval("SELECT MIN(category_id) FROM Category")
+    status_ids = [row['status_id'] for row in await conn.fetch("SELECT status_id FROM ApplicationStatus")]
+    if not (subject_id and role_id and category_id and status_ids):
+        raise RuntimeError("Справочники пусты - сначала выполните init_database.py")
+
+    await conn.execute(
+        """
+        INSERT INTO Users (telegram_id, first_name, last_name, middle_name)
+        SELECT $1::bigint + g, 'Имя' || g, 'Фамилия' || g, CASE WHEN g % 3 = 0 THEN NULL ELSE 'Отчество' || g END
+        FROM generate_series(1, $2) g
+        """,
+        TELEGRAM_ID_BASE, users
+    )
+    await conn.execute(
+        """
+        INSERT INTO UserRole (user_id, role_id)
+        SELECT user_id, $2 FROM Users WHERE telegram_id > $1
+        """,
+        TELEGRAM_ID_BASE, role_id
+    )
+    await conn.execute(
+        """
+        INSERT INTO UserCategory (user_id, category_id)
+        SELECT user_id, $2 FROM Users WHERE telegram_id > $1
+        """,
+        TELEGRAM_ID_BASE, category_id
+    )
+    # Олимпиады раз в день уходят в прошлое: активных (end_date >= сегодня) - единицы
+    await conn.execute(
+        """
+        INSERT INTO Olympiad (title, description, organizer, start_date, end_date, subject_id)
+        SELECT 'Олимпиада ' || g, 'Описание ' || g, 'Организатор ' || (g % 50),
+               CURRENT_DATE - g, CURRENT_DATE - g + 14, $2
+        FROM generate_series(1, $1) g
+        """,
+        olympiads, subject_id
+    )
+    await conn.execute(
+        """
+        INSERT INTO Application (olympiad_id, user_id, status_id, created_date)
+        SELECT o.olympiad_id, u.user_id,
+               ($4::int[])[1 + (u.rn + j) % array_length($4::int[], 1)],
+               NOW() - (u.rn + j * 7) % 365 * INTERVAL '1 day'
+        FROM (
+            SELECT user_id, ROW_NUMBER() OVER (ORDER BY user_id) AS rn
+            FROM Users WHERE telegram_id > $1
+        ) u
+        CROSS JOIN generate_series(1, $3) j
+        JOIN (
+            SELECT olympiad_id, ROW_NUMBER() OVER (ORDER BY olympiad_id) - 1 AS rn
+            FROM Olympiad
+        ) o ON o.rn = (u.rn * 7 + j * 13) % $2
+        ON CONFLICT DO NOTHING
+        """,
+        TELEGRAM_ID_BASE, await conn.fetchval("SELECT COUNT(*) FROM Olympiad"), per_user, status_ids
+    )
+    await conn.execute(
+        """
+        INSERT INTO Messages (user_id, application_id, message_text, sent_date)
+        SELECT user_id, application_id, 'Комментарий к заявке ' || application_id, created_date + INTERVAL '1 hour'
+        FROM Application
+        WHERE application_id % 3 = 0
+        """
+    )
+    # История уведомлений (почти все уже отправлены) и журнал статусов
+    await conn.execute(
+        """
+        INSERT INTO NotificationOutbox (chat_id, message_text, attempts, created_date, sent_date)
+        SELECT u.telegram_id, 'Уведомление по заявке ' || a.application_id, 1, a.created_date,
+               CASE WHEN a.application_id % 100 = 0 THEN NULL ELSE a.created_date + INTERVAL '1 minute' END
+        FROM Application a
+        JOIN Users u ON u.user_id = a.user_id
+        """
+    )
+    await conn.execute(
+        """
+        INSERT INTO ApplicationStatusLog (application_id, old_status_id, new_status_id, changed_date)
+        SELECT application_id, $1, status_id, created_date + INTERVAL '1 hour'
+        FROM Application
+        WHERE status_id <> $1
+        """,
+        status_ids[0]
+    )
+    # Выборка ANALYZE по умолчанию (30000 строк) случайна, и оценки на границе выбора
+    # между вложенным циклом и hash join меняли план от запуска к запуску; выборка
+    # в 300000 строк покрывает синтетические таблицы целиком
+    await conn.execute("SET LOCAL default_statistics_target = 1000")
+    for table in ("Users", "UserRole", "UserCategory", "Olympiad", "Application", "Messages",
+                  "NotificationOutbox", "ApplicationStatusLog"):
+        await conn.execute(f"ANALYZE {table}")
+
+
+def method_calls(sample):
+    """Вызовы методов Database с параметрами из синтетических данных.
+
+    Порядок важен: изменяющие данные методы идут в конце.
+    """
+    return [
+        ("ping", (), {}),
+        ("get_user", (sample['telegram_id'],), {}),
+        ("get_user_profile", (sample['telegram_id'],), {}),
+        ("is_admin_or_moderator", (sample['telegram_id'],), {}),
+        ("get_category_name", (sample['category_id'],), {}),
+        ("get_subjects", (), {}),
+        ("get_subject_name", (sample['subject_id'],), {}),
+        ("get_categories", (), {}),
+        ("get_active_olympiads", (), {}),
+        ("get_olympiad_by_id", (sample['olympiad_id'],), {}),
+        ("get_full_olympiad_info", (sample['olympiad_id'],), {}),
+        ("get_olympiads_page", (), {}),
+        ("get_olympiads_page", ((sample['start_date'], sample['olympiad_id']),), {}),
+        ("get_olympiads_page", ((sample['start_date'], sample['olympiad_id']),), {"backward": True}),
+        ("get_pending_applications_page", (), {}),
+        ("get_pending_applications_page", ((sample['created_date'], sample['application_id']),), {}),
+        ("get_pending_applications_page", (), {"olympiad_id": sample['olympiad_id']}),
+        ("get_pending_applications_page", (), {"category_id": sample['category_id']}),
+        ("count_pending_applications", (), {"olympiad_id": sample['olympiad_id']}),
+        ("get_application_details", (sample['application_id'],), {}),
+        ("get_applications_for_olympiad", (sample['olympiad_id'],), {}),
+        ("get_olympiad_version", (sample['olympiad_id'],), {}),
+        ("get_olympiad_report_widths", (sample['olympiad_id'],), {}),
+        ("iter_applications_for_olympiad", (sample['olympiad_id'],), {}),
+        ("get_application_messages", (sample['application_id'],), {}),
+        ("get_application_moderator_message", (sample['application_id'],), {}),
+        ("get_user_applications", (sample['user_id'],), {}),
+        ("count_broadcast_recipients", (sample['olympiad_id'],), {}),
+        ("get_broadcast_recipients", (sample['olympiad_id'], None, sample['user_id'], 200), {}),
+        ("get_unclaimed_broadcast_ids", (), {}),
+        ("submit_application", (sample['user_id'], sample['free_olympiad_id']), {}),
+        ("submit_application", (sample['user_id'], sample['olympiad_id']), {}),
+        ("update_application_status", (sample['application_id'], "Одобрена"), {}),
+        ("update_application_status", (sample['application_id'], "Отклонена"), {"comment": "Проверка", "moderator_telegram_id": sample['telegram_id']}),
+        ("bulk_update_pending_status", ("Одобрена", sample['telegram_id']), {"olympiad_id": sample['olympiad_id']}),
+        ("create_broadcast", (sample['olympiad_id'], None, "Проверка", sample['telegram_id'], sample['telegram_id']), {}),
+        ("set_broadcast_progress_message", (sample['application_id'], 1), {}),
+        ("claim_broadcast", (sample['application_id'], 300), {}),
+        ("save_broadcast_checkpoint", (sample['application_id'], sample['user_id'], 1, 0, 300), {}),
+        ("finish_broadcast", (sample['application_id'],), {}),
+        ("claim_notifications", (100, 300), {}),
+        ("mark_notifications_sent", ([sample['application_id']],), {}),
+        ("reschedule_notification", (sample['application_id'], 10, "Проверка"), {}),
+        ("fail_notification", (sample['application_id'], "Проверка"), {}),
+        ("create_message", (sample['user_id'], sample['application_id'], "Проверка"), {}),
+        ("delete_application_messages", (sample['application_id'], sample['user_id']), {}),
+        ("update_user_profile", (sample['telegram_id'],), {"first_name": "Проверка", "category_id": sample['category_id']}),
+        ("update_olympiad_field", (sample['olympiad_id'], "title", "Проверка"), {}),
+        ("create_olympiad", ("Проверка", "Проверка", "Проверка", date.today(), date.today() + timedelta(days=1), sample['subject_id']), {}),
+        ("create_user", (TELEGRAM_ID_BASE - 1, "Проверка", "Проверка"), {"category_id": sample['category_id']}),
+        ("delete_application", (sample['application_id'],), {}),
+        ("delete_olympiad", (sample['olympiad_id'],), {}),
+        ("delete_user", (sample['telegram_id'],), {}),
+    ]
+
+
+async def connect() -> asyncpg.Connection:
+    """Подключение к БД из переменных окружения"""
+    return await asyncpg.connect(
+        host=os.getenv("DB__HOST", "db"),
+        port=int(os.getenv("DB__PORT", "5432")),
+        user=os.getenv("DB__USER", "admin"),
+        password=os.getenv("DB__PASSWORD"),
+        database=os.getenv("DB__NAME")
+    )
+
+
+async def check_plans(conn: asyncpg.Connection, users: int, olympiads: int, per_user: int) -> PlanReport:
+    """Планы запросов методов Database на синтетических данных (данные откатываются)"""
+    transaction = conn.transaction()
+    await transaction.start()
+    db = Database()
+    pool = db.pool
+    try:
+        print("🧪 Генерируем синтетические данные...")
+        await generate_dataset(conn, users, olympiads, per_user)
+
+        sample = dict(await conn.fetchrow(
+            """
+            SELECT a.application_id, a.user_id, a.olympiad_id, a.created_date,
+                   u.telegram_id, o.start_date, o.subject_id, uc.category_id
+            FROM Application a
+            JOIN Users u ON u.user_id = a.user_id
+            JOIN Olympiad o ON o.olympiad_id = a.olympiad_id
+            JOIN UserCategory uc ON uc.user_id = a.user_id
+            WHERE u.telegram_id > $1
+            ORDER BY a.application_id
+            LIMIT 1
+            """,
+            TELEGRAM_ID_BASE
+        ))
+        sample['free_olympiad_id'] = await conn.fetchval(
+            """
+            SELECT olympiad_id FROM Olympiad o
+            WHERE NOT EXISTS (
+                SELECT 1 FROM Application a WHERE a.olympiad_id = o.olympiad_id AND a.user_id = $1
+            )
+            LIMIT 1
+            """,
+            sample['user_id']
+        )
+
+        report = PlanReport()
+        db.pool = SingleConnectionPool(ExplainingConnection(conn, report))
+        db.invalidate_profile_cache()
+        report.method = "refresh_reference_data"
+        await db.refresh_reference_data()
+
+        for method, call_args, call_kwargs in method_calls(sample):
+            report.method = method
+            report.queries.setdefault(method, 0)
+            try:
+                # Каждый вызов в своей точке сохранения: ошибка не ломает проверку остальных
+                async with conn.transaction():
+                    result = getattr(db, method)(*call_args, **call_kwargs)
+                    if inspect.isasyncgen(result):
+                        async for _ in result:
+                            pass
+                    else:
+                        await result
+            except Exception as e:
+                report.errors[method] = str(e)
+
+        # Шаблоны с подстановками проверяются в своих вариантах, остальные - по точному тексту
+        report.unchecked = [
+            name for name, query in QUERIES.items()
+            if name not in SKIPPED_QUERIES and "{" not in query.sql and query.sql not in report.seen
+        ]
+        return report
+    finally:
+        # Синтетические данные и кэши, заполненные на них, не должны пережить проверку
+        db.pool = pool
+        db.invalidate_profile_cache()
+        await transaction.rollback()
+
+
+async def run(args) -> int:
+    conn = await connect()
+    try:
+        report = await check_plans(conn, args.users, args.olympiads, args.per_user)
+    finally:
+        await conn.close()
+
+    for method, count in report.queries.items():
+        violations = report.violations.get(method)
+        if method in report.errors:
+            print(f"❌ {method}: {report.errors[method]}")
+        elif violations:
+            print(f"❌ {method}:")
+            for relation, query in violations:
+                print(f"     Seq Scan по {relation}: {query}")
+        else:
+            print(f"✅ {method} ({count} запр.)")
+    if report.unchecked:
+        print(f"❌ Запросы без проверки плана: {', '.join(report.unchecked)}")
+
+    return 1 if report.failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--olympiads", type=int, default=2000)
+    parser.add_argument("--per-user", type=int, default=5)
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
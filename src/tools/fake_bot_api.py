@@ -0,0 +1,397 @@
+"""Локальный сервер Bot API для сквозных нагрузочных тестов bot.py.
+
+Отвечает на методы, которые использует бот (getMe, getUpdates, setWebhook,
+sendMessage, editMessageText, deleteMessage, sendDocument, answerCallbackQuery
+и т.п.) с настраиваемой задержкой и долей ответов 429. Сам же играет роль
+пользователей: с заданной частотой отправляет боту апдейты по сценарию
+(регистрация, список олимпиад, подача заявки, мои заявки), нажимая кнопки,
+которые бот действительно прислал, и измеряет время от апдейта до первого
+видимого ответа бота.
+
+Запуск:
+    python -m tools.fake_bot_api --port 8081 --users 200 --rate 50 --duration 60 --latency-ms 50 --throttle 0.02
+    TG__API_URL=http://127.0.0.1:8081 TG__BOT_TOKEN=42:FAKE python bot.py
+
+Режим вебхука определяется сам: если бот вызвал setWebhook, апдейты
+отправляются на его URL (для локального теста WEBHOOK__URL=http://127.0.0.1:8080),
+иначе отдаются через getUpdates.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+from collections import Counter, defaultdict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+
+from tools.loadtest import TELEGRAM_ID_BASE, cleanup, percentile
+
+# Шаги сценария: сообщение с текстом или нажатие кнопки (по префиксу callback_data
+# из последней присланной ботом клавиатуры). После регистрации сценарий повторяется с LOOP_START
+SCRIPT: List[Tuple[str, str]] = [
+    ("text", "/start"),
+    ("text", "Иван"),
+    ("text", "Иванов"),
+    ("text", "-"),
+    ("button", "role_student"),
+    ("button", "category_"),
+    ("button", "confirm_yes"),
+    ("text", "🏆 Доступные олимпиады"),
+    ("button", "olympiad_"),
+    ("button", "application_confirm"),
+    ("text", "📋 Мои заявки"),
+    ("text", "👤 Профиль"),
+]
+LOOP_START = 7
+
+# Методы, ответ которыми пользователь видит (по первому из них считается задержка)
+REPLY_METHODS = {"sendMessage", "editMessageText", "sendDocument", "answerCallbackQuery"}
+
+# Методы, которые не ограничиваются (служебные вызовы бота при запуске и polling)
+SERVICE_METHODS = {"getMe", "getUpdates", "setWebhook", "deleteWebhook", "getWebhookInfo", "close", "logOut"}
+
+
+class ScriptedUser:
+    """Пользователь, проходящий SCRIPT по шагам"""
+
+    def __init__(self, telegram_id: int):
+        self.telegram_id = telegram_id
+        self.position = 0
+        self.keyboard: Dict[str, int] = {}
+        # (момент отправки апдейта, шаг) - пока ждем ответа бота
+        self.waiting: Optional[Tuple[float, str]] = None
+
+    @property
+    def profile(self) -> dict:
+        return {"id": self.telegram_id, "is_bot": False, "first_name": "Нагрузка", "language_code": "ru"}
+
+    @property
+    def chat(self) -> dict:
+        return {"id": self.telegram_id, "type": "private"}
+
+    def advance(self) -> None:
+        self.position += 1
+        if self.position >= len(SCRIPT):
+            self.position = LOOP_START
+
+
+class FakeBotAPI:
+    """Поддельный Bot API и генератор апдейтов"""
+
+    def __init__(self, args):
+        self.args = args
+        self.bot_user: dict = {}
+        self.webhook_url: Optional[str] = None
+        self.webhook_secret: Optional[str] = None
+        self.connected = asyncio.Event()
+
+        self.users = {
+            TELEGRAM_ID_BASE + i: ScriptedUser(TELEGRAM_ID_BASE + i) for i in range(args.users)
+        }
+        self.idle: Deque[ScriptedUser] = deque(self.users.values())
+        self.callbacks: Dict[str, ScriptedUser] = {}
+
+        self._updates: List[dict] = []
+        self._new_updates = asyncio.Event()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._http: Optional[aiohttp.ClientSession] = None
+
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.calls: Counter = Counter()
+        self.throttled: Counter = Counter()
+        self.emitted = 0
+        self.saturated = 0
+        self.skipped: Counter = Counter()
+        self.timeouts: Counter = Counter()
+
+    # Bot API
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.router.add_route("*", "/bot{token}/{method}", self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        if not self.bot_user:
+            bot_id = int(request.match_info["token"].split(":")[0])
+            self.bot_user = {"id": bot_id, "is_bot": True, "first_name": "Bot", "username": "fake_bot"}
+        params = dict(await request.post())
+        params.update(request.query)
+        self.calls[method] += 1
+
+        if method not in SERVICE_METHODS:
+            delay = self.args.latency_ms + random.uniform(0, self.args.jitter_ms)
+            if delay:
+                await asyncio.sleep(delay / 1000)
+            if random.random() < self.args.throttle:
+                self.throttled[method] += 1
+                return web.json_response({
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.args.retry_after}",
+                    "parameters": {"retry_after": self.args.retry_after}
+                }, status=429)
+
+        handler = getattr(self, f"api_{method}", None)
+        result = await handler(request, params) if handler else True
+        return web.json_response({"ok": True, "result": result})
+
+    async def api_getMe(self, request: web.Request, params: dict):
+        return self.bot_user
+
+    async def api_setWebhook(self, request: web.Request, params: dict):
+        self.webhook_url = params.get("url")
+        self.webhook_secret = params.get("secret_token")
+        self.connected.set()
+        return True
+
+    async def api_deleteWebhook(self, request: web.Request, params: dict):
+        self.webhook_url = None
+        return True
+
+    async def api_getUpdates(self, request: web.Request, params: dict):
+        self.connected.set()
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        if not self._updates:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), float(params.get("timeout") or 0))
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:limit]
+
+    async def _reply(self, params: dict) -> dict:
+        """Ответ бота пользователю: запоминаем клавиатуру и засчитываем задержку"""
+        chat_id = int(params.get("chat_id") or 0)
+        message_id = int(params.get("message_id") or 0) or next(self._message_ids)
+        user = self.users.get(chat_id)
+        if user is not None:
+            markup = json.loads(params.get("reply_markup") or "{}")
+            buttons = [
+                button["callback_data"]
+                for row in markup.get("inline_keyboard", [])
+                for button in row if "callback_data" in button
+            ]
+            if buttons:
+                user.keyboard = dict.fromkeys(buttons, message_id)
+            self._answered(user)
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": self.bot_user,
+            "text": params.get("text") or params.get("caption") or ""
+        }
+
+    async def api_sendMessage(self, request: web.Request, params: dict):
+        return await self._reply(params)
+
+    async def api_editMessageText(self, request: web.Request, params: dict):
+        return await self._reply(params)
+
+    async def api_sendDocument(self, request: web.Request, params: dict):
+        params.pop("document", None)
+        return await self._reply(params)
+
+    async def api_answerCallbackQuery(self, request: web.Request, params: dict):
+        user = self.callbacks.pop(params.get("callback_query_id"), None)
+        if user is not None:
+            self._answered(user)
+        return True
+
+    def _answered(self, user: ScriptedUser) -> None:
+        if user.waiting is None:
+            return
+        sent_at, step = user.waiting
+        self.latencies[step].append(time.perf_counter() - sent_at)
+        user.waiting = None
+        self.idle.append(user)
+
+    # Пользователи
+    async def emit(self, user: ScriptedUser) -> None:
+        """Следующий шаг сценария пользователя в виде апдейта"""
+        kind, value = SCRIPT[user.position]
+        update = {"update_id": next(self._update_ids)}
+        if kind == "text":
+            step = value
+            update["message"] = {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": user.chat,
+                "from": user.profile,
+                "text": value
+            }
+        else:
+            offered = [data for data in user.keyboard if data.startswith(value)]
+            if not offered:
+                # Бот не предложил такой кнопки (например, нет активных олимпиад) - пропускаем шаг
+                self.skipped[value] += 1
+                user.advance()
+                self.idle.append(user)
+                return
+            data = random.choice(offered)
+            step = value
+            callback_id = str(next(self._update_ids))
+            self.callbacks[callback_id] = user
+            update["callback_query"] = {
+                "id": callback_id,
+                "from": user.profile,
+                "chat_instance": str(user.telegram_id),
+                "data": data,
+                "message": {
+                    "message_id": user.keyboard[data],
+                    "date": int(time.time()),
+                    "chat": user.chat,
+                    "from": self.bot_user,
+                    "text": "…"
+                }
+            }
+
+        user.waiting = (time.perf_counter(), step)
+        if not await self._deliver(update):
+            # Апдейт не доставлен - повторим этот же шаг позже
+            user.waiting = None
+            self.callbacks.pop(update.get("callback_query", {}).get("id"), None)
+            self.idle.append(user)
+            return
+        user.advance()
+        self.emitted += 1
+
+    async def _deliver(self, update: dict) -> bool:
+        if not self.webhook_url:
+            self._updates.append(update)
+            self._new_updates.set()
+            return True
+
+        headers = {}
+        if self.webhook_secret:
+            headers["X-Telegram-Bot-Api-Secret-Token"] = self.webhook_secret
+        try:
+            async with self._http.post(self.webhook_url, json=update, headers=headers) as response:
+                if response.status == 200:
+                    return True
+                print(f"⚠️ Вебхук ответил {response.status}")
+        except aiohttp.ClientError as e:
+            # Бот вызывает setWebhook до того, как поднимет веб-сервер
+            print(f"⚠️ Вебхук недоступен: {e}")
+            await asyncio.sleep(0.5)
+        return False
+
+    def _expire(self) -> None:
+        """Пользователи, не дождавшиеся ответа, возвращаются к сценарию"""
+        now = time.perf_counter()
+        for user in self.users.values():
+            if user.waiting is not None and now - user.waiting[0] > self.args.step_timeout:
+                self.timeouts[user.waiting[1]] += 1
+                user.waiting = None
+                self.idle.append(user)
+
+    async def drive(self) -> None:
+        """Апдейты с частотой --rate в течение --duration секунд"""
+        print("⏳ Ждем подключения бота...")
+        await self.connected.wait()
+        print(f"🚀 Бот подключился ({'вебхук' if self.webhook_url else 'polling'}), нагрузка {self.args.rate} апд/с")
+
+        self._http = aiohttp.ClientSession()
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.args.rate
+        started = next_at = loop.time()
+        try:
+            while loop.time() - started < self.args.duration:
+                self._expire()
+                if self.idle:
+                    await self.emit(self.idle.popleft())
+                else:
+                    # Все пользователи ждут ответа - бот не успевает
+                    self.saturated += 1
+                next_at += interval
+                await asyncio.sleep(max(0.0, next_at - loop.time()))
+            elapsed = loop.time() - started
+            # Даем боту ответить на последние апдейты
+            await asyncio.sleep(min(self.args.step_timeout, 5))
+            self._expire()
+        finally:
+            await self._http.close()
+        self.report(elapsed)
+
+    def report(self, elapsed: float) -> None:
+        answered = sum(len(samples) for samples in self.latencies.values())
+        print(
+            f"\n📊 Отправлено {self.emitted} апдейтов за {elapsed:.1f} с "
+            f"({self.emitted / elapsed:.0f} апд/с при цели {self.args.rate}), ответов {answered}"
+        )
+        if self.saturated:
+            print(f"⚠️ Все пользователи ждали ответа {self.saturated} раз - бот не успевает за нагрузкой")
+        samples = [s for step in self.latencies.values() for s in step]
+        if samples:
+            print(
+                f"   до первого ответа: p50 {percentile(samples, 0.5) * 1000:.1f} мс, "
+                f"p95 {percentile(samples, 0.95) * 1000:.1f} мс, p99 {percentile(samples, 0.99) * 1000:.1f} мс"
+            )
+        print(f"   {'шаг':<40} {'ответов':>8} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9}")
+        for step, values in sorted(self.latencies.items(), key=lambda item: -sum(item[1])):
+            print(
+                f"   {step:<40} {len(values):>8} {percentile(values, 0.5) * 1000:>9.1f} "
+                f"{percentile(values, 0.95) * 1000:>9.1f} {percentile(values, 0.99) * 1000:>9.1f}"
+            )
+        print(f"   вызовы Bot API: {dict(self.calls.most_common())}")
+        if self.throttled:
+            print(f"   ответы 429: {dict(self.throttled.most_common())}")
+        for step, n in self.timeouts.most_common():
+            print(f"❌ нет ответа за {self.args.step_timeout} с: {step} ({n})")
+        for step, n in self.skipped.most_common():
+            print(f"⚠️ бот не предложил кнопку {step}* ({n})")
+
+
+async def run(args) -> int:
+    api = FakeBotAPI(args)
+    runner = web.AppRunner(api.app())
+    await runner.setup()
+    await web.TCPSite(runner, host=args.host, port=args.port).start()
+    print(f"🤖 Bot API: http://{args.host}:{args.port}")
+    try:
+        await api.drive()
+    finally:
+        await runner.cleanup()
+        if not args.keep:
+            await _cleanup(args.users)
+    return 1 if api.timeouts else 0
+
+
+async def _cleanup(users: int) -> None:
+    """Удаление пользователей, которых зарегистрировал бот во время прогона"""
+    from services.database import Database
+    db = Database()
+    if not await db.initialize():
+        print("⚠️ Нет подключения к БД: данные прогона не удалены")
+        return
+    await cleanup(db, TELEGRAM_ID_BASE, TELEGRAM_ID_BASE + users)
+    await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--users", type=int, default=100, help="виртуальных пользователей")
+    parser.add_argument("--rate", type=float, default=20, help="апдейтов в секунду")
+    parser.add_argument("--duration", type=float, default=30, help="длительность нагрузки, с")
+    parser.add_argument("--latency-ms", type=float, default=0, help="задержка ответов Bot API, мс")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="случайная добавка к задержке, мс")
+    parser.add_argument("--throttle", type=float, default=0, help="доля ответов 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after в ответах 429, с")
+    parser.add_argument("--step-timeout", type=float, default=10, help="сколько ждать ответа на шаг, с")
+    parser.add_argument("--keep", action="store_true", help="не удалять созданные данные")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
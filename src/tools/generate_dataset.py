@@ -0,0 +1,315 @@
+"""Генератор большого синтетического набора данных для нагрузочных тестов.
+
+Создает схему (init_database.create_schema), заново заполняет справочники
+(init_database.seed_reference) и загружает пользователей, олимпиады, заявки,
+журнал статусов и сообщения модераторов через COPY пачками по --batch
+пользователей. Все загружается одной транзакцией.
+
+Набор определяется --seed, размерами и --today: при тех же параметрах
+получаются те же строки с теми же идентификаторами. Даты олимпиад отсчитываются
+от --today (по умолчанию сегодня), чтобы среди них были активные.
+
+Распределения:
+    - категории: школьники и студенты - большинство, аспирантов и преподавателей мало;
+    - популярность олимпиад по закону Ципфа: несколько олимпиад собирают
+      большую часть заявок;
+    - число заявок пользователя - геометрическое со средним --apps-per-user
+      (многие подают одну-две заявки, единицы - десятки);
+    - завершенные олимпиады в основном рассмотрены, идущие - в основном на рассмотрении.
+
+ВНИМАНИЕ: все данные в БД удаляются. Если пользователи уже есть, нужен --force.
+
+Запуск:
+    python -m tools.generate_dataset --users 1000000 --seed 42
+"""
+import argparse
+import asyncio
+import math
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from typing import Dict, List
+
+import asyncpg
+
+from init_database import connect, create_schema, seed_reference
+
+# Сгенерированные пользователи получают telegram_id выше этого значения
+# (tools.loadtest и tools.explain_check используют свои диапазоны)
+TELEGRAM_ID_BASE = 7_000_000_000
+
+MALE_NAMES = ["Александр", "Алексей", "Андрей", "Артем", "Владимир", "Дмитрий", "Егор", "Иван",
+              "Илья", "Кирилл", "Максим", "Михаил", "Никита", "Павел", "Роман", "Сергей"]
+FEMALE_NAMES = ["Анастасия", "Анна", "Валерия", "Дарья", "Екатерина", "Елена", "Елизавета", "Ирина",
+                "Ксения", "Мария", "Наталья", "Ольга", "Полина", "София", "Татьяна", "Юлия"]
+LAST_NAMES = ["Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов",
+              "Новиков", "Федоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Семенов", "Егоров",
+              "Павлов", "Козлов", "Степанов", "Николаев", "Орлов", "Андреев", "Макаров", "Никитин"]
+PATRONYMICS = ["Александров", "Алексеев", "Андреев", "Викторов", "Дмитриев", "Иванов",
+               "Михайлов", "Николаев", "Петров", "Сергеев"]
+
+ORGANIZERS = ["МГУ им. М.В. Ломоносова", "СПбГУ", "МФТИ", "ВШЭ", "ИТМО", "МИФИ", "УрФУ", "НГУ",
+              "КФУ", "ТПУ", "Яндекс", "Сириус"]
+OLYMPIAD_KINDS = ["Открытая олимпиада", "Олимпиада", "Турнир", "Кубок", "Межвузовская олимпиада",
+                  "Командный чемпионат"]
+
+# Доли категорий пользователей (по названию из справочника Category)
+CATEGORY_WEIGHTS = {"Школьник": 45, "Студент": 40, "Аспирант": 8, "Преподаватель": 7}
+
+# Доли статусов: (рассмотрение, одобрена, отклонена)
+DECIDED_STATUS_WEIGHTS = (15, 65, 20)
+RECENT_STATUS_WEIGHTS = (70, 20, 10)
+
+APPROVED_COMMENTS = [
+    "Заявка одобрена! Ожидайте информацию о формате проведения.",
+    "Поздравляем! Ваша заявка принята. Ознакомьтесь с регламентом.",
+    "Заявка одобрена. Удачи на олимпиаде!",
+]
+REJECTED_COMMENTS = [
+    "К сожалению, заявка отклонена: не соответствует требованиям к участникам.",
+    "Заявка отклонена. Попробуйте принять участие в следующем году.",
+]
+PENDING_COMMENTS = [
+    "Заявка принята к рассмотрению. Проверяем документы.",
+    "Рассматриваем вашу заявку. Результат будет в течение нескольких дней.",
+]
+
+
+def feminine(last_name: str) -> str:
+    return last_name + "а"
+
+
+class DatasetGenerator:
+    """Детерминированная генерация строк по seed"""
+
+    def __init__(self, args, reference: Dict[str, Dict[str, int]]):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.now = datetime.combine(args.today, datetime.min.time()) + timedelta(hours=12)
+        self.roles = reference["roles"]
+        self.statuses = reference["statuses"]
+        self.subject_ids = sorted(reference["subjects"].values())
+
+        self.category_ids = [reference["categories"][name] for name in CATEGORY_WEIGHTS]
+        self.category_cum = list(accumulate(CATEGORY_WEIGHTS.values()))
+        self.pending_id = self.statuses["Рассмотрение"]
+        self.status_ids = (self.pending_id, self.statuses["Одобрена"], self.statuses["Отклонена"])
+
+        # Модераторы и администраторы - первые пользователи набора
+        self.admins = 2
+        self.moderators = max(2, args.users // 5000)
+
+        self.olympiads: List[tuple] = []
+        self.olympiad_cum: List[float] = []
+        self.next_application_id = 1
+
+    def olympiad_rows(self) -> List[tuple]:
+        """Олимпиады за последние три года и на полгода вперед"""
+        rows = []
+        first_day = self.args.today - timedelta(days=3 * 365)
+        span = 3 * 365 + 180
+        for olympiad_id in range(1, self.args.olympiads + 1):
+            start = first_day + timedelta(days=self.rng.randrange(span))
+            kind = self.rng.random()
+            if kind < 0.3:
+                length = self.rng.randint(1, 3)       # хакатоны и однодневные туры
+            elif kind < 0.8:
+                length = self.rng.randint(7, 30)
+            else:
+                length = self.rng.randint(30, 90)     # заочные этапы
+            subject_id = self.rng.choice(self.subject_ids)
+            organizer = self.rng.choice(ORGANIZERS)
+            title = f"{self.rng.choice(OLYMPIAD_KINDS)} {organizer} №{olympiad_id} ({start.year})"
+            rows.append((
+                olympiad_id, title,
+                f"Синтетическая олимпиада №{olympiad_id}. Задачи разного уровня сложности.",
+                organizer, start, start + timedelta(days=length), subject_id
+            ))
+
+        # Популярность по Ципфу: ранги раздаются олимпиадам в случайном порядке
+        ranks = list(range(1, len(rows) + 1))
+        self.rng.shuffle(ranks)
+        self.olympiads = rows
+        self.olympiad_cum = list(accumulate(1 / rank ** 1.1 for rank in ranks))
+        return rows
+
+    def user_batch(self, first: int, last: int):
+        """Строки всех таблиц для пользователей first..last-1 (user_id = номер + 1)"""
+        users, roles, categories = [], [], []
+        applications, status_log, messages = [], [], []
+        rng = self.rng
+        stop_probability = 1 / (1 + self.args.apps_per_user)
+
+        for number in range(first, last):
+            user_id = number + 1
+            female = rng.random() < 0.5
+            first_name = rng.choice(FEMALE_NAMES if female else MALE_NAMES)
+            last_name = rng.choice(LAST_NAMES)
+            middle_name = None
+            if rng.random() < 0.85:
+                middle_name = rng.choice(PATRONYMICS) + ("на" if female else "ич")
+            if female:
+                last_name = feminine(last_name)
+            users.append((user_id, TELEGRAM_ID_BASE + user_id, first_name, last_name, middle_name))
+
+            if user_id <= self.admins:
+                roles.append((user_id, self.roles["Администратор"]))
+            elif user_id <= self.admins + self.moderators:
+                roles.append((user_id, self.roles["Модератор"]))
+            else:
+                roles.append((user_id, self.roles["Студент"]))
+            categories.append((user_id, rng.choices(self.category_ids, cum_weights=self.category_cum)[0]))
+
+            # Геометрическое распределение числа заявок
+            count = int(math.log(1 - rng.random()) / math.log(1 - stop_probability))
+            count = min(count, len(self.olympiads) // 2)
+            if not count:
+                continue
+            picked = set(rng.choices(range(len(self.olympiads)), cum_weights=self.olympiad_cum, k=count))
+            for index in sorted(picked):
+                olympiad_id, _, _, _, start, end, _ = self.olympiads[index]
+                created = datetime.combine(start, datetime.min.time()) + timedelta(
+                    days=-rng.randint(0, 30), seconds=rng.randrange(86400)
+                )
+                if created > self.now:
+                    # Регистрация на будущие олимпиады уже открыта
+                    created = self.now - timedelta(seconds=rng.randrange(30 * 86400))
+                decided = end < self.args.today or (self.now - created).days > 14
+                status_id = rng.choices(
+                    self.status_ids,
+                    weights=DECIDED_STATUS_WEIGHTS if decided else RECENT_STATUS_WEIGHTS
+                )[0]
+
+                application_id = self.next_application_id
+                self.next_application_id += 1
+                applications.append((application_id, olympiad_id, user_id, status_id, created))
+
+                moderator_id = rng.randint(1, self.admins + self.moderators)
+                reviewed = min(created + timedelta(hours=rng.randint(1, 72)), self.now)
+                if status_id != self.pending_id:
+                    status_log.append((application_id, self.pending_id, status_id, moderator_id, reviewed))
+                    if rng.random() < 0.4:
+                        comments = APPROVED_COMMENTS if status_id == self.status_ids[1] else REJECTED_COMMENTS
+                        messages.append((moderator_id, application_id, rng.choice(comments), reviewed))
+                elif rng.random() < 0.05:
+                    messages.append((moderator_id, application_id, rng.choice(PENDING_COMMENTS), reviewed))
+
+        return users, roles, categories, applications, status_log, messages
+
+
+async def load_reference(conn: asyncpg.Connection) -> Dict[str, Dict[str, int]]:
+    """Идентификаторы справочников по названиям"""
+    return {
+        "roles": {r['role_name']: r['role_id'] for r in await conn.fetch("SELECT role_id, role_name FROM Role")},
+        "categories": {
+            r['category_name']: r['category_id']
+            for r in await conn.fetch("SELECT category_id, category_name FROM Category")
+        },
+        "statuses": {
+            r['status_name']: r['status_id']
+            for r in await conn.fetch("SELECT status_id, status_name FROM ApplicationStatus")
+        },
+        "subjects": {r['title']: r['subject_id'] for r in await conn.fetch("SELECT subject_id, title FROM Subject")},
+    }
+
+
+async def generate(conn: asyncpg.Connection, args) -> Dict[str, int]:
+    """Загрузка всего набора; возвращает число строк по таблицам"""
+    await seed_reference(conn)
+    generator = DatasetGenerator(args, await load_reference(conn))
+    totals = dict.fromkeys(
+        ("Olympiad", "Users", "UserRole", "UserCategory", "Application", "ApplicationStatusLog", "Messages"), 0
+    )
+
+    print(f"🏆 Олимпиады: {args.olympiads}")
+    await conn.copy_records_to_table(
+        "olympiad",
+        records=generator.olympiad_rows(),
+        columns=["olympiad_id", "title", "description", "organizer", "start_date", "end_date", "subject_id"]
+    )
+    totals["Olympiad"] = args.olympiads
+
+    columns = {
+        "Users": ["user_id", "telegram_id", "first_name", "last_name", "middle_name"],
+        "UserRole": ["user_id", "role_id"],
+        "UserCategory": ["user_id", "category_id"],
+        "Application": ["application_id", "olympiad_id", "user_id", "status_id", "created_date"],
+        "ApplicationStatusLog": ["application_id", "old_status_id", "new_status_id", "changed_by", "changed_date"],
+        "Messages": ["user_id", "application_id", "message_text", "sent_date"],
+    }
+    started = time.perf_counter()
+    for first in range(0, args.users, args.batch):
+        last = min(first + args.batch, args.users)
+        batch = generator.user_batch(first, last)
+        # Порядок таблиц соответствует внешним ключам
+        for (table, table_columns), records in zip(columns.items(), batch):
+            if records:
+                await conn.copy_records_to_table(table.lower(), records=records, columns=table_columns)
+                totals[table] += len(records)
+        elapsed = time.perf_counter() - started
+        print(
+            f"   👥 {last}/{args.users} пользователей, {totals['Application']} заявок, "
+            f"{totals['Messages']} сообщений ({elapsed:.0f} с)"
+        )
+
+    # Идентификаторы заданы явно - продвигаем последовательности
+    for table, column in (("users", "user_id"), ("olympiad", "olympiad_id"), ("application", "application_id")):
+        await conn.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), "
+            f"(SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}), false)"
+        )
+    return totals
+
+
+async def run(args) -> int:
+    try:
+        conn = await connect()
+    except Exception as e:
+        print(f"❌ Ошибка подключения: {e}")
+        return 1
+
+    try:
+        await create_schema(conn)
+        existing = await conn.fetchval("SELECT COUNT(*) FROM Users")
+        if existing and not args.force:
+            print(f"❌ В БД уже есть пользователи ({existing}); для их удаления запустите с --force")
+            return 1
+
+        started = time.perf_counter()
+        async with conn.transaction():
+            totals = await generate(conn, args)
+        elapsed = time.perf_counter() - started
+
+        print("📈 Обновляем статистику планировщика...")
+        for table in totals:
+            await conn.execute(f"ANALYZE {table}")
+
+        rows = sum(totals.values())
+        print(f"\n🎉 Загружено {rows} строк за {elapsed:.1f} с ({rows / elapsed:.0f} строк/с)")
+        for table, count in totals.items():
+            print(f"   {table}: {count}")
+        return 0
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--olympiads", type=int, help="по умолчанию - одна на 500 пользователей, не меньше 50")
+    parser.add_argument("--apps-per-user", type=float, default=3.0, help="среднее число заявок пользователя")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--today", type=date.fromisoformat, default=date.today(),
+                        help="дата, от которой отсчитываются олимпиады (ГГГГ-ММ-ДД)")
+    parser.add_argument("--batch", type=int, default=20_000, help="пользователей в одной пачке COPY")
+    parser.add_argument("--force", action="store_true", help="удалить существующие данные")
+    args = parser.parse_args()
+    if args.olympiads is None:
+        args.olympiads = max(50, args.users // 500)
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+"""Нагрузочный тест диспетчера без сети.
+
+Виртуальные пользователи проходят регистрацию, смотрят олимпиады, подают
+заявки, а модераторы разбирают их. Апдейты подаются напрямую в
+Dispatcher.feed_update, запросы к Bot API перехватывает StubSession.
+БД - настоящая: пользователи создаются с telegram_id выше TELEGRAM_ID_BASE
+и удаляются после прогона. Считаются пропускная способность и
+p50/p95/p99 по хендлерам.
+
+Запуск (на тестовой БД со справочниками и олимпиадами):
+    python -m tools.loadtest --users 500 --moderators 5 --concurrency 50 --duration 30
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, get_args
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import TelegramMethod
+from aiogram.types import CallbackQuery, Chat, Message, TelegramObject, Update, User
+
+from dispatcher import get_dispatcher
+from services.database import Database
+
+# Виртуальные пользователи получают telegram_id выше этого значения
+TELEGRAM_ID_BASE = 8_000_000_000
+
+# Токен нужного формата; запросы с ним никуда не уходят
+STUB_TOKEN = "42:LOADTEST"
+
+
+def fake_result(bot: Bot, method: TelegramMethod, message_id: int):
+    """Правдоподобный ответ Bot API на метод (только то, что используют хендлеры)"""
+    returning = method.__returning__
+    options = get_args(returning) or (returning,)
+    if Message in options:
+        chat_id = getattr(method, "chat_id", None)
+        return Message(
+            message_id=message_id,
+            date=datetime.now(),
+            chat=Chat(id=chat_id if isinstance(chat_id, int) else 0, type="private"),
+            from_user=User(id=bot.id, is_bot=True, first_name="Bot"),
+            text=getattr(method, "text", None)
+        )
+    if bool in options:
+        return True
+    if User in options:
+        return User(id=bot.id, is_bot=True, first_name="Bot", username="loadtest_bot")
+    return None
+
+
+class StubSession(BaseSession):
+    """Сессия Bot API без сети: ответы собираются на месте, вызовы считаются"""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self._message_ids = itertools.count(1_000_000)
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None):
+        self.calls[type(method).__name__] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return fake_result(bot, method, next(self._message_ids))
+
+    async def stream_content(self, url: str, headers=None, timeout: int = 30,
+                             chunk_size: int = 65536, raise_for_status: bool = True) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+class HandlerTimer(BaseMiddleware):
+    """Время выполнения выбранного хендлера (внутренний middleware)"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            self.samples[data["handler"].callback.__name__].append(time.perf_counter() - started)
+
+
+class LoadStats:
+    """Итоги прогона: задержка апдейтов целиком, ошибки и апдейты без хендлера"""
+
+    def __init__(self):
+        self.updates: List[float] = []
+        self.errors: Counter = Counter()
+        self.unhandled: Counter = Counter()
+
+
+class VirtualUser:
+    """Пользователь Telegram, от имени которого в диспетчер подаются апдейты"""
+
+    _update_ids = itertools.count(1)
+
+    def __init__(self, bot: Bot, dp: Dispatcher, telegram_id: int, stats: LoadStats):
+        self.bot = bot
+        self.dp = dp
+        self.stats = stats
+        self.user = User(id=telegram_id, is_bot=False, first_name="Нагрузка", language_code="ru")
+        self.chat = Chat(id=telegram_id, type="private")
+        self._message_ids = itertools.count(1)
+
+    def _message(self, text: Optional[str], from_user: User) -> Message:
+        return Message(
+            message_id=next(self._message_ids),
+            date=datetime.now(),
+            chat=self.chat,
+            from_user=from_user,
+            text=text
+        )
+
+    async def _feed(self, step: str, update: Update) -> Any:
+        started = time.perf_counter()
+        try:
+            result = await self.dp.feed_update(self.bot, update)
+        except Exception as e:
+            self.stats.errors[f"{step}: {type(e).__name__}"] += 1
+            return None
+        finally:
+            self.stats.updates.append(time.perf_counter() - started)
+        if result is UNHANDLED:
+            self.stats.unhandled[step] += 1
+        return result
+
+    async def send(self, text: str) -> Any:
+        """Сообщение от пользователя"""
+        return await self._feed(text, Update(
+            update_id=next(self._update_ids),
+            message=self._message(text, self.user)
+        ))
+
+    async def press(self, data: str) -> Any:
+        """Нажатие инлайн-кнопки под последним сообщением бота"""
+        bot_user = User(id=self.bot.id, is_bot=True, first_name="Bot")
+        return await self._feed(data.rstrip("0123456789_"), Update(
+            update_id=next(self._update_ids),
+            callback_query=CallbackQuery(
+                id=str(next(self._update_ids)),
+                from_user=self.user,
+                chat_instance=str(self.chat.id),
+                message=self._message("…", bot_user),
+                data=data
+            )
+        ))
+
+
+class Scenarios:
+    """Сценарии поведения пользователей на общих данных прогона"""
+
+    def __init__(self, db: Database, first_id: int, last_id: int):
+        self.db = db
+        self.first_id = first_id
+        self.last_id = last_id
+        self.olympiad_ids: List[int] = []
+        self.pending: List[int] = []
+
+    async def load(self) -> None:
+        self.olympiad_ids = [row['olympiad_id'] for row in await self.db.get_active_olympiads()]
+        if not self.olympiad_ids:
+            print("⚠️ Нет активных олимпиад: сценарий подачи заявок будет только открывать список")
+
+    async def registration(self, user: VirtualUser) -> None:
+        await user.send("/start")
+        await user.send("Иван")
+        await user.send("Иванов")
+        await user.send("-")
+        await user.press("role_student")
+        category_ids = [c['category_id'] for c in self.db.reference.categories] or [1]
+        await user.press(f"category_{random.choice(category_ids)}")
+        await user.press("confirm_yes")
+
+    async def browse_and_apply(self, user: VirtualUser) -> None:
+        await user.send("🏆 Доступные олимпиады")
+        if self.olympiad_ids:
+            await user.press(f"olympiad_{random.choice(self.olympiad_ids)}")
+            await user.press("application_confirm")
+        await user.send("📋 Мои заявки")
+        await user.send("👤 Профиль")
+
+    async def moderation(self, moderator: VirtualUser) -> None:
+        await moderator.send("📝 Заявки на модерации")
+        application_id = await self._next_pending()
+        if application_id is None:
+            return
+        await moderator.press(f"app_id_{application_id}")
+        await moderator.press(random.choice(["app_approve_", "app_reject_"]) + str(application_id))
+        await moderator.press("skip_comment")
+
+    async def _next_pending(self) -> Optional[int]:
+        """Заявка виртуального пользователя на рассмотрении (реальные заявки не трогаем)"""
+        if not self.pending:
+            async with self.db.pool.acquire() as conn:
+                self.pending = [
+                    row['application_id'] for row in await conn.fetch(
+                        """
+                        SELECT a.application_id
+                        FROM Application a
+                        JOIN Users u ON u.user_id = a.user_id
+                        WHERE u.telegram_id BETWEEN $1 AND $2 AND a.status_id = $3
+                        LIMIT 100
+                        """,
+                        self.first_id, self.last_id, self.db.reference.status_ids.get('Рассмотрение')
+                    )
+                ]
+        return self.pending.pop() if self.pending else None
+
+
+async def cleanup(db: Database, first_id: int, last_id: int) -> None:
+    """Удаление всего, что создали виртуальные пользователи"""
+    async with db.pool.acquire() as conn:
+        async with conn.transaction():
+            users = "SELECT user_id FROM Users WHERE telegram_id BETWEEN $1 AND $2"
+            await conn.execute(f"DELETE FROM Messages WHERE user_id IN ({users})", first_id, last_id)
+            await conn.execute(
+                f"DELETE FROM Messages WHERE application_id IN "
+                f"(SELECT application_id FROM Application WHERE user_id IN ({users}))",
+                first_id, last_id
+            )
+            await conn.execute(f"DELETE FROM Application WHERE user_id IN ({users})", first_id, last_id)
+            await conn.execute(f"DELETE FROM UserRole WHERE user_id IN ({users})", first_id, last_id)
+            await conn.execute(f"DELETE FROM UserCategory WHERE user_id IN ({users})", first_id, last_id)
+            await conn.execute("DELETE FROM Users WHERE telegram_id BETWEEN $1 AND $2", first_id, last_id)
+            await conn.execute("DELETE FROM NotificationOutbox WHERE chat_id BETWEEN $1 AND $2", first_id, last_id)
+    db.invalidate_profile_cache()
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def print_report(title: str, stats: LoadStats, timer: HandlerTimer, session: StubSession, elapsed: float) -> None:
+    count = len(stats.updates)
+    print(f"\n📊 {title}: {count} апдейтов за {elapsed:.1f} с ({count / elapsed:.0f} апд/с)")
+    if count:
+        print(
+            f"   апдейт целиком: p50 {percentile(stats.updates, 0.5) * 1000:.1f} мс, "
+            f"p95 {percentile(stats.updates, 0.95) * 1000:.1f} мс, "
+            f"p99 {percentile(stats.updates, 0.99) * 1000:.1f} мс"
+        )
+    print(f"   {'хендлер':<40} {'вызовов':>8} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9}")
+    for name, samples in sorted(timer.samples.items(), key=lambda item: -sum(item[1])):
+        print(
+            f"   {name:<40} {len(samples):>8} {percentile(samples, 0.5) * 1000:>9.1f} "
+            f"{percentile(samples, 0.95) * 1000:>9.1f} {percentile(samples, 0.99) * 1000:>9.1f}"
+        )
+    print(f"   вызовы Bot API: {dict(session.calls.most_common())}")
+    for step, n in stats.unhandled.most_common():
+        print(f"⚠️ без хендлера: {step} ({n})")
+    for error, n in stats.errors.most_common():
+        print(f"❌ {error} ({n})")
+
+
+async def run_phase(
+    title: str,
+    jobs: Callable[[], Optional[Awaitable[None]]],
+    concurrency: int,
+    stats: LoadStats,
+    timer: HandlerTimer,
+    session: StubSession
+) -> None:
+    """Выполнение сценариев в concurrency потоков, пока jobs() не вернет None"""
+    stats.updates.clear()
+    timer.samples.clear()
+    session.calls.clear()
+
+    async def worker():
+        while (job := jobs()) is not None:
+            await job
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    print_report(title, stats, timer, session, time.perf_counter() - started)
+
+
+async def run(args) -> int:
+    db = Database()
+    if not await db.initialize():
+        return 1
+
+    first_id = TELEGRAM_ID_BASE
+    last_id = TELEGRAM_ID_BASE + args.users + args.moderators
+    await cleanup(db, first_id, last_id)
+
+    session = StubSession(latency=args.api_latency / 1000)
+    bot = Bot(token=STUB_TOKEN, session=session)
+    dp = get_dispatcher(storage=MemoryStorage())
+    timer = HandlerTimer()
+    dp.message.middleware(timer)
+    dp.callback_query.middleware(timer)
+
+    stats = LoadStats()
+    scenarios = Scenarios(db, first_id, last_id)
+    await scenarios.load()
+
+    users = [VirtualUser(bot, dp, first_id + i, stats) for i in range(args.users)]
+    moderators = [VirtualUser(bot, dp, first_id + args.users + i, stats) for i in range(args.moderators)]
+    for moderator in moderators:
+        await db.create_user(moderator.user.id, "Модератор", "Нагрузка", role="Модератор")
+
+    try:
+        # Регистрация: каждый пользователь по одному разу
+        pending_registration = iter(users)
+        await run_phase(
+            "Регистрация",
+            lambda: next((scenarios.registration(u) for u in pending_registration), None),
+            args.concurrency, stats, timer, session
+        )
+
+        # Смешанная нагрузка: пользователь не проходит два сценария одновременно
+        idle_users, idle_moderators = list(users), list(moderators)
+        deadline = time.monotonic() + args.duration
+
+        async def occupied(pool: List[VirtualUser], scenario, user: VirtualUser):
+            try:
+                await scenario(user)
+            finally:
+                pool.append(user)
+
+        def next_job():
+            if time.monotonic() >= deadline:
+                return None
+            if idle_moderators and random.random() < args.moderation_share:
+                pool, scenario = idle_moderators, scenarios.moderation
+            elif idle_users:
+                pool, scenario = idle_users, scenarios.browse_and_apply
+            else:
+                return asyncio.sleep(0.001)
+            user = pool.pop(random.randrange(len(pool)))
+            return occupied(pool, scenario, user)
+
+        await run_phase("Смешанная нагрузка", next_job, args.concurrency, stats, timer, session)
+        return 1 if stats.errors else 0
+    finally:
+        if not args.keep:
+            await cleanup(db, first_id, last_id)
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200, help="виртуальных пользователей")
+    parser.add_argument("--moderators", type=int, default=2, help="виртуальных модераторов")
+    parser.add_argument("--concurrency", type=int, default=20, help="одновременных сценариев")
+    parser.add_argument("--duration", type=float, default=20, help="длительность смешанной нагрузки, с")
+    parser.add_argument("--moderation-share", type=float, default=0.2, help="доля сценариев модерации")
+    parser.add_argument("--api-latency", type=float, default=0, help="задержка ответа Bot API, мс")
+    parser.add_argument("--keep", action="store_true", help="не удалять созданные данные")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
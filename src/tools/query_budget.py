@@ -0,0 +1,233 @@
+"""Бюджет обращений к БД для сценариев хендлеров.
+
+Прогоняет через Dispatcher.feed_update фиксированные сценарии участника
+(регистрация, олимпиады, заявки, удаление аккаунта) и модератора (очередь
+модерации, олимпиады, заявки, смена статуса) и для каждого апдейта считает
+запросы к БД и получения соединения из пула (services.metrics.RoundTrips).
+Превышение BUDGETS, хендлер без бюджета или апдейт, обработанный не тем
+хендлером, - ошибка: код выхода 1. Так лишние запросы находятся до выкладки.
+
+Профиль для UserProfileMiddleware берется из кэша Database.profile_cache:
+запрос на его загрузку входит в бюджет только первого апдейта пользователя.
+БД - настоящая: пользователи создаются с telegram_id выше TELEGRAM_ID_BASE
+и удаляются после прогона.
+
+Запуск (на тестовой БД со справочниками и хотя бы одной активной олимпиадой):
+    python -m tools.query_budget
+Те же сценарии проверяет pytest (tests/test_query_budget.py).
+"""
+import argparse
+import asyncio
+import sys
+from typing import Awaitable, Dict, List, Tuple
+
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from dispatcher import get_dispatcher
+from services.database import Database
+from services.metrics import RoundTrips, current_round_trips
+from tools.loadtest import STUB_TOKEN, LoadStats, StubSession, VirtualUser, cleanup
+
+# Пользователи прогона получают telegram_id выше этого значения
+TELEGRAM_ID_BASE = 6_000_000_000
+
+# Хендлер: (запросов, получений соединения) за апдейт, включая загрузку профиля при промахе кэша
+BUDGETS: Dict[str, Tuple[int, int]] = {
+    # Регистрация
+    "cmd_start": (1, 1),
+    "process_first_name": (0, 0),
+    "process_last_name": (0, 0),
+    "process_middle_name": (0, 0),
+    "process_role_selection": (0, 0),
+    "process_category_selection": (0, 0),
+    "confirm_registration": (4, 2),
+    # Участник
+    "view_profile": (0, 0),
+    "show_olympiads": (1, 1),
+    "select_olympiad": (1, 1),
+    "confirm_application": (1, 1),
+    "show_my_applications": (1, 1),
+    "view_my_application_details": (2, 2),
+    "back_to_my_applications": (1, 1),
+    "cmd_delete_account": (0, 0),
+    "confirm_delete": (5, 1),
+    # Модератор
+    "show_pending_applications": (2, 2),
+    "show_application_details": (1, 1),
+    "list_olympiads": (1, 1),
+    "view_olympiad_details": (1, 1),
+    "view_olympiad_applications": (2, 2),
+    "view_application_admin": (2, 2),
+    "start_edit_application_message": (1, 1),
+    "process_edit_application_message": (4, 4),
+    "back_to_applications_list": (2, 2),
+    "change_application_status": (1, 1),
+    "set_application_status": (3, 1),
+    "approve_application": (0, 0),
+    "skip_comment": (3, 1),
+}
+
+
+class BudgetCheck:
+    """Замер обращений к БД по апдейтам сценария"""
+
+    def __init__(self):
+        self.results: List[Tuple[str, RoundTrips]] = []
+
+    async def __call__(self, expected: str, action: Awaitable) -> RoundTrips:
+        """Выполняет действие пользователя, считая обращения к БД за апдейт"""
+        round_trips = RoundTrips()
+        token = current_round_trips.set(round_trips)
+        try:
+            await action
+        finally:
+            current_round_trips.reset(token)
+        self.results.append((expected, round_trips))
+        return round_trips
+
+    def problems(self, expected: str, round_trips: RoundTrips) -> List[str]:
+        """Нарушения бюджета одного апдейта"""
+        problems = []
+        budget = BUDGETS.get(expected)
+        if round_trips.handler != expected:
+            problems.append(f"апдейт обработал {round_trips.handler or 'никто'}")
+        if budget is None:
+            return problems + ["нет бюджета в BUDGETS"]
+        if len(round_trips.queries) > budget[0]:
+            problems.append(f"запросы: {', '.join(round_trips.queries)}")
+        if round_trips.acquisitions > budget[1]:
+            problems.append("лишние получения соединения из пула")
+        return problems
+
+    def report(self) -> int:
+        """Печать результатов; число нарушений"""
+        violations = 0
+        print(f"   {'хендлер':<36} {'запросов':>10} {'соединений':>12}")
+        for expected, round_trips in self.results:
+            queries, acquisitions = len(round_trips.queries), round_trips.acquisitions
+            budget = BUDGETS.get(expected, (queries, acquisitions))
+            problems = self.problems(expected, round_trips)
+
+            mark = "❌" if problems else "✅"
+            print(f"{mark} {expected:<36} {queries:>5}/{budget[0]:<4} {acquisitions:>6}/{budget[1]:<4}")
+            for problem in problems:
+                print(f"      {problem}")
+            violations += bool(problems)
+
+        # Бюджет с запасом скрывает будущие регрессии (сравнивается максимум по всем путям хендлера)
+        peaks: Dict[str, Tuple[int, int]] = {}
+        for expected, round_trips in self.results:
+            queries, acquisitions = peaks.get(expected, (0, 0))
+            peaks[expected] = (max(queries, len(round_trips.queries)), max(acquisitions, round_trips.acquisitions))
+        for handler, peak in peaks.items():
+            budget = BUDGETS.get(handler)
+            if budget and peak != budget and peak[0] <= budget[0] and peak[1] <= budget[1]:
+                print(f"💡 {handler}: бюджет можно уменьшить до {peak}")
+        return violations
+
+
+async def participant_path(check: BudgetCheck, db: Database, student: VirtualUser) -> None:
+    """Регистрация, олимпиады, заявка, удаление аккаунта"""
+    category_id = min(db.reference.category_names)
+    await check("cmd_start", student.send("/start"))
+    await check("process_first_name", student.send("Бюджет"))
+    await check("process_last_name", student.send("Запросов"))
+    await check("process_middle_name", student.send("-"))
+    await check("process_role_selection", student.press("role_student"))
+    await check("process_category_selection", student.press(f"category_{category_id}"))
+    await check("confirm_registration", student.press("confirm_yes"))
+    await check("view_profile", student.send("👤 Профиль"))
+
+    olympiads = await db.get_active_olympiads()
+    if not olympiads:
+        raise RuntimeError("Нет активных олимпиад - сценарий заявки не пройти")
+    olympiad_id = olympiads[0]['olympiad_id']
+    await check("show_olympiads", student.send("🏆 Доступные олимпиады"))
+    await check("select_olympiad", student.press(f"olympiad_{olympiad_id}"))
+    await check("confirm_application", student.press("application_confirm"))
+    await check("show_my_applications", student.send("📋 Мои заявки"))
+
+    user = await db.get_user(student.user.id)
+    application_id = (await db.get_user_applications(user['user_id']))[0]['application_id']
+    await check("view_my_application_details", student.press(f"view_my_app_{application_id}"))
+    await check("back_to_my_applications", student.press("back_to_my_applications"))
+
+
+async def moderator_path(check: BudgetCheck, db: Database, moderator: VirtualUser, student: VirtualUser) -> None:
+    """Очередь модерации и управление заявками участника"""
+    user = await db.get_user(student.user.id)
+    application = (await db.get_user_applications(user['user_id']))[0]
+    application_id = application['application_id']
+    olympiad_id = (await db.get_application_details(application_id))['olympiad_id']
+
+    await check("show_pending_applications", moderator.send("📝 Заявки на модерации"))
+    await check("show_application_details", moderator.press(f"app_id_{application_id}"))
+    await check("list_olympiads", moderator.send("📋 Список олимпиад"))
+    await check("view_olympiad_details", moderator.press(f"view_olympiad_{olympiad_id}"))
+    await check("view_olympiad_applications", moderator.press(f"view_olympiad_apps_{olympiad_id}"))
+    await check("view_application_admin", moderator.press(f"app_admin_app_check_{application_id}"))
+    await check("start_edit_application_message", moderator.press(f"edit_app_message_{application_id}"))
+    await check("process_edit_application_message", moderator.send("Проверяем документы"))
+    # Второй раз текущее сообщение модератора уже есть
+    await check("start_edit_application_message", moderator.press(f"edit_app_message_{application_id}"))
+    await check("process_edit_application_message", moderator.send("-"))
+    await check("back_to_applications_list", moderator.press(f"back_to_applications_list_{application_id}"))
+    await check("change_application_status", moderator.press(f"change_app_status_{application_id}"))
+    await check("set_application_status", moderator.press(f"set_app_status_{application_id}_Отклонена"))
+    await check("approve_application", moderator.press(f"app_approve_{application_id}"))
+    await check("skip_comment", moderator.press("skip_comment"))
+
+    await check("cmd_delete_account", student.send("❌ Удалить аккаунт"))
+    await check("confirm_delete", student.press("delete_yes"))
+
+
+async def measure(db: Database, dp: Dispatcher) -> Tuple[BudgetCheck, LoadStats]:
+    """Прогон сценариев участника и модератора; пользователи прогона удаляются"""
+    session = StubSession()
+    bot = Bot(token=STUB_TOKEN, session=session)
+    stats = LoadStats()
+    student = VirtualUser(bot, dp, TELEGRAM_ID_BASE + 1, stats)
+    moderator = VirtualUser(bot, dp, TELEGRAM_ID_BASE + 2, stats)
+    check = BudgetCheck()
+
+    try:
+        category_id = min(db.reference.category_names)
+        await db.create_user(moderator.user.id, "Бюджет", "Модератор", role="Модератор", category_id=category_id)
+        await participant_path(check, db, student)
+        await moderator_path(check, db, moderator, student)
+    finally:
+        await cleanup(db, TELEGRAM_ID_BASE, TELEGRAM_ID_BASE + 2)
+    return check, stats
+
+
+async def run(args) -> int:
+    db = Database()
+    if not await db.initialize():
+        return 1
+    try:
+        check, stats = await measure(db, get_dispatcher(MemoryStorage()))
+    finally:
+        await db.close()
+
+    print("\n📊 Обращения к БД за апдейт (факт/бюджет)")
+    violations = check.report()
+    for step, count in stats.unhandled.items():
+        print(f"⚠️ не обработано: {step} ({count})")
+    for error, count in stats.errors.items():
+        print(f"❌ ошибка: {error} ({count})")
+        violations += count
+    if violations:
+        print(f"\n❌ Нарушений бюджета: {violations}")
+        return 1
+    print("\n✅ Все хендлеры укладываются в бюджет")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import asyncio
+import os
+import sys
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+# Модули бота импортируются от каталога src, как при запуске python bot.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Тестовая БД из переменных DB__*; без нее тесты пропускаются"""
+    if not os.getenv("DB__NAME"):
+        pytest.skip("DB__NAME не задан - тесты с БД пропущены")
+
+    from tools.explain_check import connect
+
+    async def probe():
+        conn = await connect()
+        await conn.close()
+
+    try:
+        asyncio.run(probe())
+    except Exception as e:
+        pytest.skip(f"БД недоступна: {e}")
+
+
+@pytest.fixture(scope="session")
+def redis_server():
+    """Общий in-memory сервер fakeredis: данные видны всем его клиентам"""
+    return FakeServer()
+
+
+@pytest.fixture(scope="session")
+def dispatcher(redis_server):
+    """Диспетчер бота с FSM в Redis (fakeredis).
+
+    Роутеры подключаются к диспетчеру один раз за процесс, поэтому он общий для всех тестов.
+    """
+    from dispatcher import get_dispatcher
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("FSM__STORAGE", "redis")
+        mp.setattr("redis.asyncio.Redis", lambda **kwargs: FakeRedis(server=redis_server))
+        return get_dispatcher()
@@ -0,0 +1,19 @@
+import asyncio
+
+from tools.explain_check import check_plans, connect
+
+
+async def _check():
+    conn = await connect()
+    try:
+        return await check_plans(conn, users=20000, olympiads=2000, per_user=5)
+    finally:
+        await conn.close()
+
+
+def test_query_plans(database):
+    report = asyncio.run(_check())
+
+    assert report.errors == {}
+    assert report.violations == {}
+    assert report.unchecked == []
@@ -0,0 +1,104 @@
+import asyncio
+from datetime import date
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.redis import RedisEventIsolation, RedisStorage
+from fakeredis.aioredis import FakeRedis
+
+from dispatcher import create_fsm_storage
+
+KEY = StorageKey(bot_id=1, chat_id=100, user_id=100)
+
+
+@pytest.fixture
+def redis_settings(monkeypatch, redis_server):
+    """create_fsm_storage в режиме redis поверх fakeredis; возвращает параметры подключения"""
+    settings = {}
+
+    def fake_redis(**kwargs):
+        settings.update(kwargs)
+        return FakeRedis(server=redis_server)
+
+    monkeypatch.setenv("FSM__STORAGE", "redis")
+    monkeypatch.setenv("FSM__STATE_TTL", "600")
+    monkeypatch.setenv("FSM__DATA_TTL", "1200")
+    monkeypatch.setenv("REDIS__HOST", "redis.local")
+    monkeypatch.setenv("REDIS__DB", "3")
+    monkeypatch.setattr("redis.asyncio.Redis", fake_redis)
+    return settings
+
+
+def test_redis_storage_from_env(redis_settings):
+    storage = create_fsm_storage()
+
+    assert isinstance(storage, RedisStorage)
+    assert redis_settings["host"] == "redis.local"
+    assert redis_settings["db"] == 3
+
+
+def test_keys_isolated_by_bot_id(redis_settings):
+    async def scenario():
+        storage = create_fsm_storage()
+        other_bot = StorageKey(bot_id=2, chat_id=KEY.chat_id, user_id=KEY.user_id)
+        await storage.set_state(KEY, "Registration:first_name")
+        await storage.set_data(KEY, {"first_name": "Иван"})
+        try:
+            assert await storage.get_state(other_bot) is None
+            assert await storage.get_data(other_bot) == {}
+            assert await storage.redis.exists(f"fsm:1:{KEY.chat_id}:{KEY.user_id}:state")
+        finally:
+            await storage.set_state(KEY, None)
+            await storage.set_data(KEY, {})
+
+    asyncio.run(scenario())
+
+
+def test_state_and_data_expire(redis_settings):
+    async def scenario():
+        storage = create_fsm_storage()
+        await storage.set_state(KEY, "Registration:first_name")
+        await storage.set_data(KEY, {"first_name": "Иван"})
+        try:
+            assert 0 < await storage.redis.ttl(f"fsm:1:{KEY.chat_id}:{KEY.user_id}:state") <= 600
+            assert 600 < await storage.redis.ttl(f"fsm:1:{KEY.chat_id}:{KEY.user_id}:data") <= 1200
+        finally:
+            await storage.set_state(KEY, None)
+            await storage.set_data(KEY, {})
+
+    asyncio.run(scenario())
+
+
+def test_no_ttl_when_disabled(redis_settings, monkeypatch):
+    monkeypatch.setenv("FSM__STATE_TTL", "0")
+
+    async def scenario():
+        storage = create_fsm_storage()
+        await storage.set_state(KEY, "Registration:first_name")
+        try:
+            assert await storage.redis.ttl(f"fsm:1:{KEY.chat_id}:{KEY.user_id}:state") == -1
+        finally:
+            await storage.set_state(KEY, None)
+
+    asyncio.run(scenario())
+
+
+def test_dates_round_trip_as_iso_strings(redis_settings):
+    # Хендлеры создания олимпиады хранят даты в FSM строками ISO (данные сериализуются в JSON)
+    async def scenario():
+        await create_fsm_storage().set_data(KEY, {"start_date": date(2026, 3, 1).isoformat()})
+        # Данные читает другая реплика бота со своим подключением к Redis
+        storage = create_fsm_storage()
+        try:
+            data = await storage.get_data(KEY)
+            assert date.fromisoformat(data["start_date"]) == date(2026, 3, 1)
+        finally:
+            await storage.set_data(KEY, {})
+
+    asyncio.run(scenario())
+
+
+def test_dispatcher_uses_storage_isolation(dispatcher):
+    assert isinstance(dispatcher.fsm.storage, RedisStorage)
+    assert isinstance(dispatcher.fsm.events_isolation, RedisEventIsolation)
+    assert dispatcher.fsm.events_isolation.redis is dispatcher.fsm.storage.redis
@@ -0,0 +1,32 @@
+import asyncio
+
+from services.database import Database
+from tools.query_budget import BUDGETS, measure
+
+
+async def _measure(dp):
+    db = Database()
+    assert await db.initialize()
+    try:
+        return await measure(db, dp)
+    finally:
+        await db.close()
+
+
+def test_handlers_fit_query_budgets(database, dispatcher):
+    check, stats = asyncio.run(_measure(dispatcher))
+
+    failures = {
+        f"{step}. {expected}": problems
+        for step, (expected, round_trips) in enumerate(check.results, 1)
+        if (problems := check.problems(expected, round_trips))
+    }
+    assert failures == {}
+    assert stats.errors == {}
+    assert stats.unhandled == {}
+
+
+def test_every_budget_is_exercised(database, dispatcher):
+    check, _ = asyncio.run(_measure(dispatcher))
+
+    assert set(BUDGETS) == {expected for expected, _ in check.results}